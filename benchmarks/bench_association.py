@@ -0,0 +1,61 @@
+"""
+sort.associate_detections_to_trackers: dense IoU matrix vs grid-gated,
+component-wise assignment, over crowd sizes.
+
+Run from the repo root:
+    python -m benchmarks.bench_association --crowds 50 100 200 500 1000 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import sort.sort as sort_module
+from benchmarks.synthetic_crowd import generate_crowd
+
+DENSE = 10 ** 18   # GATING_MIN_PAIRS that never gates
+GATED = 0          # always gates
+
+
+def time_association(dets, trks, mode, repeats):
+    sort_module.GATING_MIN_PAIRS = mode
+    result = sort_module.associate_detections_to_trackers(dets, trks, 0.3)  # also loads the solver
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sort_module.associate_detections_to_trackers(dets, trks, 0.3)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="association: dense vs gated")
+    parser.add_argument("--crowds", type=int, nargs="+", default=[50, 100, 200, 500, 1000, 2000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    default = sort_module.GATING_MIN_PAIRS
+
+    print(f"{'people':>7} | {'dense ms':>9} | {'gated ms':>9} | {'speedup':>7} | same result")
+    print("-" * 52)
+    try:
+        for n in args.crowds:
+            # full-HD frame, boxes scaled so density stays similar across sizes
+            frames = generate_crowd(n_objects=n, n_frames=2, occlusion=0.05, false_positives=n * 0.02,
+                                    width=int(1920 * max(1.0, np.sqrt(n / 100))),
+                                    height=int(1080 * max(1.0, np.sqrt(n / 100))), seed=args.seed)
+            trks = np.concatenate([frames[0].gt_boxes, np.zeros((len(frames[0].gt_boxes), 1))], axis=1)
+            dets = frames[1].dets
+
+            dense, a = time_association(dets, trks, DENSE, args.repeats)
+            gated, b = time_association(dets, trks, GATED, args.repeats)
+            same = all(np.array_equal(x, y) for x, y in zip(a, b))
+            print(f"{n:>7} | {dense * 1e3:>9.2f} | {gated * 1e3:>9.2f} | {dense / gated:>6.1f}x | {same}")
+    finally:
+        sort_module.GATING_MIN_PAIRS = default
+
+
+if __name__ == "__main__":
+    main()
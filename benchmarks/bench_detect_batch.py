@@ -0,0 +1,57 @@
+"""
+Frames/sec of YOLODetector.detect_batch() against batch size.
+
+Run from the repo root:
+    python -m benchmarks.bench_detect_batch --sizes 1 2 4 8 16
+"""
+import argparse
+import time
+
+import numpy as np
+
+from detector.layer2_yolo_detector import YOLODetector
+
+
+def make_frames(n, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def bench(detector, frames, batch_size, repeats):
+    # one warm-up call so the first batch does not pay model init
+    detector.detect_batch(frames[:batch_size])
+
+    n = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i in range(0, len(frames) - batch_size + 1, batch_size):
+            detector.detect_batch(frames[i:i + batch_size])
+            n += batch_size
+    elapsed = time.perf_counter() - start
+    return n / elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="detect_batch throughput")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--frames", type=int, default=32, help="frames per repeat")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    detector = YOLODetector(model_path=args.model, classes=["person"])
+    frames = make_frames(args.frames, args.width, args.height)
+
+    print(f"{'batch':>5} | {'frames/s':>9} | {'ms/frame':>8}")
+    for size in args.sizes:
+        fps = bench(detector, frames, size, args.repeats)
+        print(f"{size:>5} | {fps:>9.1f} | {1000 / fps:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Latency of YOLODetector per backend/precision on CPU.
+
+Run from the repo root:
+    python -m benchmarks.bench_detector_backends --threads 4
+    python -m benchmarks.bench_detector_backends --variants torch:fp32 onnx:fp32 openvino:int8
+
+The first run of an exported variant includes the export; it is cached
+next to the weights afterwards (see detector.layer2_backends.export_path).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from detector.layer2_yolo_detector import YOLODetector
+
+DEFAULT_VARIANTS = ["torch:fp32", "onnx:fp32", "onnx:int8", "openvino:fp32", "openvino:fp16", "openvino:int8"]
+
+
+def bench(detector, frame, runs):
+    detector.warmup(runs=2)
+    start = time.perf_counter()
+    for _ in range(runs):
+        detector.detect(frame)
+    return (time.perf_counter() - start) / runs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="detector backend comparison")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--variants", nargs="+", default=DEFAULT_VARIANTS, help="backend:precision")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=20)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    print(f"{'variant':<15} | {'load s':>6} | {'ms/frame':>8} | {'FPS':>6}")
+    for variant in args.variants:
+        backend, precision = variant.split(":")
+        try:
+            start = time.perf_counter()
+            detector = YOLODetector(
+                model_path=args.model, classes=["person"], backend=backend,
+                imgsz=args.imgsz, precision=precision, threads=args.threads
+            )
+            load = time.perf_counter() - start
+            latency = bench(detector, frame, args.runs)
+        except Exception as e:  # missing runtime, unsupported precision, no calibration data...
+            print(f"{variant:<15} | skipped: {e}")
+            continue
+        print(f"{variant:<15} | {load:>6.1f} | {latency * 1000:>8.1f} | {1 / latency:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
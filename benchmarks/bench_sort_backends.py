@@ -0,0 +1,64 @@
+"""
+sort.Sort (one filterpy KalmanFilter per track) vs sort.batch_sort.BatchSort
+(stacked arrays) over a sweep of track counts.
+
+Run from the repo root:
+    python -m benchmarks.bench_sort_backends --tracks 10 50 100 200 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from sort.batch_sort import BatchSort
+from sort.sort import KalmanBoxTracker, Sort
+
+
+def make_sequence(n_objects, n_frames, seed=0):
+    """
+    Boxes moving at constant velocity with pixel noise, in [x1,y1,x2,y2,score].
+    """
+    rng = np.random.default_rng(seed)
+    side = 60 * np.sqrt(n_objects) + 500  # keep density roughly constant
+    pos = rng.uniform(0, side, (n_objects, 2))
+    vel = rng.normal(0, 2, (n_objects, 2))
+    size = rng.uniform(30, 80, (n_objects, 2))
+
+    frames = []
+    for _ in range(n_frames):
+        pos += vel
+        dets = np.concatenate([pos, pos + size, np.ones((n_objects, 1))], axis=1)
+        dets[:, :4] += rng.normal(0, 1.0, (n_objects, 4))
+        frames.append(dets)
+    return frames
+
+
+def run(tracker_cls, frames):
+    KalmanBoxTracker.count = 0
+    tracker = tracker_cls(max_age=30, min_hits=3, iou_threshold=0.3)
+    start = time.perf_counter()
+    for dets in frames:
+        tracker.update(dets)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SORT backend sweep")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 50, 100, 200, 500])
+    parser.add_argument("--frames", type=int, default=100)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print(f"{'tracks':>6} | {'filterpy ms':>11} | {'batch ms':>8} | {'speedup':>7}")
+    for n in args.tracks:
+        frames = make_sequence(n, args.frames)
+        t_ref = run(Sort, frames)
+        t_batch = run(BatchSort, frames)
+        print(f"{n:>6} | {t_ref * 1000:>11.2f} | {t_batch * 1000:>8.2f} | {t_ref / t_batch:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
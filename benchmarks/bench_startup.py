@@ -0,0 +1,112 @@
+"""
+Cold-start budget: import time of the pipeline modules and wall time from
+process start to the first detection.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup [--model yolov8n.pt]
+
+test/test_startup_budget.py enforces the budgets below.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds
+IMPORT_BUDGET = 1.0
+FIRST_DETECTION_BUDGET = 15.0
+FIRST_FRAME_AFTER_WARMUP_BUDGET = 1.0
+
+PIPELINE_MODULES = [
+    "ingest.layer1_frame_ingest",
+    "detector.layer2_yolo_detector",
+    "tracker.layer3_sort_tracker",
+    "tracker.layer4_motion_tracker",
+    "tracker.layer5_behavior",
+    "tracker.layer6_telegram",
+    "pipeline.multi_camera",
+]
+
+# must not be imported just by importing the pipeline
+HEAVY_MODULES = ["matplotlib", "skimage", "ultralytics", "torch", "filterpy", "requests"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(json.dumps({{
+    "import_s": time.perf_counter() - start,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+FIRST_DETECTION_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import numpy as np
+import pipeline.multi_camera
+from detector.layer2_yolo_detector import YOLODetector
+detector = YOLODetector(model_path={model!r}, classes=["person"])
+loaded = time.perf_counter()
+detector.warmup()
+warm = time.perf_counter()
+detector.detect(np.zeros((720, 1280, 3), dtype=np.uint8))
+done = time.perf_counter()
+print(json.dumps({{
+    "load_s": loaded - start,
+    "warmup_s": warm - loaded,
+    "first_frame_s": done - warm,
+}}))
+"""
+
+
+def _run(script):
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def measure_imports():
+    """
+    Imports the pipeline modules in a fresh interpreter.
+    """
+    return _run(IMPORT_SCRIPT.format(modules=PIPELINE_MODULES, heavy=HEAVY_MODULES))
+
+
+def measure_first_detection(model_path):
+    """
+    Fresh interpreter: import, load model, warm up, detect one frame.
+    process_s is the wall time from process start to the first detection.
+    """
+    return _run(FIRST_DETECTION_SCRIPT.format(model=model_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cold-start budget")
+    parser.add_argument("--model", default="yolov8n.pt")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    print(f"import pipeline        {imports['import_s']:.3f}s (budget {IMPORT_BUDGET}s)")
+    if imports["heavy"]:
+        print(f"  heavy modules loaded: {', '.join(imports['heavy'])}")
+
+    first = measure_first_detection(args.model)
+    print(f"load model             {first['load_s']:.3f}s")
+    print(f"warmup                 {first['warmup_s']:.3f}s")
+    print(f"first frame            {first['first_frame_s']:.3f}s (budget {FIRST_FRAME_AFTER_WARMUP_BUDGET}s)")
+    print(f"start -> 1st detection {first['process_s']:.3f}s (budget {FIRST_DETECTION_BUDGET}s)")
+
+
+if __name__ == "__main__":
+    main()
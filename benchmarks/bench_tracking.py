@@ -0,0 +1,225 @@
+"""
+Tracking-stage benchmark on synthetic crowds.
+
+Runs SortTracker -> MotionAnalyzer -> BehaviorDecider over generated
+sequences (benchmarks/synthetic_crowd.py) and reports per-stage us/frame,
+memory, and identity quality (ID switches, fragmentations).
+
+Run from the repo root:
+    python -m benchmarks.bench_tracking --crowds 10 100 1000 --output bench.json
+    python -m benchmarks.bench_tracking --compare bench.json   # flags regressions
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from filterpy.kalman import KalmanFilter  # noqa: F401, sort.py imports it lazily; keep it out of the timings
+
+from benchmarks.synthetic_crowd import generate_crowd
+from sort.sort import KalmanBoxTracker, iou_batch, linear_assignment
+from tracker.layer3_sort_tracker import SortTracker
+from tracker.layer3_track_batch import TrackBatch
+from tracker.layer4_motion_tracker import MotionAnalyzer
+from tracker.layer5_behavior import BehaviorDecider
+
+STAGES = ["sort", "motion", "behavior"]
+
+
+def run_stages(frames, backend, timed=True):
+    """
+    Feeds the sequence through the three stages.
+    Returns (per-stage seconds per frame as arrays, tracks per frame).
+    """
+    KalmanBoxTracker.count = 0
+    tracker = SortTracker(backend=backend)
+    motion = MotionAnalyzer(frame_gaps=[1, 5, 10, 15, 20])
+    behavior = BehaviorDecider()
+
+    times = {stage: np.zeros(len(frames)) for stage in STAGES}
+    track_log = []
+    clock = time.perf_counter if timed else (lambda: 0.0)
+
+    for i, frame in enumerate(frames):
+        detections = frame.detection_batch()
+
+        t0 = clock()
+        tracks = tracker.update(detections)
+        t1 = clock()
+        motion_features = motion.update_batch(tracks, i)
+        t2 = clock()
+        behavior.update(tracks, motion_features)
+        t3 = clock()
+
+        times["sort"][i] = t1 - t0
+        times["motion"][i] = t2 - t1
+        times["behavior"][i] = t3 - t2
+        track_log.append(tracks)
+
+    return times, track_log
+
+
+def identity_metrics(frames, track_log, iou_threshold=0.5):
+    """
+    Matches visible ground truth to reported tracks each frame (IoU assignment).
+    id_switches: a person's matched track id changes
+    fragmentations: a person's track coverage resumes after being interrupted
+    """
+    last_track = {}    # gt id -> last matched track id
+    was_tracked = {}   # gt id -> matched on its previous visible frame
+    id_switches = fragmentations = matches = visible_total = 0
+
+    for frame, tracks in zip(frames, track_log):
+        tracks = TrackBatch.coerce(tracks)
+        gt_mask = frame.det_ids >= 0
+        gt_ids = frame.det_ids[gt_mask]
+        gt_boxes = frame.gt_boxes[np.searchsorted(frame.gt_ids, gt_ids)]
+        visible_total += len(gt_ids)
+
+        matched = {}
+        if len(tracks) and len(gt_ids):
+            iou = iou_batch(gt_boxes, tracks.boxes.astype(float))
+            for g, t in linear_assignment(-iou):
+                if iou[g, t] >= iou_threshold:
+                    matched[gt_ids[g]] = int(tracks.track_ids[t])
+
+        for gid in gt_ids:
+            track_id = matched.get(gid)
+            if track_id is not None:
+                matches += 1
+                if gid in last_track and last_track[gid] != track_id:
+                    id_switches += 1
+                if gid in was_tracked and not was_tracked[gid]:
+                    fragmentations += 1
+                last_track[gid] = track_id
+                was_tracked[gid] = True
+            elif gid in was_tracked:
+                was_tracked[gid] = False
+
+    return {
+        "id_switches": id_switches,
+        "fragmentations": fragmentations,
+        "recall": matches / visible_total if visible_total else 0.0,
+        "unique_tracks": len({t["track_id"] for tracks in track_log for t in tracks}),
+    }
+
+
+def measure_memory(frames, backend):
+    """
+    Python heap allocated by the stages: peak during the run and retained at the end.
+    """
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    _, track_log = run_stages(frames, backend, timed=False)
+    del track_log
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mem_peak_kb": (peak - base) / 1024, "mem_retained_kb": (current - base) / 1024}
+
+
+def run_scenario(name, backend, memory=True, **crowd_kwargs):
+    frames = generate_crowd(**crowd_kwargs)
+    times, track_log = run_stages(frames, backend)
+
+    result = {"name": name, "backend": backend, "config": crowd_kwargs}
+    for stage in STAGES:
+        us = times[stage] * 1e6
+        result[f"{stage}_us"] = float(np.median(us))  # median: stable enough to compare runs
+        result[f"{stage}_p95_us"] = float(np.percentile(us, 95))
+    result["total_us"] = sum(result[f"{stage}_us"] for stage in STAGES)
+    result.update(identity_metrics(frames, track_log))
+    if memory:
+        result.update(measure_memory(frames, backend))
+    return result
+
+
+def compare(results, baseline, time_tolerance):
+    """
+    Prints deltas against a previous --output file. Returns the number of regressions.
+    """
+    previous = {r["name"]: r for r in baseline["results"]}
+    regressions = 0
+    for r in results:
+        old = previous.get(r["name"])
+        if old is None:
+            continue
+        notes = []
+        for stage in STAGES + ["total"]:
+            before, after = old[f"{stage}_us"], r[f"{stage}_us"]
+            change = (after - before) / before if before else 0.0
+            if change > time_tolerance:
+                notes.append(f"{stage} +{change:.0%}")
+        for key in ("id_switches", "fragmentations"):
+            if r[key] > old[key]:
+                notes.append(f"{key} {old[key]} -> {r[key]}")
+        if r.get("mem_retained_kb", 0) > 1.5 * old.get("mem_retained_kb", float("inf")):
+            notes.append(f"retained memory {old['mem_retained_kb']:.0f} -> {r['mem_retained_kb']:.0f} KB")
+
+        status = "REGRESSION " + ", ".join(notes) if notes else "ok"
+        regressions += bool(notes)
+        print(f"  {r['name']:<18} {status}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="tracking benchmark on synthetic crowds")
+    parser.add_argument("--crowds", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--backends", nargs="+", default=["filterpy", "batch"])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--occlusion", type=float, default=0.05)
+    parser.add_argument("--birth", type=float, default=0.01)
+    parser.add_argument("--death", type=float, default=0.01)
+    parser.add_argument("--noise", type=float, default=0.03)
+    parser.add_argument("--false-positives", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from a previous --output run")
+    parser.add_argument("--time-tolerance", type=float, default=0.15)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    results = []
+    header = (f"{'scenario':<18} | {'sort us':>9} | {'motion us':>9} | {'behav us':>9} | "
+              f"{'IDsw':>5} | {'frag':>5} | {'recall':>6} | {'peak KB':>8} | {'kept KB':>8}")
+    print(header)
+    print("-" * len(header))
+    for backend in args.backends:
+        for n in args.crowds:
+            r = run_scenario(
+                f"{backend}-n{n}", backend, memory=not args.no_memory,
+                n_objects=n, n_frames=args.frames, occlusion=args.occlusion,
+                birth_rate=args.birth, death_rate=args.death, noise=args.noise,
+                false_positives=args.false_positives, seed=args.seed
+            )
+            results.append(r)
+            print(f"{r['name']:<18} | {r['sort_us']:>9.0f} | {r['motion_us']:>9.0f} | {r['behavior_us']:>9.0f} | "
+                  f"{r['id_switches']:>5} | {r['fragmentations']:>5} | {r['recall']:>6.3f} | "
+                  f"{r.get('mem_peak_kb', 0):>8.0f} | {r.get('mem_retained_kb', 0):>8.0f}")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nvs {args.compare}:")
+        if compare(results, baseline, args.time_tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic detection sequences for tracker benchmarks.
+
+People are boxes moving at a noisy constant velocity inside the frame.
+Every knob that matters for tracking cost and quality is controllable:
+crowd size, births/deaths, occlusion (missed detections in runs of
+frames), box noise and false positives. Same arguments + seed -> same
+sequence, so results are comparable across runs.
+"""
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+
+
+class CrowdFrame:
+    __slots__ = ("gt_ids", "gt_boxes", "dets", "det_ids")
+
+    def __init__(self, gt_ids, gt_boxes, dets, det_ids):
+        self.gt_ids = gt_ids      # (N,) ids of people in the scene
+        self.gt_boxes = gt_boxes  # (N, 4) true x1, y1, x2, y2
+        self.dets = dets          # (M, 5) noisy x1, y1, x2, y2, score
+        self.det_ids = det_ids    # (M,) gt id per detection, -1 for false positives
+
+    def detections(self):
+        """
+        Detections as the detector layer returns them (list of dicts).
+        """
+        return [
+            {"bbox": [int(v) for v in d[:4]], "class": "person", "confidence": float(d[4])}
+            for d in self.dets
+        ]
+
+    def detection_batch(self):
+        """
+        Detections as a DetectionBatch, the detector's array output.
+        """
+        return DetectionBatch(self.dets[:, :4], self.dets[:, 4], np.zeros(len(self.dets)), {0: "person"})
+
+
+def generate_crowd(n_objects=100, n_frames=200, width=1920, height=1080, birth_rate=0.01,
+                   death_rate=0.01, occlusion=0.1, occlusion_length=(2, 10), noise=0.05,
+                   false_positives=0.0, speed=3.0, seed=0):
+    """
+    n_objects: people at the start; births/deaths keep the expected count constant
+    birth_rate / death_rate: expected births per object per frame / death probability per frame
+    occlusion: probability per frame that a visible person becomes occluded
+    occlusion_length: (min, max) frames an occlusion lasts
+    noise: box jitter std as a fraction of box size
+    false_positives: expected spurious detections per frame
+    speed: mean speed in px/frame
+    Returns a list of CrowdFrame.
+    """
+    rng = np.random.default_rng(seed)
+
+    def spawn(n):
+        h = rng.uniform(60, 160, n)
+        w = h * rng.uniform(0.35, 0.5, n)
+        x = rng.uniform(0, width - w)
+        y = rng.uniform(0, height - h)
+        angle = rng.uniform(0, 2 * np.pi, n)
+        v = rng.gamma(2.0, speed / 2.0, n)
+        return np.stack([x, y, w, h, v * np.cos(angle), v * np.sin(angle)], 1)
+
+    state = spawn(n_objects)
+    ids = np.arange(n_objects)
+    next_id = n_objects
+    occluded = np.zeros(n_objects, dtype=int)  # frames left
+
+    frames = []
+    for _ in range(n_frames):
+        # deaths and births
+        alive = rng.random(len(ids)) >= death_rate
+        state, ids, occluded = state[alive], ids[alive], occluded[alive]
+        n_new = rng.poisson(birth_rate * n_objects)
+        if n_new:
+            state = np.concatenate([state, spawn(n_new)])
+            ids = np.concatenate([ids, np.arange(next_id, next_id + n_new)])
+            occluded = np.concatenate([occluded, np.zeros(n_new, dtype=int)])
+            next_id += n_new
+
+        # motion with a little heading noise, bounce off the borders
+        state[:, 4:] += rng.normal(0, 0.2, (len(state), 2))
+        state[:, :2] += state[:, 4:]
+        for axis, limit in ((0, width), (1, height)):
+            low = state[:, axis] < 0
+            high = state[:, axis] + state[:, axis + 2] > limit
+            state[low | high, axis + 4] *= -1
+            state[:, axis] = np.clip(state[:, axis], 0, limit - state[:, axis + 2])
+
+        gt_boxes = np.stack([state[:, 0], state[:, 1], state[:, 0] + state[:, 2], state[:, 1] + state[:, 3]], 1)
+
+        # occlusions run for several frames
+        occluded = np.maximum(occluded - 1, 0)
+        starts = (occluded == 0) & (rng.random(len(ids)) < occlusion)
+        occluded[starts] = rng.integers(occlusion_length[0], occlusion_length[1] + 1, starts.sum())
+        visible = occluded == 0
+
+        sizes = np.repeat(state[visible, 2:4], 2, axis=1)
+        dets = gt_boxes[visible] + rng.normal(0, noise, sizes.shape) * sizes
+        det_ids = ids[visible]
+
+        n_fp = rng.poisson(false_positives)
+        if n_fp:
+            fp = spawn(n_fp)
+            fp_boxes = np.stack([fp[:, 0], fp[:, 1], fp[:, 0] + fp[:, 2], fp[:, 1] + fp[:, 3]], 1)
+            dets = np.concatenate([dets, fp_boxes])
+            det_ids = np.concatenate([det_ids, -np.ones(n_fp, dtype=int)])
+
+        scores = rng.uniform(0.5, 1.0, (len(dets), 1))
+        frames.append(CrowdFrame(ids.copy(), gt_boxes, np.concatenate([dets, scores], 1), det_ids))
+
+    return frames
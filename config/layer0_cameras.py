@@ -15,7 +15,11 @@ CAMERAS = [
     #{
     #    "camera_id": "CAM_03",
     #    "location": "Real CCTV",
-    #    "source": "rtsp://user:pass@ip:port/stream"
+    #    "source": "rtsp://user:pass@ip:port/stream",
+    #    # optional: detect only inside these regions (rectangles x1,y1,x2,y2 or polygons), in frame pixels
+    #    "roi": [[0, 400, 3840, 2160], [[100, 300], [900, 250], [1000, 900], [50, 1000]]],
+    #    # optional: cut large regions into overlapping 640 px tiles (small, distant people on 4K)
+    #    "tiles": {"size": 640, "overlap": 0.2}
     #}
 ]
 
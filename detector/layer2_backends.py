@@ -0,0 +1,287 @@
+import ast
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+# ===================== TORCH (ultralytics) =====================
+class TorchBackend:
+    def __init__(self, model_path, imgsz=640, precision="fp32", threads=None, conf=0.25, iou=0.7, max_det=300):
+        """
+        Runs the PyTorch weights through ultralytics (the original path).
+        """
+        if precision != "fp32":
+            raise ValueError("torch backend only runs fp32 on CPU, export to onnx/openvino for int8/fp16")
+
+        import torch
+        from ultralytics import YOLO  # heavy (torch), only loaded when a detector is built
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    def predict(self, frames, classes=None, imgsz=None):
+        """
+        frames: list of BGR images
+        classes: class ids to keep, applied inside ultralytics' NMS (None = all)
+        imgsz: input size for this call (None = the configured one)
+        Returns one (boxes xyxy N x 4, scores N, class_ids N) tuple per frame.
+        """
+        results = self.model(
+            list(frames), imgsz=imgsz or self.imgsz, conf=self.conf, iou=self.iou, max_det=self.max_det,
+            classes=None if classes is None else [int(c) for c in classes], verbose=False
+        )
+
+        outputs = []
+        for res in results:
+            boxes = res.boxes
+            outputs.append((
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy().astype(int)
+            ))
+        return outputs
+
+
+# ===================== EXPORTED (onnx / openvino) =====================
+def export_path(model_path, fmt, imgsz, precision):
+    """
+    Where the compiled artifact is cached: next to the weights, one file/dir per variant.
+    e.g. yolov8n.pt -> yolov8n_onnx_640_fp32.onnx / yolov8n_openvino_640_int8/
+    """
+    stem = os.path.splitext(model_path)[0]
+    name = f"{stem}_{fmt}_{imgsz}_{precision}"
+    return name + ".onnx" if fmt == "onnx" else name
+
+
+def export_model(model_path, fmt, imgsz=640, precision="fp32", data=None):
+    """
+    Exports the PyTorch weights once and caches the result on disk.
+    Returns the cached artifact path. data: calibration dataset yaml for openvino int8.
+    """
+    target = export_path(model_path, fmt, imgsz, precision)
+    meta_path = target + ".json" if fmt == "onnx" else os.path.join(target, "cctv_meta.json")
+    if os.path.exists(meta_path):
+        return target
+
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    kwargs = {"format": fmt, "imgsz": imgsz, "dynamic": True}
+    if fmt == "openvino":
+        kwargs["half"] = precision == "fp16"
+        kwargs["int8"] = precision == "int8"
+        if data:
+            kwargs["data"] = data
+    elif precision == "fp16":
+        raise ValueError("fp16 onnx is not faster on CPU, use openvino fp16 or onnx int8")
+
+    exported = model.export(**kwargs)
+    if os.path.exists(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        else:
+            os.remove(target)
+    shutil.move(str(exported), target)
+
+    if fmt == "onnx" and precision == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        fp32 = target + ".fp32"
+        os.replace(target, fp32)
+        quantize_dynamic(fp32, target, weight_type=QuantType.QUInt8)
+        os.remove(fp32)
+
+    with open(meta_path, "w") as f:
+        json.dump({"names": {int(k): v for k, v in model.names.items()}, "imgsz": imgsz}, f)
+    return target
+
+
+def _read_yaml_names(path):
+    import yaml  # installed with ultralytics
+
+    with open(path) as f:
+        return yaml.safe_load(f)["names"]
+
+
+def letterbox(frame, imgsz):
+    """
+    Resizes keeping aspect ratio and pads to imgsz x imgsz (ultralytics style, pad 114).
+    Returns (image, scale, (pad_x, pad_y)).
+    """
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    pad_x, pad_y = (imgsz - nw) // 2, (imgsz - nh) // 2
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+
+class ExportedBackend(ABC):
+    def __init__(self, imgsz=640, conf=0.25, iou=0.7, max_det=300):
+        """
+        Shared pre/post-processing for exported YOLOv8 graphs.
+        Output layout: (batch, 4 + num_classes, anchors), boxes as cx, cy, w, h.
+        Thresholds default to ultralytics' predict defaults.
+        """
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.names = {}
+
+    def _load_names(self, meta_path, fallback=None):
+        """
+        Class names from our sidecar json, else from the exporter's own metadata.
+        """
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                names = json.load(f)["names"]
+        elif fallback is not None:
+            names = fallback()
+        else:
+            raise RuntimeError(f"No class names found for exported model ({meta_path})")
+        self.names = {int(k): v for k, v in names.items()}
+
+    @abstractmethod
+    def _run(self, blob):
+        """
+        Raw model output for a (batch, 3, imgsz, imgsz) float32 blob.
+        """
+
+    def predict(self, frames, classes=None, imgsz=None):
+        """
+        frames: list of BGR images
+        classes: class ids to keep, other classes never reach NMS (None = all)
+        imgsz: input size for this call, a multiple of 32 (None = the configured
+               one); exports are dynamic, so smaller inputs run proportionally faster
+        Returns one (boxes xyxy N x 4, scores N, class_ids N) tuple per frame.
+        """
+        images, scales, pads = [], [], []
+        for frame in frames:
+            image, scale, pad = letterbox(frame, imgsz or self.imgsz)
+            images.append(image)
+            scales.append(scale)
+            pads.append(pad)
+
+        # BGR HWC uint8 -> RGB NCHW float32 [0, 1]
+        blob = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+        blob = np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+
+        preds = self._run(blob)
+        if classes is not None:
+            classes = np.asarray(classes, dtype=np.int64)
+        return [
+            self._postprocess(pred, scale, pad, frame.shape[:2], classes)
+            for pred, scale, pad, frame in zip(preds, scales, pads, frames)
+        ]
+
+    def _postprocess(self, pred, scale, pad, shape, classes=None):
+        pred = pred.T  # anchors x (4 + classes)
+        class_scores = pred[:, 4:]
+        class_ids = class_scores.argmax(1)
+        scores = class_scores[np.arange(len(pred)), class_ids]
+
+        keep = scores >= self.conf
+        if classes is not None:
+            keep &= np.isin(class_ids, classes)  # same rule as ultralytics' classes=
+        pred, scores, class_ids = pred[keep], scores[keep], class_ids[keep]
+        if len(pred) == 0:
+            return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, int)
+
+        cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        keep = cv2.dnn.NMSBoxesBatched(
+            np.stack([cx - w / 2, cy - h / 2, w, h], 1).tolist(),
+            scores.tolist(), class_ids.tolist(), self.conf, self.iou
+        )
+        keep = np.asarray(keep, dtype=int).reshape(-1)[:self.max_det]  # sorted by score
+
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], 1)[keep]
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+        return boxes, scores[keep], class_ids[keep]
+
+
+class OnnxRuntimeBackend(ExportedBackend):
+    def __init__(self, model_path, imgsz=640, precision="fp32", threads=None, conf=0.25, iou=0.7, max_det=300):
+        """
+        model_path: .pt weights (exported and cached on first use) or an .onnx file
+        """
+        import onnxruntime as ort
+
+        super().__init__(imgsz, conf, iou, max_det)
+        if not model_path.endswith(".onnx"):
+            model_path = export_model(model_path, "onnx", imgsz, precision)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self._load_names(
+            model_path + ".json",
+            lambda: ast.literal_eval(self.session.get_modelmeta().custom_metadata_map["names"])
+        )
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOBackend(ExportedBackend):
+    def __init__(self, model_path, imgsz=640, precision="fp32", threads=None, conf=0.25, iou=0.7, max_det=300):
+        """
+        model_path: .pt weights (exported and cached on first use) or an exported model dir
+        """
+        import openvino as ov
+
+        super().__init__(imgsz, conf, iou, max_det)
+        if not os.path.isdir(model_path):
+            model_path = export_model(model_path, "openvino", imgsz, precision)
+        self._load_names(
+            os.path.join(model_path, "cctv_meta.json"),
+            lambda: _read_yaml_names(os.path.join(model_path, "metadata.yaml"))
+        )
+
+        xml = [f for f in os.listdir(model_path) if f.endswith(".xml")][0]
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(os.path.join(model_path, xml)), "CPU", config)
+
+    def _run(self, blob):
+        return self.compiled(blob)[0]
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxRuntimeBackend,
+    "openvino": OpenVINOBackend,
+}
+
+
+def load_backend(name, model_path, imgsz=640, precision="fp32", threads=None, conf=0.25, iou=0.7, max_det=300):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend: {name} (choose from {', '.join(BACKENDS)})")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (choose from {', '.join(PRECISIONS)})")
+    return BACKENDS[name](model_path, imgsz=imgsz, precision=precision, threads=threads,
+                          conf=conf, iou=iou, max_det=max_det)
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchCollector:
+    def __init__(self, detector, max_batch_size=8, max_wait=0.01):
+        """
+        Groups the latest frame of several cameras into one detect_batch() call.
+
+        detector: YOLODetector (anything with detect_batch(frames))
+        max_batch_size: frames per model call
+        max_wait: seconds the oldest queued frame may wait for the batch to fill
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._pending = {}  # camera_id -> (frame, future, submit_time, imgsz), oldest first
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+        self.batches = 0
+        self.frames = 0
+
+    def start(self):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="batch-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, camera_id, frame, imgsz=None):
+        """
+        Queues a frame and returns a Future with its list of detections.
+        A newer frame from the same camera replaces (and cancels) an older queued one.
+        imgsz: model input size for this frame (None = detector default); only
+               frames with the same size share a batch
+        """
+        future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("BatchCollector is stopped")
+
+            old = self._pending.pop(camera_id, None)
+            if old is not None:
+                old[1].cancel()
+
+            self._pending[camera_id] = (frame, future, time.perf_counter(), imgsz)
+            self._cond.notify_all()
+        return future
+
+    def detect(self, camera_id, frame, imgsz=None):
+        """
+        Blocking helper: submit() and wait for the result.
+        """
+        return self.submit(camera_id, frame, imgsz).result()
+
+    def detect_many(self, camera_id, frames):
+        """
+        Several frames of one camera (e.g. ROI crops or tiles), batched with the
+        other cameras. Returns one result per frame.
+        """
+        futures = [self.submit((camera_id, i), frame) for i, frame in enumerate(frames)]
+        return [future.result() for future in futures]
+
+    def average_batch_size(self):
+        return self.frames / self.batches if self.batches else 0.0
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            # wait until the batch is full or the oldest frame hits its deadline
+            _, _, oldest, imgsz = next(iter(self._pending.values()))
+            deadline = oldest + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._stopped:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # one input size per model call, others wait for the next batch
+            same_size = [cam for cam, item in self._pending.items() if item[3] == imgsz]
+            return [self._pending.pop(camera_id) for camera_id in same_size[:self.max_batch_size]]
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            frames = [item[0] for item in batch]
+            imgsz = batch[0][3]
+            try:
+                if imgsz is None:
+                    results = self.detector.detect_batch(frames)
+                else:
+                    results = self.detector.detect_batch(frames, imgsz=imgsz)
+            except Exception as e:
+                for item in batch:
+                    item[1].set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(batch)
+
+            # hand every result back to the camera that submitted it
+            for item, detections in zip(batch, results):
+                item[1].set_result(detections)
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class DetectionBatch:
+    __slots__ = ("boxes", "scores", "class_ids", "names")
+
+    def __init__(self, boxes, scores, class_ids, names):
+        """
+        Detections of one frame as arrays, straight from the model output.
+
+        boxes: (N, 4) x1, y1, x2, y2 in frame pixels
+        scores: (N,) confidences
+        class_ids: (N,) model class ids
+        names: {class_id: class name}
+
+        Indexing / iterating gives the old dicts ({"bbox", "class", "confidence"}),
+        built on demand.
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+        self.names = names
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names or {})
+
+    @classmethod
+    def from_dicts(cls, detections):
+        """
+        detections: list of {"bbox", "class", "confidence"} dicts
+        """
+        ids = {}
+        class_ids = [ids.setdefault(d["class"], len(ids)) for d in detections]
+        return cls(
+            [d["bbox"] for d in detections],
+            [d["confidence"] for d in detections],
+            class_ids,
+            {i: name for name, i in ids.items()}
+        )
+
+    @classmethod
+    def coerce(cls, detections):
+        """
+        DetectionBatch as is, a list of dicts converted.
+        """
+        return detections if isinstance(detections, cls) else cls.from_dicts(detections)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, i):
+        x1, y1, x2, y2 = (int(v) for v in self.boxes[i])
+        return {
+            "bbox": [x1, y1, x2, y2],
+            "class": self.names[int(self.class_ids[i])],
+            "confidence": float(self.scores[i])
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_dicts(self):
+        return list(self)
+
+    def select(self, mask):
+        """
+        Subset by boolean mask or index array.
+        """
+        return DetectionBatch(self.boxes[mask], self.scores[mask], self.class_ids[mask], self.names)
+
+    def of_class(self, *names):
+        ids = [i for i, name in self.names.items() if name in names]
+        return self.select(np.isin(self.class_ids, ids))
+
+    def to_sort(self):
+        """
+        (N, 5) x1, y1, x2, y2, score: the array Sort.update takes.
+        """
+        return np.hstack([self.boxes, self.scores[:, None]]).astype(np.float64)
@@ -0,0 +1,212 @@
+import cv2
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+
+
+def crop_windows(frame, windows):
+    """
+    Views (no copies) of frame for each (x1, y1, x2, y2) window.
+    """
+    return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+
+
+def _tile_starts(start, end, tile, step):
+    """
+    Tile origins covering [start, end); the last tile ends exactly at end.
+    """
+    if end - start <= tile:
+        return [start]
+    starts = list(range(start, end - tile, step))
+    return starts + [end - tile]
+
+
+def concat_detections(batches, offsets):
+    """
+    Joins per-window DetectionBatches into frame coordinates.
+    offsets: (x, y) origin of each window
+    Returns (DetectionBatch, window index of every box).
+    """
+    names = batches[0].names if batches else {}
+    if any(b.names != names for b in batches):
+        # dict-returning detectors number classes per call, go through the names
+        ids = {}
+        for b in batches:
+            for name in b.names.values():
+                ids.setdefault(name, len(ids))
+        remapped = []
+        for b in batches:
+            lookup = np.array([ids[b.names[i]] for i in range(max(b.names, default=-1) + 1)], dtype=np.int64)
+            remapped.append(DetectionBatch(b.boxes, b.scores, lookup[b.class_ids] if len(b) else b.class_ids, None))
+        batches = remapped
+        names = {i: name for name, i in ids.items()}
+
+    if not batches:
+        return DetectionBatch.empty(names), np.empty(0, dtype=np.int64)
+
+    shift = np.repeat(np.asarray(offsets, dtype=np.float32), [len(b) for b in batches], axis=0)
+    boxes = np.concatenate([b.boxes for b in batches]) + np.tile(shift, 2)
+    sources = np.repeat(np.arange(len(batches)), [len(b) for b in batches])
+    return DetectionBatch(
+        boxes,
+        np.concatenate([b.scores for b in batches]),
+        np.concatenate([b.class_ids for b in batches]),
+        names
+    ), sources
+
+
+def merge_seams(detections, sources, threshold=0.5):
+    """
+    Greedy merge of boxes that several windows reported for the same object.
+
+    Only boxes from different windows are compared (each window already went
+    through the model's NMS). Overlap is intersection over the smaller box, so
+    a person cut by a tile edge still matches the whole box from the
+    neighbouring tile; the kept box grows to the union of its duplicates.
+    """
+    n = len(detections)
+    if n < 2:
+        return detections
+
+    order = np.argsort(-detections.scores, kind="stable")
+    boxes = detections.boxes[order].astype(np.float64)
+    class_ids = detections.class_ids[order]
+    sources = sources[order]
+
+    x1, y1, x2, y2 = boxes.T
+    iw = np.clip(np.minimum(x2[:, None], x2) - np.maximum(x1[:, None], x1), 0, None)
+    ih = np.clip(np.minimum(y2[:, None], y2) - np.maximum(y1[:, None], y1), 0, None)
+    area = (x2 - x1) * (y2 - y1)
+    smaller = np.maximum(np.minimum(area[:, None], area), 1e-9)
+    duplicate = ((iw * ih) / smaller > threshold) & (class_ids[:, None] == class_ids) & (sources[:, None] != sources)
+
+    alive = np.ones(n, dtype=bool)
+    for i in range(n):
+        if not alive[i]:
+            continue
+        dup = duplicate[i] & alive
+        dup[:i + 1] = False
+        if dup.any():
+            group = boxes[dup]
+            boxes[i, :2] = np.minimum(boxes[i, :2], group[:, :2].min(0))
+            boxes[i, 2:] = np.maximum(boxes[i, 2:], group[:, 2:].max(0))
+            alive[dup] = False
+
+    return DetectionBatch(boxes[alive], detections.scores[order][alive], class_ids[alive], detections.names)
+
+
+class RegionTiler:
+    def __init__(self, roi=None, tile_size=None, overlap=0.2, full_view=True, merge_threshold=0.5):
+        """
+        Runs the detector only on a camera's regions of interest, optionally
+        cut into tiles at (close to) model resolution, and maps the boxes back
+        to full-frame coordinates.
+
+        roi: list of regions in frame pixels, each a rectangle [x1, y1, x2, y2]
+             or a polygon [[x, y], ...] (cropped to its bounding box, boxes whose
+             center falls outside the polygon are dropped); None = whole frame
+        tile_size: split regions larger than this into overlapping square tiles
+                   (None = one crop per region)
+        overlap: fraction of a tile shared with its neighbour
+        full_view: with tiles, also run the whole region once so people larger
+                   than a tile are still seen in one piece
+        merge_threshold: intersection over the smaller box above which boxes
+                         from different windows are one object
+        """
+        self.rects = []
+        self.polygons = []
+        for region in roi or []:
+            points = np.asarray(region, dtype=np.float64)
+            if points.ndim == 1:
+                self.rects.append(points.reshape(4))
+            else:
+                self.polygons.append(points.reshape(-1, 2))
+        self.whole_frame = roi is None
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.full_view = full_view
+        self.merge_threshold = merge_threshold
+        self._plans = {}  # frame shape -> (windows, polygon mask or None)
+
+    @classmethod
+    def from_camera(cls, cam):
+        """
+        RegionTiler for a CAMERAS entry with "roi" and/or "tiles", None otherwise.
+        tiles: True, or {"size": 640, "overlap": 0.2, "full_view": True}
+        """
+        roi, tiles = cam.get("roi"), cam.get("tiles")
+        if roi is None and not tiles:
+            return None
+        if not tiles:
+            return cls(roi)
+        options = {} if tiles is True else tiles
+        return cls(roi, tile_size=options.get("size", 640), overlap=options.get("overlap", 0.2),
+                   full_view=options.get("full_view", True))
+
+    def plan(self, shape):
+        """
+        (windows, mask) for a frame shape, computed once per resolution.
+        windows: list of integer (x1, y1, x2, y2); mask: bool (h, w) of the
+        polygon regions' union, None when every region is a rectangle.
+        """
+        plan = self._plans.get(shape)
+        if plan is not None:
+            return plan
+
+        h, w = shape[:2]
+        regions = [(0, 0, w, h)] if self.whole_frame else []
+        regions += [tuple(r) for r in self.rects]
+        regions += [(*p.min(0), *p.max(0)) for p in self.polygons]
+
+        windows = []
+        for x1, y1, x2, y2 in regions:
+            x1, x2 = (int(np.clip(round(v), 0, w)) for v in (x1, x2))
+            y1, y2 = (int(np.clip(round(v), 0, h)) for v in (y1, y2))
+            if x2 <= x1 or y2 <= y1:
+                continue  # region outside this frame
+
+            tile = self.tile_size
+            if tile and (x2 - x1 > tile or y2 - y1 > tile):
+                step = max(1, int(tile * (1 - self.overlap)))
+                for ty in _tile_starts(y1, y2, tile, step):
+                    for tx in _tile_starts(x1, x2, tile, step):
+                        windows.append((tx, ty, min(tx + tile, x2), min(ty + tile, y2)))
+                if self.full_view:
+                    windows.append((x1, y1, x2, y2))
+            else:
+                windows.append((x1, y1, x2, y2))
+
+        mask = None
+        if self.polygons:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            for x1, y1, x2, y2 in self.rects:
+                mask[max(int(y1), 0):max(int(y2), 0), max(int(x1), 0):max(int(x2), 0)] = 1
+            cv2.fillPoly(mask, [np.round(p).astype(np.int32) for p in self.polygons], 1)
+            mask = mask.astype(bool)
+
+        plan = self._plans[shape] = (windows, mask)
+        return plan
+
+    def detect(self, frame, detect_windows):
+        """
+        detect_windows: callable(frame, windows) -> one DetectionBatch (or list
+        of dicts) per window, in window coordinates
+        Returns one DetectionBatch in frame coordinates.
+        """
+        windows, mask = self.plan(frame.shape)
+        if not windows:
+            return DetectionBatch.empty()
+
+        results = [DetectionBatch.coerce(r) for r in detect_windows(frame, windows)]
+        detections, sources = concat_detections(results, [w[:2] for w in windows])
+
+        if mask is not None and len(detections):
+            h, w = mask.shape
+            cx = ((detections.boxes[:, 0] + detections.boxes[:, 2]) / 2).astype(int).clip(0, w - 1)
+            cy = ((detections.boxes[:, 1] + detections.boxes[:, 3]) / 2).astype(int).clip(0, h - 1)
+            inside = mask[cy, cx]
+            detections, sources = detections.select(inside), sources[inside]
+
+        if len(windows) > 1:
+            detections = merge_seams(detections, sources, self.merge_threshold)
+        return detections
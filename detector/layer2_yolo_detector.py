@@ -1,36 +1,70 @@
-from ultralytics import YOLO
+import time
+
+import numpy as np
+
+from detector.layer2_backends import load_backend
+from detector.layer2_detection_batch import DetectionBatch
+
 
 class YOLODetector:
-    def __init__(self, model_path="yolov8n.pt", classes=None):
+    def __init__(self, model_path="yolov8n.pt", classes=None, backend="torch", imgsz=640,
+                 precision="fp32", threads=None, conf=0.25, iou=0.7, max_det=300):
         """
         model_path: pre-trained YOLO model
         classes: list of class names to detect, e.g. ['person', 'mask', 'helmet']
+        backend: "torch" (ultralytics), "onnx" (ONNX Runtime) or "openvino";
+                 exported backends compile model_path once and cache it next to the weights
+        imgsz: model input size
+        precision: "fp32", "fp16" (openvino) or "int8"
+        threads: CPU threads for inference (None = runtime default)
+        conf: minimum confidence
+        iou: NMS IoU threshold
+        max_det: maximum detections per frame
         """
-        self.model = YOLO(model_path)
+        self.backend = load_backend(backend, model_path, imgsz=imgsz, precision=precision, threads=threads,
+                                    conf=conf, iou=iou, max_det=max_det)
+        self.names = self.backend.names
         self.classes = classes
+        self.imgsz = imgsz
 
-    def detect(self, frame):
+        # class names -> ids once; the ids go to the model so NMS only sees those classes
+        self.class_ids = None
+        if classes:
+            missing = [name for name in classes if name not in self.names.values()]
+            if missing:
+                print(f"[WARN] model has no class {', '.join(missing)}")
+            self.class_ids = np.array([i for i, name in self.names.items() if name in classes], dtype=np.int64)
+
+    def warmup(self, imgsz=None, runs=1):
         """
-        Detect objects in a single frame.
-        Returns list of detections.
+        Runs dummy frames through the model so the first real frame is not slow
+        (lazy weight init, kernel selection, allocator growth).
+        Returns the seconds spent.
         """
-        results = self.model(frame)  # returns list of objects
-        detections = []
-
-        for res in results:
-            for box in res.boxes:
-                cls_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                class_name = self.model.names[cls_id]
+        imgsz = imgsz or self.imgsz
+        start = time.perf_counter()
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.backend.predict([dummy])
+        return time.perf_counter() - start
 
-                if self.classes and class_name not in self.classes:
-                    continue
+    def detect(self, frame, imgsz=None):
+        """
+        Detect objects in a single frame.
+        Returns a DetectionBatch (iterates as the old list of dicts).
+        """
+        return self.detect_batch([frame], imgsz)[0]
 
-                detections.append({
-                    "bbox": [x1, y1, x2, y2],
-                    "class": class_name,
-                    "confidence": conf
-                })
+    def detect_batch(self, frames, imgsz=None):
+        """
+        Detect objects in several frames with one model call.
+        imgsz: model input size for this call (None = the configured imgsz)
+        Returns one DetectionBatch per frame, in input order.
+        """
+        if len(frames) == 0:
+            return []
+        if self.class_ids is not None and len(self.class_ids) == 0:
+            return [DetectionBatch.empty(self.names) for _ in frames]
 
-        return detections
+        outputs = self.backend.predict(frames, classes=self.class_ids, imgsz=imgsz)
+        return [DetectionBatch(boxes, scores, class_ids, self.names) for boxes, scores, class_ids in outputs]
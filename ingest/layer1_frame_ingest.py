@@ -1,34 +1,146 @@
 import cv2
+import threading
 import time
+from collections import deque
+
+LIVE_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+INITIAL_BACKOFF = 0.5
+
+
+def is_live_source(source):
+    """
+    Webcams and network streams are live, anything else is treated as a file.
+    """
+    return isinstance(source, int) or str(source).lower().startswith(LIVE_PREFIXES)
+
 
 class FrameIngestor:
-    def __init__(self, camera_id, source, sample_rate=3):
+    def __init__(self, camera_id, source, sample_rate=3, sample_fps=None, grab_skipped=True,
+                 threaded=False, queue_size=1, reconnect=None, max_backoff=30.0, max_retries=None):
         """
         source: int (webcam), str (video file or RTSP)
+        sample_rate: keep every N-th frame
+        sample_fps: keep N frames per second instead of every N-th frame
+        grab_skipped: advance skipped frames with grab() and only retrieve() kept ones
+        threaded: read on a background thread and keep only the newest queue_size frames
+        reconnect: reopen the source with exponential backoff when it fails
+                   (default: on for webcams/RTSP, off for files)
+        max_backoff: cap in seconds for the reconnect delay
+        max_retries: give up after this many reconnects without a frame in between (None = never)
         """
         self.camera_id = camera_id
         self.source = source
         self.sample_rate = sample_rate
+        self.sample_fps = sample_fps
+        self.grab_skipped = grab_skipped
+        self.is_live = is_live_source(source)
+        self.threaded = threaded
+        self.reconnect = self.is_live if reconnect is None else reconnect
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+
         self.cap = cv2.VideoCapture(source)
         self.frame_count = 0
+        self.dropped_frames = 0  # kept frames overwritten before anyone read them
+        self.reconnects = 0
+        self._next_sample_time = None
+        # kept across reopens: a stream that opens but fails on its first read still backs off
+        self._backoff = INITIAL_BACKOFF
+        self._retries = 0
+
+        self._stop = threading.Event()
+        self._queue = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._reader_done = False
 
         if not self.cap.isOpened():
             raise RuntimeError(f"Cannot open stream/video: {source}")
 
-    def read(self):
+    def _stream_time(self):
         """
-        Generator that yields sampled frames
+        Seconds into the stream: wall clock for live sources, media position for files.
+        """
+        if self.is_live:
+            return time.monotonic()
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def _keep(self):
+        if not self.sample_fps:
+            # Sampling: take every N-th frame
+            return self.frame_count % self.sample_rate == 0
+
+        now = self._stream_time()
+        if self._next_sample_time is None:
+            self._next_sample_time = now
+
+        if now + 1e-6 < self._next_sample_time:
+            return False
+
+        interval = 1.0 / self.sample_fps
+        self._next_sample_time += interval
+        if self._next_sample_time < now:
+            # fell behind (stall / reconnect): restart the schedule instead of bursting
+            self._next_sample_time = now + interval
+        return True
+
+    def _next_frame(self):
+        """
+        Advances to the next kept frame. Returns None at end of stream.
         """
         while True:
-            ret, frame = self.cap.read()
+            if self.grab_skipped:
+                # grab() demuxes without the BGR conversion and copy of retrieve()
+                if not self.cap.grab():
+                    return None
+                self.frame_count += 1
+                if not self._keep():
+                    continue
+                ret, frame = self.cap.retrieve()
+            else:
+                ret, frame = self.cap.read()
+                if ret:
+                    self.frame_count += 1
+                    if not self._keep():
+                        continue
+
             if not ret:
-                break  # end of video / camera error
+                return None
+            return frame
 
-            self.frame_count += 1
+    def _reopen(self):
+        """
+        Reopens the source with exponential backoff. Returns False when giving up.
+        The backoff only resets once a frame has been read again (see _frames).
+        """
+        while not self._stop.is_set():
+            if self.max_retries is not None and self._retries >= self.max_retries:
+                break
+            self.cap.release()
+            backoff = self._backoff
+            print(f"[WARN] {self.camera_id}: stream lost, reconnecting in {backoff:.1f}s")
+            if self._stop.wait(backoff):
+                return False
 
-            # Sampling: take every N-th frame
-            if self.frame_count % self.sample_rate != 0:
-                continue
+            self._retries += 1
+            self._backoff = min(backoff * 2, self.max_backoff)
+            self.cap = cv2.VideoCapture(self.source)
+            if self.cap.isOpened():
+                self.reconnects += 1
+                self._next_sample_time = None
+                print(f"[INFO] {self.camera_id}: reconnected")
+                return True
+        return False
+
+    def _frames(self):
+        while not self._stop.is_set():
+            frame = self._next_frame()
+            if frame is None:
+                if self.reconnect and not self._stop.is_set() and self._reopen():
+                    continue
+                break  # end of video / camera error
+            self._backoff = INITIAL_BACKOFF
+            self._retries = 0
 
             timestamp = time.time()
 
@@ -39,5 +151,59 @@ class FrameIngestor:
                 "frame": frame
             }
 
+    def _reader_loop(self):
+        try:
+            for data in self._frames():
+                with self._cond:
+                    if len(self._queue) == self._queue.maxlen:
+                        self.dropped_frames += 1  # latest frame wins
+                    self._queue.append(data)
+                    self._cond.notify()
+        finally:
+            with self._cond:
+                self._reader_done = True
+                self._cond.notify_all()
+
+    def start(self):
+        """
+        Starts the background reader (threaded mode). read() calls this itself.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._reader_loop,
+                name=f"ingest-{self.camera_id}",
+                daemon=True
+            )
+            self._thread.start()
+
+    def read(self):
+        """
+        Generator that yields sampled frames
+        """
+        if not self.threaded:
+            yield from self._frames()
+            return
+
+        self.start()
+        while True:
+            with self._cond:
+                while not self._queue and not self._reader_done:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                data = self._queue.popleft()
+            yield data
+
+    def stop(self):
+        """
+        Asks read() to finish; safe to call from another thread.
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
     def release(self):
+        self.stop()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
         self.cap.release()
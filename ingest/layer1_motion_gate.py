@@ -0,0 +1,84 @@
+import cv2
+import time
+
+
+class MotionGate:
+    def __init__(self, width=160, diff_threshold=25, min_area=0.002, learning_rate=0.05, max_interval=5.0):
+        """
+        Cheap pre-detector check on a downscaled gray frame.
+
+        width: width of the analysis frame (height keeps aspect ratio)
+        diff_threshold: gray-level difference that counts as change
+        min_area: smallest changed region, as a fraction of the frame
+        learning_rate: how fast the background model follows the scene
+        max_interval: force a detection at least every N seconds
+        """
+        self.width = width
+        self.diff_threshold = diff_threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+        self.max_interval = max_interval
+
+        self.background = None
+        self.last_detection = None
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+        self.frames = 0
+        self.skipped = 0
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def changed_regions(self, frame):
+        """
+        Updates the background model and returns changed regions as
+        [x1, y1, x2, y2] boxes in full-frame coordinates.
+        """
+        h, w = frame.shape[:2]
+        scale = w / self.width
+        small = cv2.resize(frame, (self.width, max(1, int(round(h / scale)))), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self.background is None:
+            self.background = gray.astype("float32")
+            return []
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        _, mask = cv2.threshold(diff, self.diff_threshold, 255, cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, self.kernel, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_pixels = self.min_area * gray.shape[0] * gray.shape[1]
+        regions = []
+        for c in contours:
+            if cv2.contourArea(c) < min_pixels:
+                continue
+            x, y, bw, bh = cv2.boundingRect(c)
+            regions.append([
+                int(x * scale), int(y * scale),
+                min(w, int((x + bw) * scale)), min(h, int((y + bh) * scale))
+            ])
+        return regions
+
+    def check(self, frame, active_tracks=0, timestamp=None):
+        """
+        Returns (run_detection, regions).
+        Detection is skipped only when nothing changed, no track is alive and
+        the last detection is younger than max_interval.
+        """
+        now = time.time() if timestamp is None else timestamp
+        regions = self.changed_regions(frame)
+
+        due = self.last_detection is None or now - self.last_detection >= self.max_interval
+        run = bool(regions) or active_tracks > 0 or due
+
+        self.frames += 1
+        if run:
+            self.last_detection = now
+        else:
+            self.skipped += 1
+
+        return run, regions
@@ -1,122 +1,108 @@
-import cv2
+import argparse
 import time
+from functools import partial
 
 from config.layer0_cameras import CAMERAS
-from ingest.layer1_frame_ingest import FrameIngestor
 from detector.layer2_yolo_detector import YOLODetector
-from tracker.layer3_sort_tracker import SortTracker
-from tracker.layer4_motion_tracker import MotionAnalyzer
-from tracker.layer5_behavior import BehaviorDecider
+from pipeline.multi_camera import MultiCameraRunner
+from pipeline.multiprocess import MultiProcessRunner
+from pipeline.render import PreviewRenderer
+from tracker.layer6_alert_digest import AlertAggregator
+from tracker.layer6_clip_recorder import ClipRecorder
 from tracker.layer6_telegram import TelegramNotifier
 from config.telegram_config import BOT_TOKEN, CHAT_ID
 
 
-# ===================== TELEGRAM COOLDOWN =====================
-last_telegram_sent = {}  # (track_id, decision) -> timestamp
-
-
-def can_send(track_id, decision, cooldown):
-    now = time.time()
-    key = (track_id, decision)
-
-    if key not in last_telegram_sent:
-        last_telegram_sent[key] = now
-        return True
-
-    if now - last_telegram_sent[key] >= cooldown:
-        last_telegram_sent[key] = now
-        return True
-
-    return False
-
-
-# ===================== UTIL =====================
-def check_bbox_overlap(person_bbox, ppe_bbox):
-    px1, py1, px2, py2 = person_bbox
-    dx1, dy1, dx2, dy2 = ppe_bbox
-
-    cx = (dx1 + dx2) / 2
-    cy = (dy1 + dy2) / 2
-
-    return px1 <= cx <= px2 and py1 <= cy <= py2
+# ===================== ARGS =====================
+def parse_args():
+    parser = argparse.ArgumentParser(description="CCTV AI pipeline")
+    parser.add_argument("--headless", action="store_true", help="no preview windows, no drawing")
+    parser.add_argument("--preview-fps", type=float, default=10, help="preview refresh cap")
+    parser.add_argument("--no-clips", action="store_true", help="do not record MP4 clips around alerts")
+    parser.add_argument("--latency-budget", type=float, default=0.3,
+                        help="seconds from capture to result per frame; detection cadence, model input size "
+                             "and sampling adapt to it (0 disables)")
+    parser.add_argument("--processes", action="store_true",
+                        help="one process per camera plus a detector process (frames via shared memory)")
+    parser.add_argument("--ppe-model", default=None,
+                        help="YOLO weights with mask/helmet classes, run on person crops every few frames "
+                             "(threaded runner only)")
+    return parser.parse_args()
 
 
 # ===================== MAIN =====================
 def main():
-    cam = CAMERAS[0]
-
-    ingestor = FrameIngestor(
-        camera_id=cam["camera_id"],
-        source=cam["source"],
-        sample_rate=3
+    args = parse_args()
+
+    telegram = TelegramNotifier(BOT_TOKEN, CHAT_ID).start()  # sends from its own thread
+    alerts = AlertAggregator(telegram, window=5.0, cooldown=240)  # one photo per camera per incident
+    clips = None if args.no_clips else ClipRecorder("clips", pre_roll=5.0, post_roll=5.0).start()
+
+    preview = None
+
+    def on_result(pipeline, data, tracks, behavior_info):
+        if data["frame"] is None:
+            return  # --processes: the shared memory slot was reused before we read it
+        with pipeline.metrics.timer(pipeline.camera_id, "notify"):
+            alerts.add(pipeline.camera_id, data["frame"], tracks, behavior_info, data["timestamp"])
+        if clips is not None:
+            with pipeline.metrics.timer(pipeline.camera_id, "clips"):
+                clips.add(pipeline.camera_id, data["frame"], data["timestamp"])
+                if any(b["decision"] == "Alert" for b in behavior_info):
+                    clips.trigger(pipeline.camera_id, data["timestamp"])
+        if preview is not None:
+            preview.publish(pipeline.camera_id, data["frame"], tracks, behavior_info)
+
+    runner_kwargs = dict(
+        on_result=on_result,
+        sample_rate=3,
+        batch_size=min(len(CAMERAS), 8),  # one model call for several cameras
+        motion_gate=True,                 # no YOLO on static, empty scenes
+        behavior_kwargs={
+            "warning_time": 100,          # warning at 100s
+            "alert_time": 200             # alert at 200s
+        },
+        metrics_port=8765,                # http://127.0.0.1:8765/metrics
+        frame_gaps=[1, 5, 10, 15, 20],
+        # shed detect cadence -> model input size -> sampling when a camera falls behind
+        load_control={"budget": args.latency_budget} if args.latency_budget > 0 else None
     )
-
-    detector = YOLODetector(classes=["person"])
-    tracker = SortTracker()
-    motion = MotionAnalyzer(frame_gaps=[1, 5, 10, 15, 20])
-
-    behavior = BehaviorDecider(
-        warning_time=100,   # warning at 100s
-        alert_time=200      # alert at 200s
-    )
-
-    telegram = TelegramNotifier(BOT_TOKEN, CHAT_ID)
-
-    print("[INFO] CCTV pipeline started")
-
-    for data in ingestor.read():
-        frame = data["frame"]
-        frame_id = data["frame_id"]
-
-        detections = detector.detect(frame)
-        persons = [d for d in detections if d["class"] == "person"]
-
-        tracks = tracker.update(persons, frame)
-
-        motion_info = motion.update(tracks, frame_id)
-        behavior_info = behavior.update(tracks, motion_info)
-
-        for t, b in zip(tracks, behavior_info):
-            track_id = t["track_id"]
-            decision = b["decision"]
-            reason = b["reason"]
-
-            x1, y1, x2, y2 = t["bbox"]
-
-            color = (255, 0, 0)
-            if decision == "Warning":
-                color = (0, 165, 255)
-            elif decision == "Alert":
-                color = (0, 0, 255)
-
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(
-                frame,
-                f"ID {track_id} | {decision}",
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                color,
-                2
-            )
-
-            # -------- TELEGRAM LOGIC --------
-            if decision == "Alert":
-                if can_send(track_id, "Alert", cooldown=240):
-                    telegram.send_alert(frame, track_id, cam["camera_id"], decision, reason)
-                    print("[TELEGRAM] ALERT sent")
-
-            elif decision == "Warning":
-                if can_send(track_id, "Warning", cooldown=240):
-                    telegram.send_alert(frame, track_id, cam["camera_id"], decision, reason)
-                    print("[TELEGRAM] WARNING sent")
-
-        cv2.imshow("CCTV AI", frame)
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
-
-    ingestor.release()
-    cv2.destroyAllWindows()
+    if args.processes:
+        if args.ppe_model:
+            print("[WARN] --ppe-model is not supported with --processes, attributes disabled")
+        # a crashing stream only restarts its own process; the model loads in the detector process
+        runner = MultiProcessRunner(CAMERAS, partial(YOLODetector, classes=["person"]), **runner_kwargs)
+    else:
+        detector = YOLODetector(classes=["person"])  # one model shared by all cameras
+        print(f"[INFO] model warmup took {detector.warmup():.2f}s")
+        ppe_detector = None
+        if args.ppe_model:
+            # only sees person crops, at most every 10 frames per track
+            ppe_detector = YOLODetector(args.ppe_model, classes=["mask", "helmet"])
+            print(f"[INFO] PPE model warmup took {ppe_detector.warmup():.2f}s")
+        runner = MultiCameraRunner(CAMERAS, detector, attribute_detector=ppe_detector,
+                                   attribute_kwargs={"every": 10}, **runner_kwargs)
+    if not args.headless:
+        # drawing + imshow on their own thread, analysis never waits for them
+        preview = PreviewRenderer(max_fps=args.preview_fps, metrics=runner.metrics).start()
+    runner.start()
+
+    print(f"[INFO] CCTV pipeline started ({len(runner.pipelines)} cameras{', headless' if args.headless else ''})")
+
+    try:
+        while runner.is_alive() and not (preview is not None and preview.closed):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+
+    runner.stop()
+    runner.join(timeout=5)
+    if preview is not None:
+        preview.stop()
+    alerts.flush()
+    if clips is not None:
+        clips.stop()
+    telegram.stop()
 
 
 if __name__ == "__main__":
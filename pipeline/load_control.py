@@ -0,0 +1,130 @@
+from collections import deque
+
+
+class LoadController:
+    def __init__(self, budget=0.2, detect_intervals=(1, 4), imgsz_steps=(640, 512, 416, 320),
+                 sample_factors=(1, 3), alpha=0.2, headroom=0.6, cooldown=5.0, min_samples=10):
+        """
+        Keeps one camera's end-to-end frame latency under a budget by trading
+        quality for speed one step at a time, and gives it back when there is room.
+
+        Over budget it sheds in this order: detect less often (detect_interval),
+        then a smaller model input (imgsz), then fewer sampled frames (sample
+        factor); under headroom * budget it restores in the reverse order.
+
+        budget: target seconds from capture to result, per frame
+        detect_intervals: (min, max) SortTracker detect_interval
+        imgsz_steps: model input sizes, full quality first (empty: leave imgsz alone)
+        sample_factors: (min, max) divisor of the configured sampling rate
+        alpha: EWMA weight of the newest latency / frame interval sample
+        headroom: restore quality only below this fraction of the budget
+        cooldown: seconds between two changes
+        min_samples: frames observed after a change before the next decision
+        """
+        self.budget = budget
+        self.detect_intervals = detect_intervals
+        self.imgsz_steps = tuple(imgsz_steps)
+        self.sample_factors = sample_factors
+        self.alpha = alpha
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+
+        self.detect_interval = detect_intervals[0]
+        self.imgsz_level = 0
+        self.sample_factor = sample_factors[0]
+
+        self.latency = None        # EWMA seconds
+        self.frame_interval = None  # EWMA seconds between processed frames
+        self.baseline_fps = None   # effective FPS while sampling was untouched
+        self.samples = 0
+        self.changes = 0
+        self.last_change = None
+        self.last_timestamp = None
+        self.history = deque(maxlen=100)  # (timestamp, knob, old, new, latency)
+
+    @property
+    def imgsz(self):
+        return self.imgsz_steps[self.imgsz_level] if self.imgsz_steps else None
+
+    @property
+    def effective_fps(self):
+        """
+        Processed frames per second actually achieved (EWMA), None until measured.
+        """
+        return 1.0 / self.frame_interval if self.frame_interval else None
+
+    def _ewma(self, old, value):
+        return value if old is None else old + self.alpha * (value - old)
+
+    def observe(self, latency, timestamp):
+        """
+        Feeds one processed frame. Returns (knob, old, new) when a knob changed,
+        else None. knob is "detect_interval", "imgsz" or "sample_factor".
+        """
+        self.latency = self._ewma(self.latency, latency)
+        if self.last_timestamp is not None and timestamp > self.last_timestamp:
+            self.frame_interval = self._ewma(self.frame_interval, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        self.samples += 1
+
+        if self.samples < self.min_samples:
+            return None
+        if self.sample_factor == self.sample_factors[0]:
+            self.baseline_fps = self.effective_fps
+        if self.last_change is not None and timestamp - self.last_change < self.cooldown:
+            return None
+
+        if self.latency > self.budget:
+            change = self._shed()
+        elif self.latency < self.headroom * self.budget:
+            change = self._restore()
+        else:
+            change = None
+
+        if change is not None:
+            self.samples = 0
+            self.changes += 1
+            self.last_change = timestamp
+            self.history.append((timestamp, *change, self.latency))
+        return change
+
+    def _step(self, knob, delta):
+        old = self.imgsz if knob == "imgsz" else getattr(self, knob)
+        if knob == "imgsz":
+            self.imgsz_level += delta
+        else:
+            setattr(self, knob, old + delta)
+        return knob, old, self.imgsz if knob == "imgsz" else getattr(self, knob)
+
+    def _shed(self):
+        if self.detect_interval < self.detect_intervals[1]:
+            return self._step("detect_interval", 1)
+        if self.imgsz_level < len(self.imgsz_steps) - 1:
+            return self._step("imgsz", 1)
+        if self.sample_factor < self.sample_factors[1]:
+            return self._step("sample_factor", 1)
+        return None  # everything at its bound already
+
+    def _restore(self):
+        if self.sample_factor > self.sample_factors[0]:
+            return self._step("sample_factor", -1)
+        if self.imgsz_level > 0:
+            return self._step("imgsz", -1)
+        if self.detect_interval > self.detect_intervals[0]:
+            return self._step("detect_interval", -1)
+        return None
+
+    def gauges(self):
+        """
+        Current state for pipeline.metrics gauges.
+        """
+        values = {
+            "detect_interval": self.detect_interval,
+            "sample_factor": self.sample_factor,
+            "latency_ewma_ms": (self.latency or 0.0) * 1000,
+            "effective_fps": self.effective_fps or 0.0,
+        }
+        if self.imgsz is not None:
+            values["imgsz"] = self.imgsz
+        return values
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Timer:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples):
+        self.samples = samples
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    def __init__(self, window=1000):
+        """
+        Per-camera stage timings (rolling window) plus counters and gauges.
+
+        Hot path cost is one perf_counter pair and a deque append; percentiles are
+        only computed when a snapshot is requested.
+        window: samples kept per (camera, stage)
+        """
+        self.window = window
+        self.timings = defaultdict(lambda: deque(maxlen=window))  # (camera_id, stage) -> seconds
+        self.counters = defaultdict(int)                          # (camera_id, name) -> total
+        self.gauges = {}                                          # (camera_id, name) -> value
+
+    def timer(self, camera_id, stage):
+        """
+        with metrics.timer("CAM_01", "detect"): ...
+        """
+        return _Timer(self.timings[(camera_id, stage)])
+
+    def observe(self, camera_id, stage, seconds):
+        self.timings[(camera_id, stage)].append(seconds)
+
+    def inc(self, camera_id, name, n=1):
+        self.counters[(camera_id, name)] += n
+
+    def set_total(self, camera_id, name, value):
+        """
+        For counters kept elsewhere, e.g. FrameIngestor.dropped_frames.
+        """
+        self.counters[(camera_id, name)] = value
+
+    def set_gauge(self, camera_id, name, value):
+        self.gauges[(camera_id, name)] = value
+
+    def snapshot(self):
+        """
+        {camera_id: {"stages": {stage: {count, p50_ms, p95_ms, p99_ms}}, "counters": {}, "gauges": {}}}
+        """
+        cameras = defaultdict(lambda: {"stages": {}, "counters": {}, "gauges": {}})
+
+        for (camera_id, stage), samples in list(self.timings.items()):
+            values = np.array(list(samples))
+            if len(values) == 0:
+                continue
+            stats = {"count": len(values)}
+            for q, v in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                stats[f"p{int(q * 100)}_ms"] = float(v) * 1000
+            cameras[camera_id]["stages"][stage] = stats
+
+        for (camera_id, name), value in list(self.counters.items()):
+            cameras[camera_id]["counters"][name] = value
+        for (camera_id, name), value in list(self.gauges.items()):
+            cameras[camera_id]["gauges"][name] = value
+
+        return dict(cameras)
+
+    def prometheus(self):
+        """
+        Prometheus text exposition format.
+        """
+        snap = self.snapshot()
+        lines = [
+            "# HELP cctv_stage_latency_seconds Per-frame latency of each pipeline stage (rolling window)",
+            "# TYPE cctv_stage_latency_seconds summary",
+        ]
+        for camera_id, cam in snap.items():
+            for stage, stats in cam["stages"].items():
+                labels = f'camera="{camera_id}",stage="{stage}"'
+                for q in QUANTILES:
+                    value = stats[f"p{int(q * 100)}_ms"] / 1000
+                    lines.append(f'cctv_stage_latency_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+                lines.append(f"cctv_stage_latency_seconds_count{{{labels}}} {stats['count']}")
+
+        for kind, key, suffix in (("counter", "counters", "_total"), ("gauge", "gauges", "")):
+            names = sorted({name for cam in snap.values() for name in cam[key]})
+            for name in names:
+                lines.append(f"# TYPE cctv_{name}{suffix} {kind}")
+                for camera_id, cam in snap.items():
+                    if name in cam[key]:
+                        lines.append(f'cctv_{name}{suffix}{{camera="{camera_id}"}} {cam[key][name]}')
+
+        return "\n".join(lines) + "\n"
+
+    def log_line(self):
+        """
+        One line per camera: p95 of every stage in ms.
+        """
+        parts = []
+        for camera_id, cam in sorted(self.snapshot().items()):
+            stages = " ".join(f"{s}={v['p95_ms']:.1f}" for s, v in cam["stages"].items())
+            parts.append(f"{camera_id} p95ms {stages}")
+        return " | ".join(parts)
+
+
+class MetricsServer:
+    def __init__(self, metrics, host="127.0.0.1", port=8765):
+        """
+        Serves /metrics (Prometheus text) and /metrics.json on a local port.
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self._thread = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body = metrics.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # scrapes would flood the console
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.httpd.server_address[1]  # port=0 picks a free one
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
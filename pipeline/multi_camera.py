@@ -0,0 +1,345 @@
+import threading
+import time
+from functools import partial
+
+from detector.layer2_batch_collector import BatchCollector
+from detector.layer2_detection_batch import DetectionBatch
+from detector.layer2_regions import RegionTiler, crop_windows
+from ingest.layer1_frame_ingest import FrameIngestor, is_live_source
+from ingest.layer1_motion_gate import MotionGate
+from pipeline.load_control import LoadController
+from pipeline.metrics import Metrics, MetricsServer
+from tracker.layer3_sort_tracker import SortTracker
+from tracker.layer4_motion_tracker import MotionAnalyzer
+from tracker.layer5_attributes import AttributeStage
+from tracker.layer5_behavior import BehaviorDecider
+
+
+class FPSMeter:
+    def __init__(self):
+        """
+        Counts processed frames and reports the rate since the last reading.
+        """
+        self.count = 0
+        self.total = 0
+        self.last_time = time.perf_counter()
+        self.fps = 0.0
+
+    def tick(self):
+        self.count += 1
+        self.total += 1
+
+    def read(self):
+        """
+        Returns FPS since the previous read() and resets the window.
+        """
+        now = time.perf_counter()
+        elapsed = now - self.last_time
+        if elapsed > 0:
+            self.fps = self.count / elapsed
+        self.count = 0
+        self.last_time = now
+        return self.fps
+
+
+class CameraPipeline:
+    def __init__(self, cam, detect, sample_rate=3, sample_fps=None, frame_gaps=[1, 5, 10, 15, 20],
+                 tracker_backend="filterpy", detect_interval=1, motion_gate=False, gate_kwargs=None,
+                 ingest_kwargs=None, behavior_kwargs=None, on_result=None, metrics=None, detect_windows=None,
+                 load_control=None, detect_attributes=None, attribute_kwargs=None):
+        """
+        Per-camera state: ingest, tracking, motion and behavior.
+
+        cam: entry of config.layer0_cameras.CAMERAS (may override "sample_fps",
+             may set "roi" / "tiles", see detector.layer2_regions.RegionTiler)
+        detect: callable(frame) -> list of detections (shared between cameras)
+        detect_windows: callable(frame, windows) -> detections per window, for
+                        "roi" / "tiles" cameras (default: detect() on each crop)
+        tracker_backend: SORT backend, "filterpy" or "batch"
+        detect_interval: detect at most every k frames, Kalman-predict in between (adaptive)
+        motion_gate: skip detection on static frames with no live tracks (gate_kwargs -> MotionGate)
+        ingest_kwargs: extra FrameIngestor options; live sources default to the
+                       threaded latest-frame reader
+        on_result: optional callable(pipeline, data, tracks, behavior_info)
+        metrics: shared pipeline.metrics.Metrics (one is created if omitted)
+        load_control: LoadController options, e.g. {"budget": 0.2}: adapt detect_interval,
+                      model input size and sampling to keep frame latency in budget
+                      (detect is then called with imgsz=; None disables)
+        detect_attributes: callable(frame, windows) -> PPE detections per person crop;
+                           fills tracks.attributes for BehaviorDecider (None disables,
+                           attribute_kwargs -> tracker.layer5_attributes.AttributeStage)
+        """
+        self.camera_id = cam["camera_id"]
+        self.cam = cam
+        self.detect = detect
+        self.regions = RegionTiler.from_camera(cam)
+        if self.regions is not None:
+            # crops / tiles go to the model, boxes come back in frame coordinates
+            if detect_windows is None:
+                def detect_windows(frame, windows):
+                    return [detect(crop) for crop in crop_windows(frame, windows)]
+            self.detect = partial(self.regions.detect, detect_windows=detect_windows)
+        self.on_result = on_result
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        ingest_kwargs = dict(ingest_kwargs or {})
+        ingest_kwargs.setdefault("threaded", is_live_source(cam["source"]))
+
+        self.ingestor = FrameIngestor(
+            camera_id=self.camera_id,
+            source=cam["source"],
+            sample_rate=sample_rate,
+            sample_fps=cam.get("sample_fps", sample_fps),
+            **ingest_kwargs
+        )
+        self.tracker = SortTracker(backend=tracker_backend, detect_interval=detect_interval)
+        self.motion = MotionAnalyzer(frame_gaps=frame_gaps)
+        self.behavior = BehaviorDecider(**(behavior_kwargs or {}))
+        self.detect_attributes = detect_attributes
+        self.attributes = AttributeStage(**(attribute_kwargs or {})) if detect_attributes is not None else None
+        self.gate = MotionGate(**(gate_kwargs or {})) if motion_gate else None
+        self.changed_regions = []
+        self.fps = FPSMeter()
+
+        self.load = None
+        self.imgsz = None  # model input size for this camera, None = detector default
+        if load_control is not None:
+            options = dict(load_control)
+            options.setdefault("detect_intervals", (detect_interval, max(detect_interval, 4)))
+            if self.regions is not None:
+                options["imgsz_steps"] = ()  # crops / tiles are already sized for the model
+            self.load = LoadController(**options)
+            self.imgsz = self.load.imgsz
+            self._sampling = (self.ingestor.sample_rate, self.ingestor.sample_fps)
+
+    def process(self, data):
+        """
+        Runs detection -> tracking -> motion -> behavior on one sampled frame.
+        """
+        cam_id = self.camera_id
+        metrics = self.metrics
+
+        run_detection = True
+        if self.gate is not None:
+            with metrics.timer(cam_id, "gate"):
+                run_detection, self.changed_regions = self.gate.check(
+                    data["frame"], self.tracker.active_tracks(), data["timestamp"])
+
+        if run_detection and not self.tracker.needs_detection():
+            # between detections: Kalman-predicted boxes
+            with metrics.timer(cam_id, "sort"):
+                tracks = self.tracker.predict()
+        else:
+            detections = DetectionBatch.empty()
+            if run_detection:
+                with metrics.timer(cam_id, "detect"):
+                    if self.imgsz is None:
+                        detections = DetectionBatch.coerce(self.detect(data["frame"]))
+                    else:
+                        detections = DetectionBatch.coerce(self.detect(data["frame"], imgsz=self.imgsz))
+            persons = detections.of_class("person")
+            metrics.inc(cam_id, "detections", len(persons))
+
+            with metrics.timer(cam_id, "sort"):
+                tracks = self.tracker.update(persons)
+
+        if self.attributes is not None:
+            with metrics.timer(cam_id, "attributes"):
+                crops = self.attributes.crops
+                tracks = self.attributes.update(data["frame"], tracks, self.detect_attributes)
+            metrics.inc(cam_id, "attribute_crops", self.attributes.crops - crops)
+
+        with metrics.timer(cam_id, "motion"):
+            motion = self.motion.update_batch(tracks, data["frame_id"])
+        with metrics.timer(cam_id, "behavior"):
+            frame_rate = self.load.effective_fps if self.load is not None else None
+            behavior_info = self.behavior.update(tracks, motion, data["timestamp"], frame_rate)
+
+        metrics.set_gauge(cam_id, "active_tracks", self.tracker.active_tracks())
+        return tracks, behavior_info
+
+    def adapt(self, latency, timestamp):
+        """
+        Feeds one frame's capture-to-result latency to the LoadController and
+        applies its decision to the tracker, detector input size and ingestor.
+        """
+        cam_id = self.camera_id
+        load = self.load
+        change = load.observe(latency, timestamp)
+        if change is not None:
+            knob, old, new = change
+            print(f"[INFO] {cam_id}: latency {load.latency * 1000:.0f}ms vs budget {load.budget * 1000:.0f}ms, "
+                  f"{knob} {old} -> {new}")
+            self.metrics.inc(cam_id, "load_changes")
+
+            self.tracker.detect_interval = load.detect_interval
+            self.imgsz = load.imgsz
+            sample_rate, sample_fps = self._sampling
+            if sample_fps:
+                self.ingestor.sample_fps = sample_fps / load.sample_factor
+            else:
+                self.ingestor.sample_rate = sample_rate * load.sample_factor
+
+        if self.behavior.reference_fps is None:
+            # motion thresholds hold for the frame rate before any load shedding
+            self.behavior.reference_fps = load.baseline_fps
+        for name, value in load.gauges().items():
+            self.metrics.set_gauge(cam_id, name, value)
+
+    def run(self, stop_event):
+        """
+        Reader loop, meant to run on its own thread.
+        """
+        cam_id = self.camera_id
+        metrics = self.metrics
+        try:
+            waited = time.perf_counter()
+            for data in self.ingestor.read():
+                start = time.perf_counter()
+                metrics.observe(cam_id, "ingest", start - waited)
+                if stop_event.is_set():
+                    break
+
+                tracks, behavior_info = self.process(data)
+                self.fps.tick()
+
+                if self.on_result is not None:
+                    self.on_result(self, data, tracks, behavior_info)
+                if self.load is not None:
+                    self.adapt(time.time() - data["timestamp"], data["timestamp"])
+
+                waited = time.perf_counter()
+                metrics.observe(cam_id, "total", waited - start)
+                metrics.inc(cam_id, "frames_in")
+                metrics.set_total(cam_id, "frames_dropped", self.ingestor.dropped_frames)
+        finally:
+            self.ingestor.release()
+
+
+class MultiCameraRunner:
+    def __init__(self, cameras, detector, on_result=None, report_interval=5.0,
+                 batch_size=1, max_wait=0.01, metrics_port=None, log_metrics=False, attribute_detector=None,
+                 **pipeline_kwargs):
+        """
+        Runs every camera on its own thread with one shared detector.
+
+        cameras: list of camera dicts (config.layer0_cameras.CAMERAS)
+        detector: loaded YOLODetector, shared by all cameras
+        report_interval: seconds between per-camera FPS lines (0 disables)
+        batch_size: >1 groups frames of several cameras into one model call
+        max_wait: seconds a frame may wait for its batch to fill
+        metrics_port: serve /metrics and /metrics.json on 127.0.0.1:<port> (None disables)
+        log_metrics: add per-stage p95 latencies to the periodic report line
+        attribute_detector: loaded PPE YOLODetector, run on batched person crops
+                            (see tracker.layer5_attributes; None disables)
+        pipeline_kwargs: forwarded to CameraPipeline
+        """
+        self.detector = detector
+        self.attribute_detector = attribute_detector
+        self.report_interval = report_interval
+        self.metrics = Metrics()
+        self.metrics_server = MetricsServer(self.metrics, port=metrics_port) if metrics_port is not None else None
+        self.log_metrics = log_metrics
+        self.stop_event = threading.Event()
+        self._detect_lock = threading.Lock()
+        self._attribute_lock = threading.Lock()
+        self._threads = []
+
+        self.collector = None
+        if batch_size > 1:
+            self.collector = BatchCollector(detector, max_batch_size=batch_size, max_wait=max_wait)
+
+        self.pipelines = []
+        for cam in cameras:
+            if self.collector is not None:
+                detect = partial(self.collector.detect, cam["camera_id"])
+            else:
+                detect = self._detect
+
+            detect_attributes = self._detect_attributes if attribute_detector is not None else None
+            try:
+                pipeline = CameraPipeline(cam, detect, detect_windows=partial(self._detect_windows, cam["camera_id"]),
+                                          detect_attributes=detect_attributes, on_result=on_result,
+                                          metrics=self.metrics, **pipeline_kwargs)
+            except RuntimeError as e:
+                # one bad stream should not stop the other cameras
+                print(f"[ERROR] {cam['camera_id']}: {e}")
+                continue
+            self.pipelines.append(pipeline)
+
+    def _detect(self, frame, imgsz=None):
+        # the model is not thread-safe, cameras take turns
+        with self._detect_lock:
+            if imgsz is None:
+                return self.detector.detect(frame)
+            return self.detector.detect(frame, imgsz=imgsz)
+
+    def _detect_windows(self, camera_id, frame, windows):
+        # all ROI / tile crops of a frame in one model call (batched with other cameras)
+        crops = crop_windows(frame, windows)
+        if self.collector is not None:
+            return self.collector.detect_many(camera_id, crops)
+        with self._detect_lock:
+            return self.detector.detect_batch(crops)
+
+    def _detect_attributes(self, frame, windows):
+        # person crops of one frame in one call of the PPE model (its own lock, not the person model's)
+        crops = crop_windows(frame, windows)
+        with self._attribute_lock:
+            return self.attribute_detector.detect_batch(crops)
+
+    def start(self):
+        if self.collector is not None:
+            self.collector.start()
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            print(f"[INFO] metrics on http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+
+        for pipeline in self.pipelines:
+            t = threading.Thread(
+                target=pipeline.run,
+                args=(self.stop_event,),
+                name=f"cam-{pipeline.camera_id}",
+                daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+        if self.report_interval:
+            t = threading.Thread(target=self._report_loop, name="fps-report", daemon=True)
+            t.start()
+
+    def _report_loop(self):
+        while not self.stop_event.wait(self.report_interval):
+            print("[INFO] " + self.fps_summary())
+            if self.log_metrics:
+                print("[METRICS] " + self.metrics.log_line())
+
+    def fps_summary(self):
+        parts = []
+        for p in self.pipelines:
+            part = f"{p.camera_id}: {p.fps.read():.1f} FPS ({p.ingestor.dropped_frames} dropped"
+            if p.gate is not None:
+                part += f", {p.gate.skip_ratio:.0%} skipped"
+            parts.append(part + ")")
+        summary = " | ".join(parts)
+        if self.collector is not None:
+            summary += f" | avg batch {self.collector.average_batch_size():.1f}"
+        return summary
+
+    def is_alive(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def stop(self):
+        self.stop_event.set()
+        for pipeline in self.pipelines:
+            pipeline.ingestor.stop()
+
+    def join(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+        if not self.is_alive():
+            if self.collector is not None:
+                self.collector.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
@@ -0,0 +1,607 @@
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+from detector.layer2_regions import crop_windows
+from pipeline.metrics import Metrics, MetricsServer
+from pipeline.multi_camera import CameraPipeline, FPSMeter
+
+
+class StopFlag:
+    __slots__ = ("value",)
+
+    def __init__(self, ctx):
+        """
+        Stop signal shared with child processes, polled with is_set().
+
+        A lock-free shared byte rather than multiprocessing.Event: a process that
+        dies while waiting on an Event leaves set() blocked forever.
+        """
+        self.value = ctx.RawValue("b", 0)
+
+    def set(self):
+        self.value.value = 1
+
+    def is_set(self):
+        return self.value.value == 1
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots=8, name=None, create=True):
+        """
+        Fixed-size frame slots in one shared memory block.
+
+        One writer (the camera process) fills slots round-robin; readers in other
+        processes attach by name and copy or view a slot without any pickling.
+        Each slot carries the sequence number of the frame in it (-1 while
+        written), so a reader can tell when a slot was overwritten under it.
+        shape: frame shape, e.g. (1080, 1920, 3) uint8
+        slots: frames kept before the oldest is overwritten
+        """
+        self.shape = tuple(int(v) for v in shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header = -(-slots * 8 // 64) * 64  # seq numbers, padded to a cache line
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=header + slots * frame_bytes)
+        self.owner = create
+        self.seqs = np.ndarray((slots,), np.int64, self.shm.buf, 0)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, self.shm.buf, header)
+        if create:
+            self.seqs[:] = -1
+        self.next_seq = 0
+
+    @classmethod
+    def attach(cls, name, shape, slots):
+        return cls(shape, slots, name=name, create=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame):
+        """
+        Copies frame into the next slot. Returns (slot, seq).
+        """
+        seq = self.next_seq
+        self.next_seq += 1
+        slot = seq % self.slots
+        self.seqs[slot] = -1
+        self.frames[slot] = frame
+        self.seqs[slot] = seq
+        return slot, seq
+
+    def view(self, slot):
+        """
+        Zero-copy view of a slot; only valid while the writer leaves it alone.
+        """
+        return self.frames[slot]
+
+    def valid(self, slot, seq):
+        return int(self.seqs[slot]) == seq
+
+    def read(self, slot, seq):
+        """
+        Copy of the frame written as seq, or None if the slot has moved on.
+        """
+        if not self.valid(slot, seq):
+            return None
+        frame = self.frames[slot].copy()
+        return frame if self.valid(slot, seq) else None
+
+    def close(self):
+        # numpy views pin the buffer, drop them before closing the mapping
+        self.seqs = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RemoteDetector:
+    def __init__(self, camera_id, conn, names, slots=8, timeout=10.0, stop_event=None):
+        """
+        detect(frame) for a camera process: the frame goes into this camera's
+        SharedFrameRing and only (ring name, slot, seq) crosses the pipe to the
+        detector process; boxes come back as small arrays.
+
+        conn: this camera's end of the pipe to the detector process
+        names: class names of the detector's model
+        timeout: seconds to wait for detections before carrying on with none
+        """
+        self.camera_id = camera_id
+        self.conn = conn
+        self.names = names
+        self.slots = slots
+        self.timeout = timeout
+        self.stop_event = stop_event
+
+        self.ring = None
+        self._last_frame = None
+        self._last_ref = None
+        self.timeouts = 0
+
+    def share(self, frame):
+        """
+        Puts frame into the ring (once per frame). Returns its reference
+        (ring name, shape, slots, slot, seq).
+        """
+        if frame is self._last_frame:
+            return self._last_ref
+        if self.ring is None or self.ring.shape != frame.shape:
+            self.close()  # resolution changed, readers re-attach by the new name
+            self.ring = SharedFrameRing(frame.shape, self.slots)
+
+        slot, seq = self.ring.write(frame)
+        self._last_frame = frame
+        self._last_ref = (self.ring.name, self.ring.shape, self.slots, slot, seq)
+        return self._last_ref
+
+    def detect(self, frame, imgsz=None):
+        return self.detect_windows(frame, None, imgsz)[0]
+
+    def detect_windows(self, frame, windows, imgsz=None):
+        """
+        Detections for (x1, y1, x2, y2) windows of frame, cropped in the detector
+        process (None = the whole frame). One DetectionBatch per window.
+        imgsz: model input size (None = detector default)
+        """
+        ref = self.share(frame)
+        token = (ref[0], ref[4])
+        self.conn.send((ref, windows, imgsz))
+
+        deadline = time.perf_counter() + self.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or (self.stop_event is not None and self.stop_event.is_set()):
+                break
+            if not self.conn.poll(min(remaining, 0.1)):
+                continue
+            reply_token, results = self.conn.recv()
+            if reply_token == token:
+                return [DetectionBatch(boxes, scores, class_ids, self.names) for boxes, scores, class_ids in results]
+            # late reply to a request that already timed out
+
+        self.timeouts += 1
+        if self.timeouts == 1 or self.timeouts % 100 == 0:
+            print(f"[WARN] {self.camera_id}: no detections from the detector process ({self.timeouts} timeouts)")
+        return [DetectionBatch.empty(self.names) for _ in (windows or [None])]
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._last_frame = self._last_ref = None
+
+
+def _detect_chunks(detector, frames, batch_size, imgsz):
+    outputs = []
+    for start in range(0, len(frames), batch_size):
+        chunk = frames[start:start + batch_size]
+        try:
+            if imgsz is None:
+                outputs += detector.detect_batch(chunk)
+            else:
+                outputs += detector.detect_batch(chunk, imgsz=imgsz)
+        except Exception as e:
+            print(f"[ERROR] detector: {e}")
+            outputs += [DetectionBatch.empty(detector.names) for _ in chunk]
+    return outputs
+
+
+def _serve(detector, pending, rings, batch_size):
+    """
+    Answers one round of requests ({conn: request}). A function of its own so
+    the shared memory views it takes are released before rings are swapped.
+    """
+    requests = []  # (conn, reply token, crops, imgsz)
+    for conn, ((name, shape, slots, slot, seq), windows, imgsz) in pending.items():
+        ring = rings.get(conn)
+        if ring is None or ring.name != name:
+            if ring is not None:
+                ring.close()
+            try:
+                ring = rings[conn] = SharedFrameRing.attach(name, shape, slots)
+            except FileNotFoundError:
+                rings.pop(conn, None)  # camera restarted since it asked
+                continue
+        frame = ring.view(slot)
+        crops = [frame] if windows is None else crop_windows(frame, windows)
+        requests.append((conn, (name, seq), crops, imgsz))
+
+    # ROI / tile crops of every camera share the model calls, one input size per call
+    results = {}  # (request index, crop index) -> detections
+    for imgsz in {r[3] for r in requests}:
+        keys, crops = [], []
+        for i, r in enumerate(requests):
+            if r[3] == imgsz:
+                keys += [(i, j) for j in range(len(r[2]))]
+                crops += r[2]
+        results.update(zip(keys, _detect_chunks(detector, crops, batch_size, imgsz)))
+
+    for i, (conn, token, crops, _) in enumerate(requests):
+        reply = [DetectionBatch.coerce(results[(i, j)]) for j in range(len(crops))]
+        conn.send((token, [(d.boxes, d.scores, d.class_ids) for d in reply]))
+
+
+def _detector_main(factory, conns, control, stop_event, batch_size, max_wait):
+    """
+    Detector process: batches frame references from the camera pipes, reads the
+    frames straight out of shared memory and answers each camera on its pipe.
+    """
+    detector = factory()
+    warmup = detector.warmup() if hasattr(detector, "warmup") else 0.0
+    control.send(("ready", dict(detector.names), warmup))
+
+    rings = {}  # conn -> attached SharedFrameRing
+    try:
+        while not stop_event.is_set():
+            ready = wait(conns, timeout=0.2)
+            if not ready:
+                continue
+
+            # latest request per camera, wait up to max_wait for the batch to fill
+            pending = {}
+            deadline = time.perf_counter() + max_wait
+            while ready:
+                for conn in ready:
+                    pending[conn] = conn.recv()
+                remaining = deadline - time.perf_counter()
+                if len(pending) >= batch_size or remaining <= 0:
+                    break
+                ready = wait([c for c in conns if c not in pending], timeout=remaining)
+
+            _serve(detector, pending, rings, batch_size)
+    finally:
+        for ring in rings.values():
+            ring.close()
+
+
+def _camera_main(cam, names, det_conn, result_conn, stop_event, pipeline_kwargs, slots, detect_timeout,
+                 share_frames):
+    """
+    Camera process: ingest -> (remote) detect -> track -> motion -> behavior.
+    Results go to the parent on result_conn, frames stay in shared memory.
+    """
+    import cv2
+
+    cv2.setNumThreads(1)  # one process per camera already fills the cores
+
+    camera_id = cam["camera_id"]
+    remote = RemoteDetector(camera_id, det_conn, names, slots, detect_timeout, stop_event)
+
+    def send_result(pipeline, data, tracks, behavior_info):
+        meta = {k: v for k, v in data.items() if k != "frame"}
+        ref = remote.share(data["frame"]) if share_frames else None
+        stats = {"frames_dropped": pipeline.ingestor.dropped_frames, "detect_timeouts": remote.timeouts,
+                 "gauges": {}}
+        if pipeline.load is not None:
+            # the child's own Metrics never reach /metrics, forward the controller's state
+            stats["gauges"] = pipeline.load.gauges()
+            stats["load_changes"] = pipeline.load.changes
+        result_conn.send((meta, ref, tracks, behavior_info, stats))
+
+    try:
+        try:
+            pipeline = CameraPipeline(cam, remote.detect, detect_windows=remote.detect_windows,
+                                      on_result=send_result, **pipeline_kwargs)
+        except RuntimeError as e:
+            print(f"[ERROR] {camera_id}: {e}")
+            raise SystemExit(1)
+
+        def stop_ingest():
+            while not stop_event.is_set():
+                time.sleep(0.2)
+            pipeline.ingestor.stop()  # unblocks a threaded reader waiting on the stream
+
+        threading.Thread(target=stop_ingest, name="stop-watch", daemon=True).start()
+        pipeline.run(stop_event)
+    finally:
+        # the parent acks once it has read every result, then the ring can go
+        result_conn.send(None)
+        if result_conn.poll(5.0):
+            result_conn.recv()
+        remote.close()
+
+
+class ChildProcess:
+    def __init__(self, name, target, args, backoff=1.0, max_backoff=30.0, stable_after=60.0):
+        """
+        A supervised process: restarted with exponential backoff when it crashes
+        (non-zero exit code), left alone when it finishes normally.
+        stable_after: a run this long resets the backoff
+        """
+        self.name = name
+        self.target = target
+        self.args = args
+        self.initial_backoff = backoff
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+
+        self.process = None
+        self.started = None
+        self.restart_at = None
+        self.restarts = 0
+        self.finished = False
+
+    def start(self, ctx):
+        self.process = ctx.Process(target=self.target, args=self.args, name=self.name, daemon=True)
+        self.process.start()
+        self.started = time.monotonic()
+        self.restart_at = None
+
+    def poll(self, ctx, restart=True):
+        """
+        Restarts the process if it crashed and its backoff has passed.
+        Returns True when a crash was noticed on this call.
+        """
+        if self.finished or self.process is None or self.process.is_alive():
+            return False
+
+        now = time.monotonic()
+        if self.restart_at is None:
+            code = self.process.exitcode
+            if code == 0:
+                self.finished = True
+                return False
+            if now - self.started >= self.stable_after:
+                self.backoff = self.initial_backoff
+            self.restart_at = now + self.backoff
+            print(f"[WARN] {self.name} exited with code {code}, restarting in {self.backoff:.0f}s")
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            return True
+
+        if restart and now >= self.restart_at:
+            self.restarts += 1
+            self.start(ctx)
+        return False
+
+    def is_alive(self):
+        return not self.finished and self.process is not None
+
+    def join(self, timeout=None):
+        if self.process is None:
+            return
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print(f"[WARN] {self.name} did not stop, terminating")
+            self.process.terminate()
+            self.process.join(1.0)
+
+
+class CameraProcess:
+    def __init__(self, cam, metrics, child, detector_conn, result_conn, worker_conn):
+        """
+        Parent-side handle of one camera process; on_result receives it in place
+        of a CameraPipeline (camera_id, metrics).
+        detector_conn / worker_conn: the process' ends of its detector and result pipes
+        """
+        self.camera_id = cam["camera_id"]
+        self.cam = cam
+        self.metrics = metrics
+        self.child = child
+        self.detector_conn = detector_conn
+        self.result_conn = result_conn
+        self.worker_conn = worker_conn
+        self.fps = FPSMeter()
+        self.ring = None
+        self.frames_dropped = 0
+        self.detect_timeouts = 0
+
+    def read_frame(self, ref):
+        """
+        Copies a frame out of the camera's ring, None if it was overwritten or gone.
+        """
+        name, shape, slots, slot, seq = ref
+        if self.ring is None or self.ring.name != name:
+            self.close()
+            try:
+                self.ring = SharedFrameRing.attach(name, shape, slots)
+            except FileNotFoundError:
+                return None
+        return self.ring.read(slot, seq)
+
+    def unlink(self):
+        """
+        Removes the ring of a crashed process, which had no chance to do it itself.
+        """
+        if self.ring is not None:
+            try:
+                self.ring.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class MultiProcessRunner:
+    def __init__(self, cameras, detector_factory, on_result=None, report_interval=5.0, batch_size=8,
+                 max_wait=0.01, slots=8, detect_timeout=10.0, share_frames=True, restart_backoff=1.0,
+                 max_backoff=30.0, ready_timeout=300.0, metrics_port=None, log_metrics=False,
+                 **pipeline_kwargs):
+        """
+        One process per camera plus one detector process.
+
+        Camera processes run ingest, tracking, motion and behavior; frames reach
+        the detector (and the parent, for on_result) through shared memory rings,
+        only small references and result arrays are pickled. Every camera has its
+        own pipes, so a crashed camera process cannot leave a shared lock held;
+        crashed processes are restarted with backoff while the others keep going.
+
+        cameras: list of camera dicts (config.layer0_cameras.CAMERAS)
+        detector_factory: picklable callable building the detector inside the
+                          detector process, e.g. partial(YOLODetector, classes=["person"])
+        on_result: optional callable(camera, data, tracks, behavior_info) on the parent;
+                   camera has camera_id and metrics like a CameraPipeline
+        batch_size: frames of different cameras per model call
+        max_wait: seconds the detector waits for a batch to fill
+        slots: frames per camera ring
+        detect_timeout: seconds a camera waits for detections before going on without
+        share_frames: also hand frames to on_result (data["frame"], None if overwritten)
+        restart_backoff / max_backoff: first and largest delay before a restart
+        ready_timeout: seconds start() waits for the model to load
+        pipeline_kwargs: forwarded to CameraPipeline in each camera process
+        """
+        self.ctx = multiprocessing.get_context("spawn")  # no fork of a process with threads/model state
+        self.on_result = on_result
+        self.report_interval = report_interval
+        self.ready_timeout = ready_timeout
+        self.metrics = Metrics()
+        self.metrics_server = MetricsServer(self.metrics, port=metrics_port) if metrics_port is not None else None
+        self.log_metrics = log_metrics
+        self.stop_event = StopFlag(self.ctx)
+        self.names = None
+        self._stopping = threading.Event()
+        self._threads = []
+        self._worker_args = (pipeline_kwargs, slots, detect_timeout, share_frames)
+
+        # pipes, not queues: a process killed mid-read cannot leave a lock behind
+        detector_conns = []
+        self.pipelines = []
+        for cam in cameras:
+            cam_end, det_end = self.ctx.Pipe()
+            result_end, worker_end = self.ctx.Pipe()
+            detector_conns.append(det_end)
+            child = ChildProcess(f"cam-{cam['camera_id']}", _camera_main, (), restart_backoff, max_backoff)
+            self.pipelines.append(CameraProcess(cam, self.metrics, child, cam_end, result_end, worker_end))
+
+        self._control, control_end = self.ctx.Pipe(duplex=False)
+        self.detector = ChildProcess(
+            "detector", _detector_main,
+            (detector_factory, detector_conns, control_end, self.stop_event, batch_size, max_wait),
+            restart_backoff, max_backoff
+        )
+
+    def start(self):
+        """
+        Starts the detector, waits for its model, then the cameras.
+        """
+        self.detector.start(self.ctx)
+        ready = self._control.poll(self.ready_timeout)
+        if not ready:
+            self.stop()
+            self.detector.join(1.0)
+            raise RuntimeError("detector process did not start")
+        _, self.names, warmup = self._control.recv()
+        print(f"[INFO] detector process ready (warmup {warmup:.2f}s)")
+
+        for p in self.pipelines:
+            p.child.args = (p.cam, self.names, p.detector_conn, p.worker_conn, self.stop_event) + self._worker_args
+            p.child.start(self.ctx)
+
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            print(f"[INFO] metrics on http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+
+        targets = [("results", self._result_loop), ("supervisor", self._supervise_loop)]
+        if self.report_interval:
+            targets.append(("fps-report", self._report_loop))
+        for name, target in targets:
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _supervise_loop(self):
+        while not self._stopping.wait(0.2):
+            restart = not self.stop_event.is_set()
+            if self.detector.poll(self.ctx, restart):
+                self.metrics.inc("detector", "restarts")
+            while self._control.poll():
+                _, _, warmup = self._control.recv()
+                print(f"[INFO] detector process restarted (warmup {warmup:.2f}s)")
+            for p in self.pipelines:
+                if p.child.poll(self.ctx, restart):
+                    p.unlink()
+                    self.metrics.inc(p.camera_id, "restarts")
+
+    def _result_loop(self):
+        by_conn = {p.result_conn: p for p in self.pipelines}
+        while True:
+            ready = wait(list(by_conn), timeout=0.2)
+            for conn in ready:
+                self._handle(by_conn[conn], conn.recv())
+            if not ready and self._stopping.is_set() and not any(
+                    p.child.process is not None and p.child.process.is_alive() for p in self.pipelines):
+                break
+
+    def _handle(self, p, message):
+        if message is None:
+            p.result_conn.send(True)  # camera process is exiting, every result before it was read
+            return
+
+        meta, ref, tracks, behavior_info, stats = message
+        data = dict(meta)
+        data["frame"] = p.read_frame(ref) if ref is not None else None
+
+        cam_id = p.camera_id
+        p.fps.tick()
+        p.frames_dropped = stats["frames_dropped"]
+        p.detect_timeouts = stats["detect_timeouts"]
+        self.metrics.observe(cam_id, "latency", time.time() - data["timestamp"])  # capture -> parent
+        self.metrics.inc(cam_id, "frames_in")
+        self.metrics.set_total(cam_id, "frames_dropped", p.frames_dropped)
+        self.metrics.set_total(cam_id, "detect_timeouts", p.detect_timeouts)
+        if "load_changes" in stats:
+            self.metrics.set_total(cam_id, "load_changes", stats["load_changes"])
+        for name, value in stats["gauges"].items():
+            self.metrics.set_gauge(cam_id, name, value)  # load controller state
+
+        if self.on_result is not None:
+            try:
+                self.on_result(p, data, tracks, behavior_info)
+            except Exception as e:
+                print(f"[ERROR] {cam_id}: on_result failed: {e}")
+
+    def _report_loop(self):
+        while not self._stopping.wait(self.report_interval):
+            print("[INFO] " + self.fps_summary())
+            if self.log_metrics:
+                print("[METRICS] " + self.metrics.log_line())
+
+    def fps_summary(self):
+        parts = []
+        for p in self.pipelines:
+            part = f"{p.camera_id}: {p.fps.read():.1f} FPS ({p.frames_dropped} dropped"
+            if p.child.restarts:
+                part += f", {p.child.restarts} restarts"
+            parts.append(part + ")")
+        return " | ".join(parts)
+
+    def is_alive(self):
+        return any(p.child.is_alive() for p in self.pipelines)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        """
+        Waits for the cameras to finish (or stop()), then shuts every process down.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_alive() and not self.stop_event.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.1)
+
+        self.stop_event.set()
+        remaining = 5.0 if deadline is None else max(deadline - time.monotonic(), 1.0)
+        for p in self.pipelines:
+            p.child.join(remaining)
+        self.detector.join(remaining)
+
+        self._stopping.set()
+        for t in self._threads:
+            t.join(remaining)
+        for p in self.pipelines:
+            p.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import cv2
+
+COLORS = {"Normal": (255, 0, 0), "Warning": (0, 165, 255), "Alert": (0, 0, 255)}
+
+
+def draw_tracks(frame, tracks, behavior_info):
+    for t, b in zip(tracks, behavior_info):
+        track_id = t["track_id"]
+        decision = b["decision"]
+
+        x1, y1, x2, y2 = t["bbox"]
+        color = COLORS.get(decision, COLORS["Normal"])
+
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            frame,
+            f"ID {track_id} | {decision}",
+            (x1, y1 - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            color,
+            2
+        )
+
+
+class PreviewRenderer:
+    def __init__(self, max_fps=10, title="CCTV AI", metrics=None):
+        """
+        Draws and shows the latest result of each camera on its own thread.
+
+        Camera threads only hand over references (publish); drawing happens on a
+        copy here, at most max_fps times per second, and results that arrive in
+        between are skipped. All HighGUI calls stay on this one thread.
+        metrics: optional pipeline Metrics, records a "render" stage per camera
+        """
+        self.interval = 1.0 / max_fps
+        self.title = title
+        self.metrics = metrics
+        self.closed = False  # ESC pressed
+
+        self._latest = {}  # camera_id -> (frame, tracks, behavior_info)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def publish(self, camera_id, frame, tracks, behavior_info):
+        """
+        Called from the camera threads, never blocks on rendering.
+        """
+        with self._lock:
+            self._latest[camera_id] = (frame, tracks, behavior_info)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="preview", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def render(self, camera_id, frame, tracks, behavior_info):
+        """
+        Annotated copy of a result.
+        """
+        image = frame.copy()
+        draw_tracks(image, tracks, behavior_info)
+        return image
+
+    def run(self):
+        """
+        Render loop, until stop() or ESC in a preview window.
+        """
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                with self._lock:
+                    latest, self._latest = self._latest, {}
+
+                for camera_id, result in latest.items():
+                    t0 = time.perf_counter()
+                    cv2.imshow(f"{self.title} - {camera_id}", self.render(camera_id, *result))
+                    if self.metrics is not None:
+                        self.metrics.observe(camera_id, "render", time.perf_counter() - t0)
+
+                if cv2.waitKey(1) & 0xFF == 27:
+                    self.closed = True
+                    break
+                self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+        finally:
+            cv2.destroyAllWindows()
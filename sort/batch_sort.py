@@ -0,0 +1,198 @@
+"""
+    Vectorised SORT backend.
+
+    Same constant-velocity model, association and track life cycle as
+    sort.Sort, but all track states live in stacked arrays (x: N x 7,
+    P: N x 7 x 7) so predict/update run once per frame for every track
+    instead of once per KalmanBoxTracker.
+"""
+import numpy as np
+
+from sort.sort import KalmanBoxTracker, associate_detections_to_trackers
+
+# constant velocity model, identical to KalmanBoxTracker
+F = np.eye(7)
+F[0, 4] = F[1, 5] = F[2, 6] = 1.
+Q = np.diag([1., 1., 1., 1., 0.01, 0.01, 0.0001])
+R = np.diag([1., 1., 10., 10.])
+P0 = np.diag([10., 10., 10., 10., 10000., 10000., 10000.])
+I7 = np.eye(7)
+
+
+def convert_bboxes_to_z(bboxes):
+    """
+    Vectorised convert_bbox_to_z: N x [x1,y1,x2,y2] -> N x [x,y,s,r]
+    """
+    w = bboxes[:, 2] - bboxes[:, 0]
+    h = bboxes[:, 3] - bboxes[:, 1]
+    return np.stack([bboxes[:, 0] + w / 2., bboxes[:, 1] + h / 2., w * h, w / h], axis=1)
+
+
+def convert_x_to_bboxes(x):
+    """
+    Vectorised convert_x_to_bbox: N x [x,y,s,r,...] -> N x [x1,y1,x2,y2]
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.sqrt(x[:, 2] * x[:, 3])
+        h = x[:, 2] / w
+    return np.stack([x[:, 0] - w / 2., x[:, 1] - h / 2., x[:, 0] + w / 2., x[:, 1] + h / 2.], axis=1)
+
+
+class BatchSort(object):
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+        """
+        Sets key parameters for SORT (same meaning as sort.Sort)
+        """
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.frame_count = 0
+
+        self.x = np.zeros((0, 7))
+        self.P = np.zeros((0, 7, 7))
+        self.ids = np.zeros(0, dtype=int)
+        self.time_since_update = np.zeros(0, dtype=int)
+        self.hits = np.zeros(0, dtype=int)
+        self.hit_streak = np.zeros(0, dtype=int)
+        self.age = np.zeros(0, dtype=int)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _keep(self, mask):
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.ids = self.ids[mask]
+        self.time_since_update = self.time_since_update[mask]
+        self.hits = self.hits[mask]
+        self.hit_streak = self.hit_streak[mask]
+        self.age = self.age[mask]
+
+    def _predict(self):
+        """
+        Advances every track one frame. Returns the predicted boxes (N x 4).
+        """
+        # stop the area from going negative
+        self.x[self.x[:, 6] + self.x[:, 2] <= 0, 6] = 0.
+        self.x = self.x @ F.T
+        self.P = F @ self.P @ F.T + Q
+
+        self.age += 1
+        self.hit_streak[self.time_since_update > 0] = 0
+        self.time_since_update += 1
+        return convert_x_to_bboxes(self.x)
+
+    def propagate(self):
+        """
+        Moves every track one frame forward without detections (detector skipped on purpose).
+        Not counted as a miss. Returns boxes of the currently reported tracks, like update().
+        """
+        if not len(self):
+            return np.empty((0, 5))
+
+        self.x[self.x[:, 6] + self.x[:, 2] <= 0, 6] = 0.
+        self.x = self.x @ F.T
+        self.P = F @ self.P @ F.T + Q
+        self.age += 1
+
+        boxes = convert_x_to_bboxes(self.x)
+        out = (self.time_since_update < 1) & (
+            (self.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+        out &= ~np.any(np.isnan(boxes), axis=1)
+
+        ret = np.concatenate([boxes, (self.ids + 1)[:, None]], axis=1)[out][::-1]
+        if len(ret) > 0:
+            return ret
+        return np.empty((0, 5))
+
+    def motion_stats(self):
+        """
+        Returns per-track arrays (relative position uncertainty, relative speed).
+        """
+        size = np.sqrt(np.maximum(self.x[:, 2], 1e-6))
+        std = np.sqrt(self.P[:, 0, 0] + self.P[:, 1, 1])
+        speed = np.hypot(self.x[:, 4], self.x[:, 5])
+        return std / size, speed / size
+
+    def _update(self, idx, bboxes):
+        """
+        Kalman update of tracks idx with observed boxes (Joseph form, as filterpy).
+        """
+        x = self.x[idx]
+        P = self.P[idx]
+
+        y = convert_bboxes_to_z(bboxes) - x[:, :4]
+        PHT = P[:, :, :4]
+        S = P[:, :4, :4] + R
+        K = PHT @ np.linalg.inv(S)
+
+        x = x + (K @ y[:, :, None])[:, :, 0]
+        I_KH = np.broadcast_to(I7, P.shape).copy()
+        I_KH[:, :, :4] -= K
+        P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ R @ K.transpose(0, 2, 1)
+
+        self.x[idx] = x
+        self.P[idx] = P
+        self.time_since_update[idx] = 0
+        self.hits[idx] += 1
+        self.hit_streak[idx] += 1
+
+    def _create(self, bboxes):
+        n = len(bboxes)
+        x = np.zeros((n, 7))
+        x[:, :4] = convert_bboxes_to_z(bboxes)
+
+        # ids share KalmanBoxTracker's counter so both backends stay unique per process
+        ids = np.arange(KalmanBoxTracker.count, KalmanBoxTracker.count + n)
+        KalmanBoxTracker.count += n
+
+        zeros = np.zeros(n, dtype=int)
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.broadcast_to(P0, (n, 7, 7))])
+        self.ids = np.concatenate([self.ids, ids])
+        self.time_since_update = np.concatenate([self.time_since_update, zeros])
+        self.hits = np.concatenate([self.hits, zeros])
+        self.hit_streak = np.concatenate([self.hit_streak, zeros])
+        self.age = np.concatenate([self.age, zeros])
+
+    def update(self, dets=np.empty((0, 5))):
+        """
+        Params:
+          dets - a numpy array of detections in the format [[x1,y1,x2,y2,score],[x1,y1,x2,y2,score],...]
+        Requires: this method must be called once for each frame even with empty detections.
+        Returns a similar array, where the last column is the object ID (same as sort.Sort).
+        """
+        self.frame_count += 1
+
+        trks = np.zeros((len(self), 5))
+        if len(self):
+            trks[:, :4] = self._predict()
+            valid = ~np.any(np.isnan(trks[:, :4]), axis=1)
+            if not valid.all():
+                self._keep(valid)
+                trks = trks[valid]
+
+        matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets, trks, self.iou_threshold)
+
+        if len(matched):
+            self._update(matched[:, 1], dets[matched[:, 0], :4])
+
+        if len(unmatched_dets):
+            self._create(dets[unmatched_dets.astype(int), :4])
+
+        if not len(self):
+            return np.empty((0, 5))
+
+        boxes = convert_x_to_bboxes(self.x)
+        out = (self.time_since_update < 1) & (
+            (self.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+
+        # newest first, like sort.Sort which walks its tracker list in reverse
+        ret = np.concatenate([boxes, (self.ids + 1)[:, None]], axis=1)[out][::-1]
+
+        # remove dead tracklets
+        self._keep(self.time_since_update <= self.max_age)
+
+        if len(ret) > 0:
+            return ret
+        return np.empty((0, 5))
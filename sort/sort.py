@@ -17,31 +17,33 @@
 """
 from __future__ import print_function
 
-import os
 import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from skimage import io
 
-import glob
-import time
-import argparse
-from filterpy.kalman import KalmanFilter
+# Tracker core only. The MOT demo CLI (matplotlib/skimage) lives in sort_demo.py;
+# filterpy and the assignment solver are imported on first use.
+KalmanFilter = None
+_lapjv = None
+_linear_sum_assignment = None
 
-np.random.seed(0)
 
-
-def linear_assignment(cost_matrix):
+def _load_solver():
+  global _lapjv, _linear_sum_assignment
   try:
-    import lap
-    _, x, y = lap.lapjv(cost_matrix, extend_cost=True)
-    return np.array([[y[i],i] for i in x if i >= 0]) #
+    from lap import lapjv
+    _lapjv = lapjv
   except ImportError:
     from scipy.optimize import linear_sum_assignment
-    x, y = linear_sum_assignment(cost_matrix)
-    return np.array(list(zip(x, y)))
+    _linear_sum_assignment = linear_sum_assignment
+
+
+def linear_assignment(cost_matrix):
+  if _lapjv is None and _linear_sum_assignment is None:
+    _load_solver()
+  if _lapjv is not None:
+    _, x, y = _lapjv(cost_matrix, extend_cost=True)
+    return np.array([[y[i],i] for i in x if i >= 0]) #
+  x, y = _linear_sum_assignment(cost_matrix)
+  return np.array(list(zip(x, y)))
 
 
 def iou_batch(bb_test, bb_gt):
@@ -100,6 +102,9 @@ class KalmanBoxTracker(object):
     """
     Initialises a tracker using initial bounding box.
     """
+    global KalmanFilter
+    if KalmanFilter is None:
+      from filterpy.kalman import KalmanFilter
     #define constant velocity model
     self.kf = KalmanFilter(dim_x=7, dim_z=4) 
     self.kf.F = np.array([[1,0,0,0,1,0,0],[0,1,0,0,0,1,0],[0,0,1,0,0,0,1],[0,0,0,1,0,0,0],  [0,0,0,0,1,0,0],[0,0,0,0,0,1,0],[0,0,0,0,0,0,1]])
@@ -144,56 +149,212 @@ class KalmanBoxTracker(object):
     self.history.append(convert_x_to_bbox(self.kf.x))
     return self.history[-1]
 
+  def propagate(self):
+    """
+    Advances the state one frame on the motion model only. Unlike predict() this
+    is not counted as a missed detection (the detector was skipped on purpose).
+    """
+    if((self.kf.x[6]+self.kf.x[2])<=0):
+      self.kf.x[6] *= 0.0
+    self.kf.predict()
+    self.age += 1
+    return convert_x_to_bbox(self.kf.x)
+
   def get_state(self):
     """
     Returns the current bounding box estimate.
     """
     return convert_x_to_bbox(self.kf.x)
 
+  def get_motion(self):
+    """
+    Returns (position std / box size, speed / box size per frame) of the estimate.
+    """
+    size = np.sqrt(max(float(self.kf.x[2, 0]), 1e-6))
+    std = np.sqrt(self.kf.P[0, 0] + self.kf.P[1, 1])
+    speed = np.hypot(self.kf.x[4, 0], self.kf.x[5, 0])
+    return std / size, speed / size
 
-def associate_detections_to_trackers(detections,trackers,iou_threshold = 0.3):
+
+# below this many detection x tracker pairs the dense IoU matrix is cheaper than gating
+GATING_MIN_PAIRS = 250 * 250
+
+
+def iou_pairs(bb_test, bb_gt):
   """
-  Assigns detections to tracked object (both represented as bounding boxes)
+  IOU of row i of bb_test with row i of bb_gt, boxes as [x1,y1,x2,y2]
+  """
+  xx1 = np.maximum(bb_test[:, 0], bb_gt[:, 0])
+  yy1 = np.maximum(bb_test[:, 1], bb_gt[:, 1])
+  xx2 = np.minimum(bb_test[:, 2], bb_gt[:, 2])
+  yy2 = np.minimum(bb_test[:, 3], bb_gt[:, 3])
+  wh = np.maximum(0., xx2 - xx1) * np.maximum(0., yy2 - yy1)
+  return wh / ((bb_test[:, 2] - bb_test[:, 0]) * (bb_test[:, 3] - bb_test[:, 1])
+    + (bb_gt[:, 2] - bb_gt[:, 0]) * (bb_gt[:, 3] - bb_gt[:, 1]) - wh)
+
 
-  Returns 3 lists of matches, unmatched_detections and unmatched_trackers
+def _grid_cells(boxes, origin, cell, n_rows):
   """
-  if(len(trackers)==0):
-    return np.empty((0,2),dtype=int), np.arange(len(detections)), np.empty((0,5),dtype=int)
+  Cell keys covered by each box. Returns (keys, box index) with one entry per covered cell.
+  """
+  lo = np.floor((np.minimum(boxes[:, :2], boxes[:, 2:4]) - origin) / cell).astype(np.int64)
+  hi = np.floor((np.maximum(boxes[:, :2], boxes[:, 2:4]) - origin) / cell).astype(np.int64)
+  span = hi - lo + 1
+  counts = span[:, 0] * span[:, 1]  # 1 to 4 for typical boxes, more for oversized ones
+  box = np.repeat(np.arange(len(boxes)), counts)
+  k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+  cx = lo[box, 0] + k // span[box, 1]
+  cy = lo[box, 1] + k % span[box, 1]
+  return cx * n_rows + cy, box
+
+
+def candidate_pairs(detections, trackers):
+  """
+  (det, trk) pairs that share a grid cell. Every pair of overlapping boxes is
+  among them, so pairs left out have IOU 0.
+  """
+  boxes = np.concatenate([detections[:, :4], trackers[:, :4]])
+  low, high = np.minimum(boxes[:, :2], boxes[:, 2:4]), np.maximum(boxes[:, :2], boxes[:, 2:4])
+  # typical box size: most boxes touch at most 2x2 cells, a few huge ones do not blow up the grid
+  cell = max(float(np.median((high - low).max(1))), 1.0)
+  origin = low.min(0)
+  n_rows = int(np.floor((high[:, 1].max() - origin[1]) / cell)) + 1
+
+  det_keys, det_idx = _grid_cells(detections, origin, cell, n_rows)
+  trk_keys, trk_idx = _grid_cells(trackers, origin, cell, n_rows)
+  order = np.argsort(trk_keys, kind="stable")
+  trk_keys, trk_idx = trk_keys[order], trk_idx[order]
+
+  start = np.searchsorted(trk_keys, det_keys, side="left")
+  counts = np.searchsorted(trk_keys, det_keys, side="right") - start
+  total = counts.sum()
+  if total == 0:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+  # positions start[i] .. start[i] + counts[i] - 1 for every detection entry
+  offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+  d = np.repeat(det_idx, counts)
+  t = trk_idx[np.repeat(start, counts) + offsets]
+
+  pair = np.unique(d * len(trackers) + t)  # a pair can share several cells
+  return pair // len(trackers), pair % len(trackers)
+
+
+def _assign(iou_matrix, iou_threshold):
+  """
+  SORT's rule: take the pairs above threshold when they are already one-to-one,
+  else solve the assignment. Returns (row, col) of assigned pairs.
+  """
+  a = (iou_matrix > iou_threshold).astype(np.int32)
+  if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+    return np.where(a)
+  matched_indices = linear_assignment(-iou_matrix).reshape(-1, 2).astype(int)
+  return matched_indices[:, 0], matched_indices[:, 1]
+
 
+def _assign_dense(detections, trackers, iou_threshold):
+  """
+  Original SORT path: full IOU matrix. Returns (d, t, iou) of assigned pairs.
+  """
   iou_matrix = iou_batch(detections, trackers)
+  d, t = _assign(iou_matrix, iou_threshold)
+  return d, t, iou_matrix[d, t]
 
-  if min(iou_matrix.shape) > 0:
-    a = (iou_matrix > iou_threshold).astype(np.int32)
-    if a.sum(1).max() == 1 and a.sum(0).max() == 1:
-        matched_indices = np.stack(np.where(a), axis=1)
-    else:
-      matched_indices = linear_assignment(-iou_matrix)
-  else:
-    matched_indices = np.empty(shape=(0,2))
 
-  unmatched_detections = []
-  for d, det in enumerate(detections):
-    if(d not in matched_indices[:,0]):
-      unmatched_detections.append(d)
-  unmatched_trackers = []
-  for t, trk in enumerate(trackers):
-    if(t not in matched_indices[:,1]):
-      unmatched_trackers.append(t)
+def _group_positions(labels, counts):
+  """
+  Boxes sorted by group, each group's first slot, and each box's index inside its group.
+  """
+  order = np.argsort(labels, kind="stable")
+  start = np.cumsum(counts) - counts
+  local = np.empty(len(labels), dtype=np.int64)
+  local[order] = np.arange(len(labels)) - start[labels[order]]
+  return order, start, local
+
 
-  #filter out matched with low IOU
-  matches = []
-  for m in matched_indices:
-    if(iou_matrix[m[0], m[1]]<iou_threshold):
-      unmatched_detections.append(m[0])
-      unmatched_trackers.append(m[1])
-    else:
-      matches.append(m.reshape(1,2))
-  if(len(matches)==0):
-    matches = np.empty((0,2),dtype=int)
+def _assign_gated(detections, trackers, iou_threshold):
+  """
+  Scores only candidate pairs from a grid, then solves each connected group of
+  overlapping boxes on its own. The assignment optimum is the same as on the
+  dense matrix, pairs with IOU 0 add nothing to it. Returns (d, t, iou) of assigned pairs.
+  """
+  from scipy.sparse import coo_matrix
+  from scipy.sparse.csgraph import connected_components
+
+  d, t = candidate_pairs(detections, trackers)
+  iou = iou_pairs(detections[d], trackers[t])
+  overlap = iou > 0
+  d, t, iou = d[overlap], t[overlap], iou[overlap]
+  if len(d) == 0:
+    return d, t, iou
+
+  n_det = len(detections)
+  n_nodes = n_det + len(trackers)
+  graph = coo_matrix((np.ones(len(d)), (d, n_det + t)), shape=(n_nodes, n_nodes))
+  _, labels = connected_components(graph, directed=False)
+
+  comp = labels[d]
+  n_comp = labels.max() + 1
+  dets_per_comp = np.bincount(labels[:n_det], minlength=n_comp)
+  trks_per_comp = np.bincount(labels[n_det:], minlength=n_comp)
+
+  # groups with a single detection or a single tracker (most of them): the best pair wins
+  star = (dets_per_comp[comp] == 1) | (trks_per_comp[comp] == 1)
+  edges = np.flatnonzero(star)
+  edges = edges[np.lexsort((-iou[edges], comp[edges]))]
+  first = np.ones(len(edges), dtype=bool)
+  first[1:] = comp[edges[1:]] != comp[edges[:-1]]
+  best = edges[first]
+  out_d, out_t, out_iou = [d[best]], [t[best]], [iou[best]]
+
+  rest = np.flatnonzero(~star)
+  if len(rest):
+    # position of every box inside its group, so each group's matrix is filled by indexing
+    det_order, det_start, det_local = _group_positions(labels[:n_det], dets_per_comp)
+    trk_order, trk_start, trk_local = _group_positions(labels[n_det:], trks_per_comp)
+
+    rest = rest[np.argsort(comp[rest], kind="stable")]
+    bounds = np.flatnonzero(np.diff(comp[rest])) + 1
+    for group in np.split(rest, bounds):
+      c = comp[group[0]]
+      sub = np.zeros((dets_per_comp[c], trks_per_comp[c]))
+      sub[det_local[d[group]], trk_local[t[group]]] = iou[group]
+      r, k = _assign(sub, iou_threshold)
+      out_d.append(det_order[det_start[c] + r])
+      out_t.append(trk_order[trk_start[c] + k])
+      out_iou.append(sub[r, k])
+
+  return np.concatenate(out_d), np.concatenate(out_t), np.concatenate(out_iou)
+
+
+def associate_detections_to_trackers(detections,trackers,iou_threshold = 0.3):
+  """
+  Assigns detections to tracked object (both represented as bounding boxes)
+
+  Crowded frames (GATING_MIN_PAIRS or more pairs) only score pairs that share
+  a grid cell and solve each group of overlapping boxes separately.
+
+  Returns 3 arrays of matches, unmatched_detections and unmatched_trackers
+  """
+  n_det, n_trk = len(detections), len(trackers)
+  if n_det == 0 or n_trk == 0:
+    return np.empty((0,2),dtype=int), np.arange(n_det), np.arange(n_trk)
+
+  if n_det * n_trk < GATING_MIN_PAIRS:
+    d, t, iou = _assign_dense(detections, trackers, iou_threshold)
   else:
-    matches = np.concatenate(matches,axis=0)
+    d, t, iou = _assign_gated(detections, trackers, iou_threshold)
+
+  #filter out matched with low IOU
+  keep = iou >= iou_threshold
+  d, t = d[keep], t[keep]
+  order = np.argsort(d)
+  matches = np.stack([d[order], t[order]], axis=1).astype(int)
 
-  return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+  det_matched = np.zeros(n_det, dtype=bool)
+  det_matched[d] = True
+  trk_matched = np.zeros(n_trk, dtype=bool)
+  trk_matched[t] = True
+  return matches, np.flatnonzero(~det_matched), np.flatnonzero(~trk_matched)
 
 
 class Sort(object):
@@ -207,6 +368,9 @@ class Sort(object):
     self.trackers = []
     self.frame_count = 0
 
+  def __len__(self):
+    return len(self.trackers)
+
   def update(self, dets=np.empty((0, 5))):
     """
     Params:
@@ -252,79 +416,27 @@ class Sort(object):
       return np.concatenate(ret)
     return np.empty((0,5))
 
-def parse_args():
-    """Parse input arguments."""
-    parser = argparse.ArgumentParser(description='SORT demo')
-    parser.add_argument('--display', dest='display', help='Display online tracker output (slow) [False]',action='store_true')
-    parser.add_argument("--seq_path", help="Path to detections.", type=str, default='data')
-    parser.add_argument("--phase", help="Subdirectory in seq_path.", type=str, default='train')
-    parser.add_argument("--max_age", 
-                        help="Maximum number of frames to keep alive a track without associated detections.", 
-                        type=int, default=1)
-    parser.add_argument("--min_hits", 
-                        help="Minimum number of associated detections before track is initialised.", 
-                        type=int, default=3)
-    parser.add_argument("--iou_threshold", help="Minimum IOU for match.", type=float, default=0.3)
-    args = parser.parse_args()
-    return args
-
-if __name__ == '__main__':
-  # all train
-  args = parse_args()
-  display = args.display
-  phase = args.phase
-  total_time = 0.0
-  total_frames = 0
-  colours = np.random.rand(32, 3) #used only for display
-  if(display):
-    if not os.path.exists('mot_benchmark'):
-      print('\n\tERROR: mot_benchmark link not found!\n\n    Create a symbolic link to the MOT benchmark\n    (https://motchallenge.net/data/2D_MOT_2015/#download). E.g.:\n\n    $ ln -s /path/to/MOT2015_challenge/2DMOT2015 mot_benchmark\n\n')
-      exit()
-    plt.ion()
-    fig = plt.figure()
-    ax1 = fig.add_subplot(111, aspect='equal')
-
-  if not os.path.exists('output'):
-    os.makedirs('output')
-  pattern = os.path.join(args.seq_path, phase, '*', 'det', 'det.txt')
-  for seq_dets_fn in glob.glob(pattern):
-    mot_tracker = Sort(max_age=args.max_age, 
-                       min_hits=args.min_hits,
-                       iou_threshold=args.iou_threshold) #create instance of the SORT tracker
-    seq_dets = np.loadtxt(seq_dets_fn, delimiter=',')
-    seq = seq_dets_fn[pattern.find('*'):].split(os.path.sep)[0]
-    
-    with open(os.path.join('output', '%s.txt'%(seq)),'w') as out_file:
-      print("Processing %s."%(seq))
-      for frame in range(int(seq_dets[:,0].max())):
-        frame += 1 #detection and frame numbers begin at 1
-        dets = seq_dets[seq_dets[:, 0]==frame, 2:7]
-        dets[:, 2:4] += dets[:, 0:2] #convert to [x1,y1,w,h] to [x1,y1,x2,y2]
-        total_frames += 1
-
-        if(display):
-          fn = os.path.join('mot_benchmark', phase, seq, 'img1', '%06d.jpg'%(frame))
-          im =io.imread(fn)
-          ax1.imshow(im)
-          plt.title(seq + ' Tracked Targets')
-
-        start_time = time.time()
-        trackers = mot_tracker.update(dets)
-        cycle_time = time.time() - start_time
-        total_time += cycle_time
-
-        for d in trackers:
-          print('%d,%d,%.2f,%.2f,%.2f,%.2f,1,-1,-1,-1'%(frame,d[4],d[0],d[1],d[2]-d[0],d[3]-d[1]),file=out_file)
-          if(display):
-            d = d.astype(np.int32)
-            ax1.add_patch(patches.Rectangle((d[0],d[1]),d[2]-d[0],d[3]-d[1],fill=False,lw=3,ec=colours[d[4]%32,:]))
-
-        if(display):
-          fig.canvas.flush_events()
-          plt.draw()
-          ax1.cla()
-
-  print("Total Tracking took: %.3f seconds for %d frames or %.1f FPS" % (total_time, total_frames, total_frames / total_time))
-
-  if(display):
-    print("Note: to get real runtime results run without the option: --display")
\ No newline at end of file
+  def propagate(self):
+    """
+    Moves every track one frame forward without detections (detector skipped on purpose).
+    Returns the predicted boxes of the currently reported tracks, same format as update().
+    """
+    ret = []
+    for trk in reversed(self.trackers):
+      d = trk.propagate()[0]
+      if np.any(np.isnan(d)):
+        continue
+      if (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+        ret.append(np.concatenate((d,[trk.id+1])).reshape(1,-1))
+    if(len(ret)>0):
+      return np.concatenate(ret)
+    return np.empty((0,5))
+
+  def motion_stats(self):
+    """
+    Returns per-track arrays (relative position uncertainty, relative speed).
+    """
+    if len(self.trackers) == 0:
+      return np.zeros(0), np.zeros(0)
+    stats = np.array([trk.get_motion() for trk in self.trackers])
+    return stats[:, 0], stats[:, 1]
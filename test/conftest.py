@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+import pytest
+
+
+def write_video(path, n_frames=60, size=(320, 240), fps=25):
+    """
+    Writes a small synthetic clip with a white box moving left to right.
+    """
+    w, h = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(n_frames):
+        frame = np.zeros((h, w, 3), np.uint8)
+        cv2.rectangle(frame, (10 + i, 50), (60 + i, 150), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+class FakeDetector:
+    """
+    One person at the start position of write_video's box, counts calls.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return [{"bbox": [10, 50, 60, 150], "class": "person", "confidence": 0.9}]
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    return write_video(tmp_path / "clip.mp4")
+
+
+@pytest.fixture
+def detector():
+    return FakeDetector()
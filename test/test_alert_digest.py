@@ -0,0 +1,109 @@
+import numpy as np
+
+from tracker.layer6_alert_digest import CAPTION_LIMIT, AlertAggregator, CooldownStore
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.photos = []
+
+    def send_photo(self, frame, caption, name):
+        self.photos.append((frame, caption, name))
+        return True
+
+
+def frame():
+    return np.zeros((240, 320, 3), np.uint8)
+
+
+def crowd(decisions):
+    tracks = [{"track_id": i, "bbox": [10 * i, 10, 10 * i + 20, 60]} for i in range(len(decisions))]
+    info = [{"track_id": i, "decision": d, "reason": f"reason {i}"} for i, d in enumerate(decisions)]
+    return tracks, info
+
+
+def test_simultaneous_events_become_one_photo():
+    notifier = FakeNotifier()
+    alerts = AlertAggregator(notifier, window=0)
+    tracks, info = crowd(["Alert", "Warning", "Normal", "Alert"])
+
+    assert alerts.add("CAM_01", frame(), tracks, info, timestamp=0.0) == 1
+    assert len(notifier.photos) == 1
+
+    image, caption, name = notifier.photos[0]
+    assert caption.splitlines()[1] == "2 alert(s), 1 warning(s)"
+    assert "Track 2" not in caption
+    assert image[10:60, 30].any()  # track 3 box drawn on the copy
+    assert name == "camCAM_01_digest"
+
+
+def test_digest_window_and_cooldown():
+    notifier = FakeNotifier()
+    alerts = AlertAggregator(notifier, window=5.0, cooldown=60)
+    busy = crowd(["Warning"] * 5)
+
+    for second in range(5):
+        alerts.add("CAM_01", frame(), *busy, timestamp=float(second))
+    assert notifier.photos == []  # window still open
+
+    alerts.add("CAM_01", frame(), *busy, timestamp=5.0)
+    assert len(notifier.photos) == 1
+
+    for second in range(6, 60):  # same tracks, same decision: cooling down
+        alerts.add("CAM_01", frame(), *busy, timestamp=float(second))
+    assert len(notifier.photos) == 1
+
+    escalated = crowd(["Alert"] + ["Warning"] * 4)
+    alerts.add("CAM_01", frame(), *escalated, timestamp=60.0)
+    alerts.flush()
+    assert len(notifier.photos) == 2
+
+
+def test_only_reported_decisions_cool_down():
+    notifier = FakeNotifier()
+    alerts = AlertAggregator(notifier, window=5.0, cooldown=60)
+
+    # both digests only report the Alert; neither Warning may be silenced by it
+    alerts.add("CAM_01", frame(), *crowd(["Alert"]), timestamp=0.0)
+    alerts.add("CAM_01", frame(), *crowd(["Warning"]), timestamp=1.0)
+    alerts.add("CAM_02", frame(), *crowd(["Warning"]), timestamp=0.0)
+    alerts.add("CAM_02", frame(), *crowd(["Alert"]), timestamp=1.0)
+    alerts.flush()
+    assert [p[1].splitlines()[1] for p in notifier.photos] == ["1 alert(s), 0 warning(s)"] * 2
+
+    alerts.add("CAM_01", frame(), *crowd(["Warning"]), timestamp=10.0)
+    alerts.add("CAM_02", frame(), *crowd(["Warning"]), timestamp=10.0)
+    alerts.flush()
+    assert [p[1].splitlines()[1] for p in notifier.photos[2:]] == ["0 alert(s), 1 warning(s)"] * 2
+
+
+def test_cameras_are_digested_separately():
+    notifier = FakeNotifier()
+    alerts = AlertAggregator(notifier, window=0)
+    alerts.add("CAM_01", frame(), *crowd(["Alert"]), timestamp=0.0)
+    alerts.add("CAM_02", frame(), *crowd(["Alert"]), timestamp=0.0)
+    assert [p[1].splitlines()[0] for p in notifier.photos] == ["Camera: CAM_01", "Camera: CAM_02"]
+
+
+def test_caption_fits_telegram_limit():
+    notifier = FakeNotifier()
+    alerts = AlertAggregator(notifier, window=0, max_lines=1000)
+    tracks, info = crowd(["Alert"] * 200)
+    for b in info:
+        b["reason"] = "x" * 50
+    alerts.add("CAM_01", frame(), tracks, info, timestamp=0.0)
+
+    caption = notifier.photos[0][1]
+    assert len(caption) <= CAPTION_LIMIT
+    assert caption.endswith("more")
+
+
+def test_cooldown_store_is_bounded():
+    store = CooldownStore(cooldown=10, max_size=100)
+    for i in range(10000):
+        assert store.allow(("CAM_01", i, "Alert"), now=i * 0.01)
+    assert len(store) <= 100
+
+    assert not store.allow(("CAM_01", 9999, "Alert"), now=100.0)
+    assert store.allow(("CAM_01", 9999, "Alert"), now=110.0)
+    assert len(store) == 1  # everything else expired
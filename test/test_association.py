@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import sort.sort as sort_module
+from sort.sort import associate_detections_to_trackers, candidate_pairs, iou_batch
+
+
+def crowd(n, seed, noise=6.0):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, 50 * np.sqrt(n) + 200, (n, 2))
+    size = rng.uniform(20, 90, (n, 2))
+    trks = np.concatenate([pos, pos + size, np.zeros((n, 1))], axis=1)
+    seen = rng.random(n) > 0.1
+    dets = trks[seen].copy()
+    dets[:, :4] += rng.normal(0, noise, (len(dets), 4))
+    dets[:, 4] = 1.0
+    extra = np.concatenate([rng.uniform(0, 300, (5, 2)), rng.uniform(300, 400, (5, 2)), np.ones((5, 1))], axis=1)
+    return np.concatenate([dets, extra]), trks
+
+
+@pytest.fixture
+def gating(monkeypatch):
+    def set_mode(gated):
+        monkeypatch.setattr(sort_module, "GATING_MIN_PAIRS", 0 if gated else 10 ** 18)
+    return set_mode
+
+
+def test_candidate_pairs_cover_every_overlap():
+    for seed in range(10):
+        dets, trks = crowd(150, seed)
+        d, t = candidate_pairs(dets, trks)
+        candidates = set(zip(d.tolist(), t.tolist()))
+        overlapping = set(zip(*np.nonzero(iou_batch(dets, trks) > 0)))
+        assert overlapping <= candidates
+        assert len(candidates) < 0.2 * len(dets) * len(trks)  # the point of gating
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_gated_matches_dense(gating, seed):
+    dets, trks = crowd(120, seed, noise=12.0)  # noisy enough for contested groups
+    gating(False)
+    dense = associate_detections_to_trackers(dets, trks, 0.3)
+    gating(True)
+    gated = associate_detections_to_trackers(dets, trks, 0.3)
+
+    for a, b in zip(dense, gated):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_bookkeeping(gating):
+    trks = np.array([[0, 0, 10, 10, 0], [100, 100, 110, 110, 0], [200, 200, 210, 210, 0]], float)
+    dets = np.array([[1, 1, 11, 11, 1], [500, 500, 510, 510, 1], [101, 100, 111, 110, 1]], float)
+    for gated in (False, True):
+        gating(gated)
+        matches, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets, trks, 0.3)
+        assert matches.tolist() == [[0, 0], [2, 1]]
+        assert unmatched_dets.tolist() == [1]
+        assert unmatched_trks.tolist() == [2]
+
+    matches, unmatched_dets, unmatched_trks = associate_detections_to_trackers(np.empty((0, 5)), trks)
+    assert matches.shape == (0, 2) and unmatched_trks.tolist() == [0, 1, 2]
+    matches, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets, np.empty((0, 5)))
+    assert unmatched_dets.tolist() == [0, 1, 2] and len(unmatched_trks) == 0
@@ -0,0 +1,124 @@
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+from pipeline.multi_camera import CameraPipeline
+from tracker.layer3_track_batch import TrackBatch
+from tracker.layer4_motion_tracker import MotionFeatures
+from tracker.layer5_attributes import AttributeStage, centers_in_boxes
+from tracker.layer5_behavior import BehaviorDecider
+
+NAMES = {0: "mask", 1: "helmet"}
+FRAME = np.zeros((240, 320, 3), np.uint8)
+
+
+def ppe_at(frame_boxes, class_ids, calls=None):
+    """
+    detect_windows stub: PPE boxes given in frame coordinates, returned per window
+    in window coordinates (only the ones whose center is inside the window).
+    """
+    frame_boxes = np.asarray(frame_boxes, dtype=np.float32).reshape(-1, 4)
+    class_ids = np.asarray(class_ids)
+
+    def detect_windows(frame, windows):
+        if calls is not None:
+            calls.append(list(windows))
+        results = []
+        for x1, y1, x2, y2 in windows:
+            keep = centers_in_boxes(frame_boxes, [[x1, y1, x2, y2]])[:, 0]
+            boxes = frame_boxes[keep] - np.array([x1, y1, x1, y1], dtype=np.float32)
+            results.append(DetectionBatch(boxes, np.full(len(boxes), 0.8), class_ids[keep], NAMES))
+        return results
+    return detect_windows
+
+
+def tracks_of(boxes, ids, predicted=False):
+    return TrackBatch(np.asarray(boxes, dtype=np.float32), np.asarray(ids), predicted)
+
+
+def test_centers_in_boxes_matrix():
+    inside = centers_in_boxes([[0, 0, 10, 10], [50, 50, 70, 70]], [[0, 0, 20, 20], [40, 40, 100, 100]])
+    assert inside.tolist() == [[True, False], [False, True]]
+
+
+def test_ppe_goes_to_the_person_whose_box_holds_its_center():
+    # two overlapping people: the big crop of 1 also shows 2's helmet
+    tracks = tracks_of([[0, 0, 200, 200], [120, 20, 180, 200]], [1, 2])
+    stage = AttributeStage(pad=0)
+
+    tracks = stage.update(FRAME, tracks, ppe_at([[140, 25, 160, 45], [40, 30, 60, 50]], [1, 0]))
+
+    assert tracks.attributes == [{"mask": True, "helmet": False}, {"mask": False, "helmet": True}]
+    assert tracks[0]["attributes"] == {"mask": True, "helmet": False}
+
+
+def test_tracks_are_checked_every_k_updates_in_one_batch():
+    calls = []
+    detect_windows = ppe_at([], [], calls)
+    stage = AttributeStage(every=3, max_crops=2)
+    tracks = tracks_of([[0, 0, 50, 100], [60, 0, 110, 100], [120, 0, 170, 100]], [1, 2, 3])
+
+    for _ in range(6):
+        stage.update(FRAME, tracks, detect_windows)
+
+    # 2 crops per call at most, oldest check first, nobody re-checked before 3 updates
+    assert [len(windows) for windows in calls] == [2, 1, 2, 1]
+    assert stage.crops == 6
+
+
+def test_predicted_tracks_are_not_cropped():
+    calls = []
+    stage = AttributeStage()
+
+    tracks = stage.update(FRAME, tracks_of([[0, 0, 50, 100]], [1], predicted=True), ppe_at([], [], calls))
+
+    assert calls == [] and tracks.attributes == [{}]
+
+
+def test_attributes_are_smoothed_over_checks():
+    stage = AttributeStage(every=1, alpha=0.3, threshold=0.5, pad=0)
+    tracks = tracks_of([[0, 0, 100, 200]], [7])
+    mask = ppe_at([[30, 20, 60, 50]], [0])
+    nothing = ppe_at([], [])
+
+    assert stage.update(FRAME, tracks, mask).attributes == [{"mask": True, "helmet": False}]
+    # one missed check does not flip it (1 -> 0.7), two do (0.7 -> 0.49)
+    assert stage.update(FRAME, tracks, nothing).attributes[0]["mask"] is True
+    assert stage.update(FRAME, tracks, nothing).attributes[0]["mask"] is False
+
+
+def test_state_of_lost_tracks_is_dropped():
+    stage = AttributeStage(max_age=2)
+    stage.update(FRAME, tracks_of([[0, 0, 50, 100]], [1]), ppe_at([], []))
+    for _ in range(3):
+        stage.update(FRAME, tracks_of([[60, 0, 110, 100]], [2]), ppe_at([], []))
+
+    assert list(stage.tracks) == [2]
+
+
+def test_behavior_reads_the_attributes():
+    stage = AttributeStage(pad=0)
+    tracks = stage.update(FRAME, tracks_of([[0, 0, 100, 200]], [1]), ppe_at([[30, 20, 60, 50]], [1]))
+
+    motion = MotionFeatures(0, [1], np.array([1]), np.zeros((1, 1)), np.zeros(1, bool))
+    info = BehaviorDecider().update(tracks, motion, timestamp=0.0)
+
+    assert info[0]["decision"] == "Warning"
+
+
+def test_pipeline_fills_attributes_from_person_crops(video_path):
+    crops = []
+
+    def detect_attributes(frame, windows):
+        crops.extend(windows)
+        return [DetectionBatch([[5, 5, 20, 20]], [0.9], [1], NAMES) for _ in windows]
+
+    cam = {"camera_id": "A", "source": video_path}
+    pipeline = CameraPipeline(cam, lambda frame: [{"bbox": [100, 40, 140, 130], "class": "person", "confidence": 0.9}],
+                              sample_rate=3, detect_attributes=detect_attributes)
+    data = next(pipeline.ingestor.read())
+    tracks, _ = pipeline.process(data)
+    pipeline.ingestor.release()
+
+    assert crops == [(96, 31, 144, 139)]
+    assert tracks.attributes == [{"mask": False, "helmet": True}]
+    assert pipeline.metrics.counters[("A", "attribute_crops")] == 1
@@ -0,0 +1,69 @@
+import threading
+
+from detector.layer2_batch_collector import BatchCollector
+
+
+class EchoDetector:
+    """Returns the frame value back so routing can be checked."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [[{"bbox": [0, 0, 1, 1], "class": "person", "confidence": f}] for f in frames]
+
+
+def test_results_go_back_to_the_submitting_camera():
+    detector = EchoDetector()
+    collector = BatchCollector(detector, max_batch_size=4, max_wait=0.5)
+    collector.start()
+
+    results = {}
+
+    def camera(cam_id):
+        results[cam_id] = [collector.detect(cam_id, cam_id * 100 + i)[0]["confidence"] for i in range(5)]
+
+    threads = [threading.Thread(target=camera, args=(c,)) for c in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    collector.stop()
+
+    for cam_id in range(4):
+        assert results[cam_id] == [cam_id * 100 + i for i in range(5)]
+    assert max(detector.batch_sizes) <= 4
+    assert sum(detector.batch_sizes) == 20
+    assert collector.average_batch_size() > 1
+
+
+def test_deadline_flushes_partial_batch():
+    detector = EchoDetector()
+    collector = BatchCollector(detector, max_batch_size=8, max_wait=0.01)
+    collector.start()
+
+    assert collector.detect("CAM_01", 7)[0]["confidence"] == 7
+    collector.stop()
+
+    assert detector.batch_sizes == [1]
+
+
+def test_frames_with_different_input_sizes_are_not_batched_together():
+    class SizedDetector:
+        def __init__(self):
+            self.calls = []
+
+        def detect_batch(self, frames, imgsz=None):
+            self.calls.append((imgsz, sorted(frames)))
+            return [[{"bbox": [0, 0, 1, 1], "class": "person", "confidence": imgsz or 0}] for _ in frames]
+
+    detector = SizedDetector()
+    collector = BatchCollector(detector, max_batch_size=8, max_wait=0.2)
+    futures = [collector.submit("A", 1), collector.submit("B", 2, imgsz=320), collector.submit("C", 3)]
+    collector.start()
+    confidences = [f.result()[0]["confidence"] for f in futures]
+    collector.stop()
+
+    assert confidences == [0, 320, 0]
+    assert sorted(detector.calls, key=str) == sorted([(None, [1, 3]), (320, [2])], key=str)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from sort.batch_sort import BatchSort
+from sort.sort import KalmanBoxTracker, Sort
+from tracker.layer3_sort_tracker import SortTracker
+
+
+def make_sequence(n_objects=40, n_frames=80, seed=3):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, 1200, (n_objects, 2))
+    vel = rng.normal(0, 3, (n_objects, 2))
+    size = rng.uniform(30, 80, (n_objects, 2))
+
+    frames = []
+    for _ in range(n_frames):
+        pos += vel
+        visible = rng.random(n_objects) > 0.15  # misses and re-appearances
+        dets = np.concatenate([pos, pos + size, rng.random((n_objects, 1))], axis=1)[visible]
+        dets[:, :4] += rng.normal(0, 1.5, (len(dets), 4))
+        frames.append(dets)
+    frames.insert(10, np.empty((0, 5)))
+    return frames
+
+
+def run(tracker_cls, frames):
+    KalmanBoxTracker.count = 0
+    tracker = tracker_cls(max_age=5, min_hits=3, iou_threshold=0.3)
+    return [tracker.update(dets) for dets in frames]
+
+
+def test_batch_backend_matches_filterpy_sort():
+    frames = make_sequence()
+    expected = run(Sort, frames)
+    actual = run(BatchSort, frames)
+
+    assert sum(len(e) for e in expected) > 0
+    for e, a in zip(expected, actual):
+        assert e.shape == a.shape
+        np.testing.assert_allclose(a, e, rtol=1e-7, atol=1e-6)
+
+
+def test_sort_tracker_backend_option():
+    tracker = SortTracker(backend="batch")
+    assert isinstance(tracker.tracker, BatchSort)
+
+    with pytest.raises(ValueError):
+        SortTracker(backend="gpu")
@@ -0,0 +1,91 @@
+import numpy as np
+
+from tracker.layer4_motion_tracker import MotionAnalyzer, MotionFeatures
+from tracker.layer5_behavior import BehaviorDecider, TrackWindow
+
+
+def features(track_ids, motion, frame_id=0, predicted=None):
+    track_ids = np.array(track_ids)
+    predicted = np.zeros(len(track_ids), bool) if predicted is None else np.array(predicted)
+    return MotionFeatures(frame_id, [1], track_ids, np.array(motion, float).reshape(-1, 1), predicted)
+
+
+def tracks(track_ids):
+    return [{"track_id": i, "bbox": [0, 0, 10, 10]} for i in track_ids]
+
+
+def test_window_max_and_mean_match_brute_force():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 100, 500).astype(float)
+    window = TrackWindow(0.0, 10)
+
+    for i, v in enumerate(values):
+        window.push(v)
+        recent = values[max(0, i - 9):i + 1]
+        assert window.max() == recent.max()
+        assert np.isclose(window.mean(), recent.mean())
+    assert len(window.maxima) <= 10
+
+
+def test_motion_rules_unchanged():
+    behavior = BehaviorDecider(motion_threshold=60, loitering_frames=3)
+    decide = lambda m: behavior.update(tracks([1]), features([1], [m]), timestamp=0.0)[0]["decision"]
+
+    assert decide(5) == "Normal"
+    assert decide(80) == "Alert"
+    assert decide(5) == "Alert"    # 80 still in the window
+    assert decide(30) == "Alert"
+    assert decide(5) == "Warning"  # 80 left the window, 30 > threshold / 3
+    assert decide(5) == "Warning"
+    assert decide(5) == "Normal"
+
+
+def test_predicted_motion_is_down_weighted():
+    behavior = BehaviorDecider(motion_threshold=60, predicted_weight=0.5)
+    info = behavior.update(tracks([1]), features([1], [100], predicted=[True]), timestamp=0.0)
+    assert info[0]["decision"] == "Warning"
+
+
+def test_motion_dicts_from_update_are_accepted():
+    analyzers = [MotionAnalyzer(frame_gaps=[1, 5], extra_features=True) for _ in range(2)]
+    deciders = [BehaviorDecider(motion_threshold=60) for _ in range(2)]
+    for f, x in enumerate([0, 10, 100, 110]):
+        frame_tracks = [{"track_id": 1, "bbox": [x, 0, x + 40, 100]}, {"track_id": 2, "bbox": [0, 0, 40, 100]}]
+        from_dicts = deciders[0].update(frame_tracks, analyzers[0].update(frame_tracks, f), timestamp=f)
+        from_batch = deciders[1].update(frame_tracks, analyzers[1].update_batch(frame_tracks, f), timestamp=f)
+        assert from_dicts == from_batch
+
+    assert [b["decision"] for b in from_dicts] == ["Alert", "Normal"]
+
+
+def test_dwell_thresholds_in_seconds():
+    behavior = BehaviorDecider(warning_time=100, alert_time=200)
+    decisions = {}
+    for second in range(0, 301, 10):
+        info = behavior.update(tracks([1]), features([1], [0]), timestamp=1000.0 + second)[0]
+        decisions[second] = info["decision"]
+
+    assert decisions[90] == "Normal"
+    assert decisions[100] == "Warning"
+    assert decisions[190] == "Warning"
+    assert decisions[200] == "Alert"
+    assert info["dwell"] == 300
+    assert info["reason"] == "Loitering for 300s"
+
+
+def test_dead_tracks_are_evicted():
+    behavior = BehaviorDecider(max_age=5)
+    for f in range(5000):
+        ids = [f // 10 * 3 + i for i in range(3)]  # a new crowd every 10 frames
+        behavior.update(tracks(ids), features(ids, [1, 2, 3], f), timestamp=f / 25)
+
+    assert len(behavior) <= 3 * 2
+
+
+def test_motion_is_rescaled_to_the_reference_frame_rate():
+    behavior = BehaviorDecider(motion_threshold=60, loitering_frames=1, reference_fps=10)
+
+    # 80 px between samples at 5 fps is the speed of 40 px at 10 fps
+    assert behavior.update(tracks([1]), features([1], [80]), 0.0, frame_rate=5)[0]["decision"] == "Warning"
+    assert behavior.update(tracks([1]), features([1], [80]), 0.1, frame_rate=10)[0]["decision"] == "Alert"
+    assert behavior.update(tracks([1]), features([1], [80]), 0.2)[0]["decision"] == "Alert"
@@ -0,0 +1,47 @@
+import numpy as np
+
+from benchmarks.bench_tracking import identity_metrics, run_scenario
+from benchmarks.synthetic_crowd import CrowdFrame, generate_crowd
+
+
+def frame(boxes):
+    boxes = np.array(boxes, dtype=float)
+    ids = np.arange(len(boxes))
+    dets = np.concatenate([boxes, np.ones((len(boxes), 1))], axis=1)
+    return CrowdFrame(ids, boxes, dets, ids)
+
+
+def test_generator_is_deterministic_and_controllable():
+    a = generate_crowd(n_objects=50, n_frames=30, occlusion=0.2, false_positives=2, seed=4)
+    b = generate_crowd(n_objects=50, n_frames=30, occlusion=0.2, false_positives=2, seed=4)
+
+    assert all(np.array_equal(x.dets, y.dets) for x, y in zip(a, b))
+    # occlusion hides some people, false positives carry id -1
+    assert np.mean([len(f.det_ids[f.det_ids >= 0]) / len(f.gt_ids) for f in a]) < 0.95
+    assert any((f.det_ids == -1).any() for f in a)
+
+
+def test_identity_switch_and_fragmentation_counts():
+    box = [0, 0, 10, 20]
+    frames = [frame([box])] * 4
+    track_log = [
+        [{"track_id": 1, "bbox": box}],
+        [],                               # lost for a frame -> fragmentation
+        [{"track_id": 1, "bbox": box}],
+        [{"track_id": 2, "bbox": box}],   # new id -> switch
+    ]
+
+    metrics = identity_metrics(frames, track_log)
+
+    assert metrics["id_switches"] == 1
+    assert metrics["fragmentations"] == 1
+    assert metrics["recall"] == 0.75
+    assert metrics["unique_tracks"] == 2
+
+
+def test_scenario_reports_every_stage():
+    result = run_scenario("batch-n20", "batch", n_objects=20, n_frames=30, seed=1)
+
+    for key in ("sort_us", "motion_us", "behavior_us", "mem_peak_kb", "mem_retained_kb", "id_switches"):
+        assert key in result
+    assert result["recall"] > 0.5
@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+from tracker.layer6_clip_recorder import ClipRecorder, FrameRing
+
+
+FRAME_BYTES = 240 * 320 * 3
+
+
+def frame(i, size=(240, 320)):
+    frame = np.zeros(size + (3,), np.uint8)
+    frame[50:150, (5 * i) % 280:(5 * i) % 280 + 40] = 255
+    return frame
+
+
+def feed(recorder, start, stop, fps=10, camera_id="CAM_01"):
+    for i in range(start, stop):
+        recorder.add(camera_id, frame(i), timestamp=i / fps)
+
+
+def test_ring_respects_byte_budget_and_pre_roll():
+    ring = FrameRing(max_bytes=1000, max_seconds=2.0)
+    for i in range(100):
+        ring.append(i * 0.1, b"x" * 300)
+        assert ring.nbytes <= 1000
+    assert len(ring.frames) == 3
+
+    ring = FrameRing(max_bytes=10 ** 6, max_seconds=2.0)
+    for i in range(100):
+        ring.append(i * 0.1, b"x" * 300)
+    assert ring.frames[-1][0] - ring.frames[0][0] <= 2.0
+
+
+def test_alert_writes_clip_with_pre_and_post_roll(tmp_path):
+    clips = []
+    recorder = ClipRecorder(str(tmp_path), pre_roll=2.0, post_roll=1.0, queue_bytes=100 * FRAME_BYTES,
+                            on_clip=lambda cam, path: clips.append((cam, path))).start()
+    feed(recorder, 0, 50)                       # 5 s of video, ring keeps 2 s
+    assert recorder.trigger("CAM_01", timestamp=4.9)
+    feed(recorder, 50, 80)                      # 1 s post-roll, then more
+    recorder.stop()
+
+    assert len(clips) == 1
+    cam, path = clips[0]
+    cap = cv2.VideoCapture(path)
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    ok, first = cap.read()
+    cap.release()
+
+    assert cam == "CAM_01" and ok
+    assert first.shape == (240, 320, 3)
+    assert 29 <= n_frames <= 32                 # 2 s before + 1 s after, at 10 FPS
+    assert abs(fps - 10) < 0.5
+
+
+def test_repeated_triggers_extend_one_clip(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), pre_roll=1.0, post_roll=1.0, max_length=3.0, cooldown=5.0,
+                            queue_bytes=100 * FRAME_BYTES).start()
+    feed(recorder, 0, 10)
+    assert recorder.trigger("CAM_01", timestamp=0.9)
+    for i in range(10, 60):
+        recorder.trigger("CAM_01", timestamp=i / 10)  # alert on every frame
+        recorder.add("CAM_01", frame(i), timestamp=i / 10)
+    recorder.stop()
+
+    assert len(recorder.clips) == 1  # capped at max_length, then cooling down
+    cap = cv2.VideoCapture(recorder.clips[0])
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) <= 10 + 31
+    cap.release()
+
+
+def test_clip_memory_is_bounded(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), pre_roll=1000, post_roll=1000, max_bytes=50_000, max_width=None)
+    noise = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)  # compresses badly
+    jpeg = recorder._encode(noise)
+    recorder.trigger("CAM_01", timestamp=0.0)
+    for i in range(200):
+        recorder._store("CAM_01", i / 10, jpeg)
+        assert recorder.rings["CAM_01"].nbytes <= 50_000
+        clip = recorder.pending.get("CAM_01")
+        assert clip is None or clip.nbytes <= 50_000
+
+
+def test_add_only_queues_the_frame(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), queue_bytes=2 * FRAME_BYTES)
+    for i in range(5):
+        recorder.add("CAM_01", frame(i), timestamp=i / 10)
+    recorder.add("CAM_02", frame(0), timestamp=0.0)  # own budget, not starved by CAM_01
+
+    assert recorder.rings == {}  # nothing encoded on the caller
+    assert recorder.queued == {"CAM_01": 2 * FRAME_BYTES, "CAM_02": FRAME_BYTES}
+    assert recorder.dropped_frames == 3
+
+    recorder.start()
+    recorder.stop()
+    assert len(recorder.rings["CAM_01"].frames) == 2
+    assert recorder.queued == {"CAM_01": 0, "CAM_02": 0}
+
+
+def test_a_frame_larger_than_the_budget_still_fits_alone(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), queue_bytes=FRAME_BYTES // 2)
+    recorder.add("CAM_01", frame(0), timestamp=0.0)
+    recorder.add("CAM_01", frame(1), timestamp=0.1)
+
+    assert recorder.queued["CAM_01"] == FRAME_BYTES
+    assert recorder.dropped_frames == 1
@@ -0,0 +1,61 @@
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+from tracker.layer3_sort_tracker import SortTracker
+from tracker.layer3_track_batch import TrackBatch
+
+NAMES = {0: "person", 1: "bicycle", 2: "car"}
+
+
+def batch():
+    boxes = [[10.7, 20.2, 50.9, 120.5], [200, 40, 260, 90], [300, 50, 340, 150]]
+    return DetectionBatch(boxes, [0.9, 0.8, 0.7], [0, 2, 0], NAMES)
+
+
+def test_dict_view_matches_old_api():
+    detections = batch()
+    assert len(detections) == 3
+    assert detections[0] == {"bbox": [10, 20, 50, 120], "class": "person", "confidence": np.float32(0.9)}
+    assert [d["class"] for d in detections] == ["person", "car", "person"]
+
+
+def test_class_filter_and_sort_input():
+    persons = batch().of_class("person")
+    assert len(persons) == 2
+    np.testing.assert_allclose(persons.to_sort()[:, 4], [0.9, 0.7], rtol=1e-6)
+    assert persons.to_sort().shape == (2, 5)
+    assert len(DetectionBatch.empty(NAMES).of_class("person").to_sort()) == 0
+
+
+def test_from_dicts_round_trip():
+    dicts = batch().to_dicts()
+    again = DetectionBatch.from_dicts(dicts)
+    assert again.to_dicts() == dicts
+    assert DetectionBatch.coerce(again) is again
+
+
+def test_tracker_takes_batches_and_dicts_alike():
+    a, b = SortTracker(), SortTracker()
+    for f in range(5):
+        shifted = DetectionBatch(batch().boxes + [f, 0, f, 0], batch().scores, batch().class_ids, NAMES)
+        from_batch = a.update(shifted)
+        from_dicts = b.update(shifted.to_dicts())
+
+    assert isinstance(from_batch, TrackBatch)
+    assert len(from_batch) == 2  # the car is not tracked
+    assert from_batch[0].keys() == {"track_id", "bbox", "class", "predicted"}
+    np.testing.assert_allclose(from_batch.boxes, from_dicts.boxes, atol=1)
+
+
+def test_track_batch_views():
+    tracks = TrackBatch([[0, 0, 10, 20], [5, 5, 15, 45]], [3, 4], predicted=True)
+    assert tracks.to_dicts() == [
+        {"track_id": 3, "bbox": [0, 0, 10, 20], "class": "person", "predicted": True},
+        {"track_id": 4, "bbox": [5, 5, 15, 45], "class": "person", "predicted": True},
+    ]
+    np.testing.assert_array_equal(tracks.centers(), [[5, 10], [10, 25]])
+
+    with_attributes = TrackBatch.from_dicts([{"track_id": 1, "bbox": [0, 0, 1, 1], "attributes": {"mask": True}},
+                                             {"track_id": 2, "bbox": [0, 0, 1, 1]}])
+    assert with_attributes[0]["attributes"] == {"mask": True}
+    assert with_attributes[1]["attributes"] == {}
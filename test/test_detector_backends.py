@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from detector.layer2_backends import ExportedBackend, export_path, load_backend
+
+
+class FakeExported(ExportedBackend):
+    """Returns a fixed raw YOLOv8 output instead of running a graph."""
+
+    def __init__(self, raw):
+        super().__init__(imgsz=640)
+        self.names = {0: "person", 1: "bicycle"}
+        self.raw = raw
+
+    def _run(self, blob):
+        assert blob.shape[1:] == (3, 640, 640)
+        return np.repeat(self.raw[None], len(blob), axis=0)
+
+
+def raw_output(rows):
+    """rows: (cx, cy, w, h, score_person, score_bicycle) in letterboxed pixels"""
+    return np.array(rows, dtype=np.float32).T
+
+
+def test_boxes_map_back_to_frame_coordinates():
+    # 1280x720 -> scale 0.5, 640x360 image padded by 140 px top and bottom
+    raw = raw_output([(320, 320, 100, 50, 0.9, 0.0)])
+    boxes, scores, class_ids = FakeExported(raw).predict([np.zeros((720, 1280, 3), np.uint8)])[0]
+
+    np.testing.assert_allclose(boxes, [[540, 310, 740, 410]])
+    np.testing.assert_allclose(scores, [0.9])
+    assert class_ids.tolist() == [0]
+
+
+def test_nms_is_per_class_and_respects_confidence():
+    raw = raw_output([
+        (100, 100, 50, 50, 0.9, 0.0),
+        (102, 100, 50, 50, 0.8, 0.0),   # overlaps the first person -> suppressed
+        (102, 100, 50, 50, 0.0, 0.7),   # same place but another class -> kept
+        (400, 400, 50, 50, 0.1, 0.0),   # below conf
+    ])
+    frame = np.zeros((640, 640, 3), np.uint8)
+    boxes, scores, class_ids = FakeExported(raw).predict([frame, frame])[1]
+
+    order = np.argsort(class_ids)
+    assert class_ids[order].tolist() == [0, 1]
+    np.testing.assert_allclose(scores[order], [0.9, 0.7], rtol=1e-6)
+
+
+def test_class_filter_runs_before_nms():
+    raw = raw_output([
+        (100, 100, 50, 50, 0.0, 0.9),   # bicycle, would suppress nothing of another class anyway
+        (300, 300, 50, 50, 0.6, 0.0),
+        (302, 300, 50, 50, 0.5, 0.0),   # overlaps -> suppressed
+    ])
+    backend = FakeExported(raw)
+    backend.conf, backend.iou = 0.3, 0.5
+    boxes, scores, class_ids = backend.predict([np.zeros((640, 640, 3), np.uint8)], classes=[0])[0]
+
+    assert class_ids.tolist() == [0]
+    np.testing.assert_allclose(scores, [0.6], rtol=1e-6)
+
+    backend.conf = 0.7  # configurable threshold
+    assert len(backend.predict([np.zeros((640, 640, 3), np.uint8)], classes=[0])[0][0]) == 0
+
+
+def test_export_path_is_per_variant():
+    assert export_path("models/yolov8n.pt", "onnx", 640, "int8") == "models/yolov8n_onnx_640_int8.onnx"
+    assert export_path("models/yolov8n.pt", "openvino", 320, "fp16") == "models/yolov8n_openvino_320_fp16"
+
+
+def test_unknown_backend_or_precision():
+    with pytest.raises(ValueError):
+        load_backend("tensorrt", "yolov8n.pt")
+    with pytest.raises(ValueError):
+        load_backend("onnx", "yolov8n.pt", precision="int4")
@@ -0,0 +1,26 @@
+from ingest.layer1_frame_ingest import FrameIngestor
+
+
+def read_ids(ingestor):
+    ids = [d["frame_id"] for d in ingestor.read()]
+    ingestor.release()
+    return ids
+
+
+def test_grab_sampling_matches_full_decode(video_path):
+    decoded = read_ids(FrameIngestor("CAM", video_path, sample_rate=3, grab_skipped=False))
+    grabbed = read_ids(FrameIngestor("CAM", video_path, sample_rate=3, grab_skipped=True))
+
+    assert decoded == grabbed == list(range(3, 61, 3))
+
+
+def test_time_based_sampling_follows_media_clock(video_path):
+    # 60 frames at 25 fps = 2.4 s of video, 5 frames per second -> 12 frames
+    ingestor = FrameIngestor("CAM", video_path, sample_fps=5)
+    frames = list(ingestor.read())
+    ingestor.release()
+
+    assert len(frames) == 12
+    assert all(f["frame"] is not None for f in frames)
+    gaps = {b["frame_id"] - a["frame_id"] for a, b in zip(frames, frames[1:])}
+    assert gaps == {5}
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from sort.sort import KalmanBoxTracker
+from tracker.layer3_sort_tracker import SortTracker
+
+
+def person(x, y=100, w=40, h=100):
+    return {"bbox": [x, y, x + w, y + h], "class": "person", "confidence": 0.9}
+
+
+def run(tracker, n_frames, speed=2):
+    """Two people walking right; detector only runs when the tracker asks."""
+    log = []
+    for f in range(n_frames):
+        truth = [person(100 + speed * f), person(400 + speed * f)]
+        if tracker.needs_detection():
+            tracks = tracker.update(truth)
+        else:
+            tracks = tracker.predict()
+        log.append((truth, tracks))
+    return log
+
+
+@pytest.mark.parametrize("backend", ["filterpy", "batch"])
+def test_predicted_boxes_follow_the_people(backend):
+    tracker = SortTracker(backend=backend, detect_interval=4, max_displacement=1.0)
+    log = run(tracker, 40)
+
+    predicted = [(truth, tracks) for truth, tracks in log if tracks and tracks[0]["predicted"]]
+    assert len(predicted) > 10
+
+    for truth, tracks in predicted:
+        assert len(tracks) == 2
+        xs = sorted(t["bbox"][0] for t in tracks)
+        expected = sorted(d["bbox"][0] for d in truth)
+        assert np.allclose(xs, expected, atol=3)
+
+    # ids survive the skipped frames
+    ids = {t["track_id"] for _, tracks in log[10:] for t in tracks}
+    assert len(ids) == 2
+
+
+def test_interval_adapts_to_speed_and_crowd():
+    slow = SortTracker(detect_interval=8)
+    run(slow, 20, speed=1)
+    fast = SortTracker(detect_interval=8)
+    run(fast, 20, speed=12)
+    assert fast.interval < slow.interval
+
+    crowd = SortTracker(detect_interval=8, crowd_tracks=2)
+    for f in range(10):
+        crowd.update([person(60 * i, w=30) for i in range(8)])
+    assert crowd.interval == 2
+
+
+def test_default_detects_every_frame():
+    KalmanBoxTracker.count = 0
+    tracker = SortTracker()
+    log = run(tracker, 10)
+    assert all(not t["predicted"] for _, tracks in log for t in tracks)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from pipeline.load_control import LoadController
+from pipeline.multi_camera import CameraPipeline
+
+
+def feed(controller, latency, n, start=0.0, fps=10.0):
+    """
+    n frames at a steady latency and frame rate; returns the changes made.
+    """
+    changes = []
+    for i in range(n):
+        change = controller.observe(latency, start + i / fps)
+        if change is not None:
+            changes.append(change)
+    return changes
+
+
+def test_sheds_cadence_then_resolution_then_sampling_within_bounds():
+    controller = LoadController(budget=0.1, detect_intervals=(1, 2), imgsz_steps=(640, 320),
+                                sample_factors=(1, 2), cooldown=0.0, min_samples=3)
+
+    changes = feed(controller, 0.5, 30)
+
+    assert changes == [("detect_interval", 1, 2), ("imgsz", 640, 320), ("sample_factor", 1, 2)]
+    assert (controller.detect_interval, controller.imgsz, controller.sample_factor) == (2, 320, 2)
+
+
+def test_restores_in_reverse_order_below_headroom():
+    controller = LoadController(budget=0.1, detect_intervals=(1, 2), imgsz_steps=(640, 320),
+                                sample_factors=(1, 2), alpha=1.0, cooldown=0.0, min_samples=3)
+    feed(controller, 0.5, 30)
+
+    assert feed(controller, 0.07, 30, start=10) == []  # inside [headroom * budget, budget]: hold
+    changes = feed(controller, 0.01, 30, start=20)
+
+    assert changes == [("sample_factor", 2, 1), ("imgsz", 320, 640), ("detect_interval", 2, 1)]
+
+
+def test_cooldown_spaces_decisions():
+    controller = LoadController(budget=0.1, cooldown=2.0, min_samples=1)
+
+    changes = feed(controller, 0.5, 40, fps=10.0)  # 4 seconds
+
+    assert len(changes) == 2
+    assert [t for t, *_ in controller.history] == [0.0, 2.0]
+
+
+def test_effective_fps_and_baseline():
+    controller = LoadController(budget=1.0, min_samples=5)
+    feed(controller, 0.01, 20, fps=8.0)
+
+    assert abs(controller.effective_fps - 8.0) < 1e-6
+    assert abs(controller.baseline_fps - 8.0) < 1e-6
+    assert controller.gauges()["effective_fps"] == controller.effective_fps
+
+
+def test_pipeline_applies_decisions_to_tracker_detector_and_ingestor(video_path):
+    sizes = []
+
+    def slow_detect(frame, imgsz=None):
+        sizes.append(imgsz)
+        time.sleep(0.02)
+        return [{"bbox": [10, 50, 60, 150], "class": "person", "confidence": 0.9}]
+
+    pipeline = CameraPipeline(
+        {"camera_id": "A", "source": video_path}, slow_detect, sample_rate=1,
+        load_control={"budget": 0.001, "detect_intervals": (1, 2), "imgsz_steps": (640, 320),
+                      "sample_factors": (1, 2), "cooldown": 0.0, "min_samples": 2}
+    )
+    pipeline.run(threading.Event())
+
+    assert pipeline.tracker.detect_interval == 2
+    assert sizes[0] == 640 and sizes[-1] == 320
+    assert pipeline.ingestor.sample_rate == 2
+    assert pipeline.metrics.counters[("A", "load_changes")] == 3
+    assert pipeline.metrics.gauges[("A", "imgsz")] == 320
+    assert pipeline.behavior.reference_fps is not None
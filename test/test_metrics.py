@@ -0,0 +1,57 @@
+import json
+import urllib.request
+
+from pipeline.metrics import Metrics, MetricsServer
+from pipeline.multi_camera import MultiCameraRunner
+
+
+def test_snapshot_percentiles_and_counters():
+    metrics = Metrics(window=100)
+    for ms in range(1, 101):
+        metrics.observe("CAM_01", "detect", ms / 1000)
+    metrics.inc("CAM_01", "frames_in", 3)
+    metrics.set_gauge("CAM_01", "active_tracks", 7)
+
+    cam = metrics.snapshot()["CAM_01"]
+
+    assert cam["stages"]["detect"]["count"] == 100
+    assert abs(cam["stages"]["detect"]["p50_ms"] - 50.5) < 1e-6
+    assert abs(cam["stages"]["detect"]["p99_ms"] - 99.01) < 1e-6
+    assert cam["counters"]["frames_in"] == 3
+    assert cam["gauges"]["active_tracks"] == 7
+
+
+def test_window_is_bounded():
+    metrics = Metrics(window=10)
+    for _ in range(1000):
+        with metrics.timer("CAM_01", "sort"):
+            pass
+    assert metrics.snapshot()["CAM_01"]["stages"]["sort"]["count"] == 10
+
+
+def test_http_endpoint_serves_prometheus_and_json():
+    metrics = Metrics()
+    metrics.observe("CAM_01", "detect", 0.02)
+    metrics.inc("CAM_01", "frames_in")
+    server = MetricsServer(metrics, port=0).start()
+    base = f"http://127.0.0.1:{server.port}"
+    try:
+        text = urllib.request.urlopen(base + "/metrics").read().decode()
+        data = json.loads(urllib.request.urlopen(base + "/metrics.json").read())
+    finally:
+        server.stop()
+
+    assert 'cctv_stage_latency_seconds{camera="CAM_01",stage="detect",quantile="0.95"} 0.020000' in text
+    assert 'cctv_frames_in_total{camera="CAM_01"} 1' in text
+    assert data["CAM_01"]["counters"]["frames_in"] == 1
+
+
+def test_runner_records_every_stage(video_path, detector):
+    runner = MultiCameraRunner([{"camera_id": "CAM", "source": video_path}], detector, report_interval=0)
+    runner.start()
+    runner.join(timeout=30)
+
+    cam = runner.metrics.snapshot()["CAM"]
+    assert {"ingest", "detect", "sort", "motion", "behavior", "total"} <= set(cam["stages"])
+    assert cam["counters"]["frames_in"] == 20
+    assert cam["counters"]["detections"] == 20
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ingest.layer1_motion_gate import MotionGate
+
+
+def frame_with_box(x=None):
+    frame = np.full((480, 640, 3), 40, np.uint8)
+    if x is not None:
+        frame[100:300, x:x + 100] = 255
+    return frame
+
+
+def test_static_scene_is_skipped_until_forced():
+    gate = MotionGate(max_interval=5.0)
+    decisions = [gate.check(frame_with_box(), timestamp=t)[0] for t in range(12)]
+
+    # first frame is due, then forced again at t=5 and t=10
+    assert decisions == [True, False, False, False, False, True, False, False, False, False, True, False]
+    assert gate.skip_ratio == 9 / 12
+
+
+def test_change_runs_detection_and_reports_region():
+    gate = MotionGate(max_interval=100)
+    gate.check(frame_with_box(), timestamp=0)
+    gate.check(frame_with_box(), timestamp=1)
+
+    run, regions = gate.check(frame_with_box(x=300), timestamp=2)
+
+    assert run
+    assert len(regions) == 1
+    x1, y1, x2, y2 = regions[0]
+    assert x1 <= 300 and x2 >= 400 and y1 <= 100 and y2 >= 300
+
+
+def test_active_tracks_keep_detection_running():
+    gate = MotionGate(max_interval=100)
+    gate.check(frame_with_box(), timestamp=0)
+
+    assert gate.check(frame_with_box(), active_tracks=2, timestamp=1)[0]
+    assert not gate.check(frame_with_box(), active_tracks=0, timestamp=2)[0]
@@ -0,0 +1,128 @@
+import gc
+import os
+import tracemalloc
+
+import numpy as np
+
+from tracker.layer4_motion_tracker import MotionAnalyzer
+
+
+def track(track_id, x, y=100):
+    return {"track_id": track_id, "bbox": [x, y, x + 40, y + 100]}
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def churn(motion, start, n_frames, crowd=20, lifetime=15):
+    """Every track lives `lifetime` frames, then a new id takes its place."""
+    for f in range(start, start + n_frames):
+        tracks = [track(f // lifetime * crowd + i, 10 * i + f % lifetime) for i in range(crowd)]
+        motion.update(tracks, f)
+
+
+def test_motion_matches_gaps():
+    motion = MotionAnalyzer(frame_gaps=[1, 5])
+    for f in range(10):
+        info = motion.update([track(1, 3 * f)], f)[0]
+
+    assert info["motion_gaps"] == {1: 3.0, 5: 15.0}
+    assert len(motion.history_of(1)) == 6  # max(frame_gaps) + 1
+    np.testing.assert_array_equal(motion.history_of(1)[:, 0], np.arange(4, 10))
+
+
+def test_track_history_keeps_the_old_dict_layout():
+    motion = MotionAnalyzer(frame_gaps=[1])
+    motion.update([track(1, 0)], 0)
+    motion.update([track(1, 10)], 1)
+
+    assert motion.track_history[1] == [(0, 20, 150), (1, 30, 150)]
+
+
+def test_new_track_starts_without_motion():
+    motion = MotionAnalyzer(frame_gaps=[1])
+    motion.update([track(1, 0)], 0)
+    info = motion.update([track(1, 50), track(2, 500)], 1)
+
+    assert info[0]["motion_gaps"][1] == 50.0
+    assert info[1]["motion_gaps"][1] == 0.0
+
+
+def test_batch_matches_per_track_loop():
+    rng = np.random.default_rng(0)
+    gaps = [1, 5, 10, 15, 20]
+    motion = MotionAnalyzer(frame_gaps=gaps)
+    centers = {}  # reference: plain per-track lists
+
+    for f in range(60):
+        ids = [i for i in range(12) if rng.random() > 0.2]
+        tracks = [track(i, int(rng.integers(0, 600)), int(rng.integers(0, 400))) for i in ids]
+        features = motion.update_batch(tracks, f)
+
+        expected = []
+        for t in tracks:
+            x1, y1, x2, y2 = t["bbox"]
+            history = centers.setdefault(t["track_id"], [])
+            history.append((int((x1 + x2) / 2), int((y1 + y2) / 2)))
+            cx, cy = history[-1]
+            expected.append([
+                np.hypot(cx - history[-1 - g][0], cy - history[-1 - g][1]) if len(history) > g else 0.0
+                for g in gaps
+            ])
+        np.testing.assert_allclose(features.gaps, np.array(expected).reshape(-1, len(gaps)))
+
+
+def test_extra_features():
+    motion = MotionAnalyzer(frame_gaps=[1, 5], extra_features=True)
+    for f in range(6):
+        # accelerating to the right while the box shrinks to half its height
+        x, h = 2 * f * f, 100 - 10 * f
+        features = motion.update_batch([{"track_id": 1, "bbox": [x, 200 - h, x + 40, 200]}], f)
+
+    np.testing.assert_allclose(features.velocity, [[2 * 5 * 5 - 2 * 4 * 4, 5]])  # feet stay put, center drops
+    np.testing.assert_allclose(features.acceleration, [[4, 0]])
+    np.testing.assert_allclose(features.height_change, [0.5 - 1])
+    assert features.to_dicts()[0]["height_change"] == -0.5
+
+
+def test_no_tracks():
+    features = MotionAnalyzer(extra_features=True).update_batch([], 0)
+    assert len(features) == 0
+    assert features.gaps.shape == (0, 5)
+    assert features.max_motion().shape == (0,)
+
+
+def test_dropped_tracks_are_evicted_and_slots_reused():
+    motion = MotionAnalyzer(max_age=3, capacity=5)
+    for f in range(3):
+        motion.update([track(i, f) for i in range(4)], f)
+    assert len(motion) == 4
+
+    for f in range(3, 8):
+        motion.update([track(10, f)], f)
+    assert len(motion) == 1
+    assert motion.history_of(0).shape == (0, 4)
+
+    motion.update([track(10, 8)] + [track(20 + i, 8) for i in range(4)], 8)
+    assert len(motion) == 5
+    assert len(motion.count) == 5  # freed slots were reused, no growth
+
+
+def test_memory_stays_flat_with_short_lived_ids():
+    motion = MotionAnalyzer()
+    churn(motion, 0, 500)  # reach steady state
+    gc.collect()
+
+    tracemalloc.start()
+    rss_before = rss_bytes()
+    base = tracemalloc.get_traced_memory()[0]
+    churn(motion, 500, 5000)  # ~6700 more ids
+    gc.collect()
+    grown = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    assert len(motion) <= 20 * 4  # live ids plus those inside the max_age window
+    assert grown < 64 * 1024
+    assert rss_bytes() - rss_before < 8 * 1024 * 1024
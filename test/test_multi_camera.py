@@ -0,0 +1,29 @@
+from pipeline.multi_camera import MultiCameraRunner
+
+
+def test_runner_processes_every_camera_with_one_detector(video_path, detector):
+    cameras = [{"camera_id": f"CAM_{i}", "source": video_path} for i in range(3)]
+    seen = {}
+
+    def on_result(pipeline, data, tracks, behavior_info):
+        seen.setdefault(pipeline.camera_id, []).append(data["frame_id"])
+
+    runner = MultiCameraRunner(cameras, detector, on_result=on_result, report_interval=0, sample_rate=3)
+    runner.start()
+    runner.join(timeout=30)
+
+    assert sorted(seen) == ["CAM_0", "CAM_1", "CAM_2"]
+    assert all(len(ids) == 20 for ids in seen.values())
+    assert detector.calls == 60
+    # each camera keeps its own tracker state
+    assert len({id(p.tracker) for p in runner.pipelines}) == 3
+
+
+def test_runner_skips_camera_that_cannot_open(video_path, detector):
+    cameras = [
+        {"camera_id": "GOOD", "source": video_path},
+        {"camera_id": "BAD", "source": "missing.mp4"},
+    ]
+    runner = MultiCameraRunner(cameras, detector, report_interval=0)
+
+    assert [p.camera_id for p in runner.pipelines] == ["GOOD"]
@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+from pipeline.multiprocess import MultiProcessRunner, SharedFrameRing
+
+
+class FakeDetector:
+    """
+    Built inside the detector process, so it has to live at module level.
+    """
+    names = {0: "person"}
+
+    def detect_batch(self, frames, imgsz=None):
+        return [DetectionBatch(np.array([[10, 50, 60, 150]]), np.array([0.9]), np.array([0]), self.names)
+                for _ in frames]
+
+
+def test_ring_round_trip_and_overwrite():
+    ring = SharedFrameRing((4, 6, 3), slots=2)
+    reader = SharedFrameRing.attach(ring.name, (4, 6, 3), 2)
+    try:
+        frames = [np.full((4, 6, 3), i, np.uint8) for i in range(3)]
+        refs = [ring.write(f) for f in frames]
+
+        assert refs == [(0, 0), (1, 1), (0, 2)]
+        assert reader.read(*refs[0]) is None  # slot 0 now holds seq 2
+        np.testing.assert_array_equal(reader.read(*refs[2]), frames[2])
+        np.testing.assert_array_equal(reader.view(1), frames[1])
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_runner_tracks_every_camera_through_shared_memory(video_path):
+    cameras = [{"camera_id": f"CAM_{i}", "source": video_path} for i in range(2)]
+    seen = {}
+
+    def on_result(camera, data, tracks, behavior_info):
+        seen.setdefault(camera.camera_id, []).append((data["frame_id"], data["frame"], tracks))
+
+    runner = MultiProcessRunner(cameras, FakeDetector, on_result=on_result, report_interval=0, sample_rate=3)
+    runner.start()
+    runner.join(timeout=120)
+
+    assert sorted(seen) == ["CAM_0", "CAM_1"]
+    for results in seen.values():
+        assert [frame_id for frame_id, _, _ in results] == list(range(3, 61, 3))
+        assert all(frame is not None and frame.shape == (240, 320, 3) for _, frame, _ in results)
+        assert [t["track_id"] for t in results[-1][2]] == [results[-1][2][0]["track_id"]]
+
+
+def test_crashing_camera_is_restarted_without_stopping_the_others(video_path):
+    cameras = [
+        {"camera_id": "GOOD", "source": video_path},
+        {"camera_id": "BAD", "source": "missing.mp4"},
+    ]
+    seen = []
+    runner = MultiProcessRunner(cameras, FakeDetector, on_result=lambda c, *_: seen.append(c.camera_id),
+                                report_interval=0, restart_backoff=0.1)
+    runner.start()
+
+    good, bad = runner.pipelines
+    deadline = time.monotonic() + 120
+    while not (good.child.finished and bad.child.restarts) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    runner.stop()
+    runner.join(timeout=30)
+
+    assert good.child.finished
+    assert seen.count("GOOD") == 20
+    assert bad.child.restarts >= 1
+    assert runner.metrics.counters[("BAD", "restarts")] >= 1
+
+
+def test_load_controller_decisions_reach_the_parent_metrics(video_path):
+    cameras = [{"camera_id": "CAM", "source": video_path}]
+    # an impossible budget: every check sheds one more step
+    load_control = {"budget": 1e-9, "min_samples": 2, "cooldown": 0, "imgsz_steps": ()}
+    runner = MultiProcessRunner(cameras, FakeDetector, report_interval=0, sample_rate=1, load_control=load_control)
+    runner.start()
+    runner.join(timeout=120)
+
+    snapshot = runner.metrics.snapshot()["CAM"]
+    assert snapshot["counters"]["load_changes"] >= 2
+    assert snapshot["gauges"]["detect_interval"] > 1
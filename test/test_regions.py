@@ -0,0 +1,137 @@
+import numpy as np
+
+from detector.layer2_batch_collector import BatchCollector
+from detector.layer2_detection_batch import DetectionBatch
+from detector.layer2_regions import RegionTiler, crop_windows
+from pipeline.multi_camera import CameraPipeline
+
+
+def boxes_per_window(local_boxes):
+    """
+    detect_windows stub: the same window-local boxes for every window.
+    """
+    def detect_windows(frame, windows):
+        return [DetectionBatch(local_boxes, np.full(len(local_boxes), 0.9), np.zeros(len(local_boxes)), {0: "person"})
+                for _ in windows]
+    return detect_windows
+
+
+def test_tiles_cover_the_region_and_stay_inside_it():
+    tiler = RegionTiler(tile_size=100, overlap=0.25, full_view=False)
+    windows, mask = tiler.plan((240, 320, 3))
+
+    covered = np.zeros((240, 320), dtype=bool)
+    for x1, y1, x2, y2 in windows:
+        assert 0 <= x1 < x2 <= 320 and 0 <= y1 < y2 <= 240
+        assert x2 - x1 == 100 and y2 - y1 == 100
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+    assert mask is None
+    assert tiler.plan((240, 320, 3))[0] is windows  # cached per resolution
+
+
+def test_full_view_is_added_to_the_tiles():
+    windows, _ = RegionTiler(roi=[[0, 0, 300, 100]], tile_size=200).plan((240, 320, 3))
+    assert windows == [(0, 0, 200, 100), (100, 0, 300, 100), (0, 0, 300, 100)]
+
+
+def test_boxes_are_mapped_back_to_frame_coordinates():
+    tiler = RegionTiler(roi=[[50, 20, 150, 120], [200, 100, 300, 200]])
+    frame = np.zeros((240, 320, 3), np.uint8)
+
+    detections = tiler.detect(frame, boxes_per_window([[10, 10, 30, 60]]))
+
+    np.testing.assert_array_equal(detections.boxes, [[60, 30, 80, 80], [210, 110, 230, 160]])
+
+
+def test_person_cut_by_a_tile_seam_is_merged_into_one_box():
+    tiler = RegionTiler(tile_size=100, overlap=0.2, full_view=False)
+    frame = np.zeros((100, 180, 3), np.uint8)
+    windows, _ = tiler.plan(frame.shape)
+    assert windows == [(0, 0, 100, 100), (80, 0, 180, 100)]
+
+    def detect_windows(frame, windows):
+        # person at x 70..110: left tile sees all of it, right tile only the part from 80
+        left = DetectionBatch([[70, 10, 100, 90]], [0.8], [0], {0: "person"})
+        right = DetectionBatch([[0, 12, 30, 90]], [0.7], [0], {0: "person"})
+        return [left, right]
+
+    detections = tiler.detect(frame, detect_windows)
+
+    assert len(detections) == 1
+    np.testing.assert_array_equal(detections.boxes, [[70, 10, 110, 90]])
+    assert detections.scores[0] == np.float32(0.8)
+
+
+def test_people_side_by_side_in_one_window_are_not_merged():
+    tiler = RegionTiler(tile_size=100, overlap=0.2, full_view=False)
+    frame = np.zeros((100, 180, 3), np.uint8)
+
+    detections = tiler.detect(frame, boxes_per_window([[10, 10, 40, 90], [20, 10, 50, 90]]))
+
+    assert len(detections) == 4
+
+
+def test_polygon_roi_drops_boxes_centered_outside_it():
+    triangle = [[0, 0], [200, 0], [0, 200]]
+    tiler = RegionTiler(roi=[triangle])
+    frame = np.zeros((240, 320, 3), np.uint8)
+    windows, mask = tiler.plan(frame.shape)
+    assert windows == [(0, 0, 200, 200)]
+
+    detections = tiler.detect(frame, boxes_per_window([[10, 10, 40, 40], [150, 150, 190, 190]]))
+
+    np.testing.assert_array_equal(detections.boxes, [[10, 10, 40, 40]])
+
+
+def test_roi_outside_the_frame_runs_no_detection():
+    calls = []
+    tiler = RegionTiler(roi=[[400, 400, 500, 500]])
+
+    detections = tiler.detect(np.zeros((240, 320, 3), np.uint8), lambda f, w: calls.append(w))
+
+    assert len(detections) == 0 and calls == []
+
+
+def test_from_camera_only_for_configured_cameras():
+    assert RegionTiler.from_camera({"camera_id": "A", "source": 0}) is None
+    tiler = RegionTiler.from_camera({"camera_id": "A", "source": 0, "tiles": True})
+    assert tiler.tile_size == 640 and tiler.whole_frame
+
+
+def test_collector_batches_the_crops_of_one_frame():
+    class ShapeDetector:
+        def __init__(self):
+            self.batch_sizes = []
+
+        def detect_batch(self, frames):
+            self.batch_sizes.append(len(frames))
+            return [frame.shape for frame in frames]
+
+    detector = ShapeDetector()
+    collector = BatchCollector(detector, max_batch_size=8, max_wait=0.05)
+    collector.start()
+    frame = np.zeros((240, 320, 3), np.uint8)
+    shapes = collector.detect_many("A", crop_windows(frame, [(0, 0, 100, 50), (10, 10, 30, 40)]))
+    collector.stop()
+
+    assert shapes == [(50, 100, 3), (30, 20, 3)]
+    assert detector.batch_sizes == [2]
+
+
+def test_pipeline_detects_on_crops_and_tracks_in_frame_coordinates(video_path):
+    crops = []
+
+    def detect(crop):
+        crops.append(crop.shape)
+        return [{"bbox": [0, 0, 40, 90], "class": "person", "confidence": 0.9}]
+
+    cam = {"camera_id": "A", "source": video_path, "roi": [[100, 40, 300, 200]]}
+    pipeline = CameraPipeline(cam, detect, sample_rate=3)
+    data = next(pipeline.ingestor.read())
+    tracks, _ = pipeline.process(data)
+    pipeline.ingestor.release()
+
+    assert crops == [(160, 200, 3)]
+    assert pipeline.tracker.active_tracks() == 1
+    assert tracks.boxes.tolist() == [[100, 40, 140, 130]]
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+
+import pipeline.render as render
+from pipeline.render import PreviewRenderer
+
+
+def result(n=3):
+    frame = np.zeros((240, 320, 3), np.uint8)
+    tracks = [{"track_id": i, "bbox": [20 + 60 * i, 40, 60 + 60 * i, 140]} for i in range(n)]
+    info = [{"track_id": i, "decision": "Alert"} for i in range(n)]
+    return frame, tracks, info
+
+
+def fake_gui(monkeypatch):
+    shown = []
+    monkeypatch.setattr(render.cv2, "imshow", lambda name, image: shown.append((name, image)))
+    monkeypatch.setattr(render.cv2, "waitKey", lambda delay: -1)
+    monkeypatch.setattr(render.cv2, "destroyAllWindows", lambda: None)
+    return shown
+
+
+def test_render_draws_on_a_copy():
+    frame, tracks, info = result()
+    image = PreviewRenderer().render("CAM_01", frame, tracks, info)
+    assert image[40:140, 20].any()
+    assert not frame.any()
+
+
+def test_preview_is_capped_and_never_blocks_publishers(monkeypatch):
+    shown = fake_gui(monkeypatch)
+    preview = PreviewRenderer(max_fps=10).start()
+
+    start = time.perf_counter()
+    publishes = 0
+    while time.perf_counter() - start < 0.5:
+        preview.publish("CAM_01", *result())
+        publishes += 1
+    preview.stop()
+
+    assert publishes > 100
+    assert 1 <= len(shown) <= 7  # ~10 FPS, stale results skipped
+    assert shown[0][0] == "CCTV AI - CAM_01"
+
+
+def test_esc_closes_preview(monkeypatch):
+    fake_gui(monkeypatch)
+    monkeypatch.setattr(render.cv2, "waitKey", lambda delay: 27)
+    preview = PreviewRenderer(max_fps=50).start()
+    preview._thread.join(1.0)
+    assert preview.closed
@@ -0,0 +1,31 @@
+import importlib.util
+import os
+
+import pytest
+
+from benchmarks.bench_startup import (
+    FIRST_DETECTION_BUDGET,
+    FIRST_FRAME_AFTER_WARMUP_BUDGET,
+    IMPORT_BUDGET,
+    measure_first_detection,
+    measure_imports,
+)
+
+# weights are not downloaded by the test; point CCTV_BUDGET_MODEL at a local file
+MODEL = os.environ.get("CCTV_BUDGET_MODEL", "yolov8n.pt")
+
+
+def test_pipeline_import_is_light_and_fast():
+    result = measure_imports()
+
+    assert result["heavy"] == []
+    assert result["import_s"] < IMPORT_BUDGET
+
+
+@pytest.mark.skipif(importlib.util.find_spec("ultralytics") is None, reason="ultralytics not installed")
+@pytest.mark.skipif(not (MODEL.endswith(".yaml") or os.path.exists(MODEL)), reason=f"{MODEL} not available")
+def test_startup_to_first_detection_budget():
+    result = measure_first_detection(MODEL)
+
+    assert result["first_frame_s"] < FIRST_FRAME_AFTER_WARMUP_BUDGET
+    assert result["process_s"] < FIRST_DETECTION_BUDGET
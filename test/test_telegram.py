@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from tracker.layer6_telegram import TelegramNotifier
+
+
+class FakeTelegram:
+    """Local stand-in for the Bot API: replies from a script, records requests."""
+
+    def __init__(self, replies=(), delay=0.0):
+        self.replies = list(replies)  # (status, json body), then 200 ok
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so session reuse is visible
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                fake.requests.append((self.path, body))
+                fake.connections.add(self.client_address)
+                time.sleep(fake.delay)
+                status, reply = fake.replies.pop(0) if fake.replies else (200, {"ok": True})
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def frame():
+    frame = np.zeros((480, 640, 3), np.uint8)
+    frame[100:300, 200:300] = 255
+    return frame
+
+
+def notifier(server, tmp_path, **kwargs):
+    kwargs.setdefault("min_interval", 0.0)
+    kwargs.setdefault("backoff", 0.01)
+    return TelegramNotifier("TOKEN", "42", snapshot_dir=str(tmp_path), api_url=server.url, **kwargs).start()
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_sends_photo_and_snapshot(tmp_path, frame):
+    server = FakeTelegram()
+    telegram = notifier(server, tmp_path)
+    try:
+        assert telegram.send_alert(frame, 7, "CAM_01", "Alert", "High motion")
+        assert wait_for(lambda: telegram.sent == 1)
+    finally:
+        telegram.stop()
+        server.close()
+
+    path, body = server.requests[0]
+    assert path == "/botTOKEN/sendPhoto"
+    assert b"\xff\xd8" in body  # JPEG bytes, encoded in memory
+    assert b"Track ID: 7" in body
+
+    snapshots = list(tmp_path.glob("*.jpg"))
+    assert len(snapshots) == 1
+    assert snapshots[0].read_bytes()[:2] == b"\xff\xd8"
+
+
+def test_send_alert_does_not_block(tmp_path, frame):
+    server = FakeTelegram(delay=0.5)
+    telegram = notifier(server, tmp_path, save_snapshots=False)
+    try:
+        start = time.perf_counter()
+        for track_id in range(3):
+            telegram.send_alert(frame, track_id, "CAM_01", "Alert", "x")
+        assert time.perf_counter() - start < 0.2
+        assert wait_for(lambda: telegram.sent == 3)
+    finally:
+        telegram.stop()
+        server.close()
+
+    assert len(server.connections) == 1  # one pooled connection for all alerts
+
+
+def test_full_queue_drops_new_alerts(tmp_path, frame):
+    server = FakeTelegram(delay=0.3)
+    telegram = notifier(server, tmp_path, save_snapshots=False, queue_size=2)
+    try:
+        results = [telegram.send_alert(frame, i, "CAM_01", "Alert", "x") for i in range(10)]
+        assert telegram.dropped == results.count(False) > 0
+    finally:
+        telegram.stop()
+        server.close()
+
+
+def test_retries_server_errors_and_rate_limits(tmp_path, frame):
+    server = FakeTelegram(replies=[
+        (500, {"ok": False}),
+        (429, {"ok": False, "parameters": {"retry_after": 0.2}}),
+    ])
+    telegram = notifier(server, tmp_path, save_snapshots=False)
+    try:
+        start = time.monotonic()
+        telegram.send_alert(frame, 1, "CAM_01", "Alert", "x")
+        assert wait_for(lambda: telegram.sent == 1)
+        assert time.monotonic() - start >= 0.2  # waited retry_after
+    finally:
+        telegram.stop()
+        server.close()
+
+    assert len(server.requests) == 3
+
+
+def test_gives_up_on_client_errors(tmp_path, frame):
+    server = FakeTelegram(replies=[(400, {"ok": False, "description": "chat not found"})])
+    telegram = notifier(server, tmp_path, save_snapshots=False)
+    try:
+        telegram.send_alert(frame, 1, "CAM_01", "Alert", "x")
+        assert wait_for(lambda: telegram.failed == 1)
+    finally:
+        telegram.stop()
+        server.close()
+
+    assert len(server.requests) == 1
+
+
+def test_min_interval_between_sends(tmp_path, frame):
+    server = FakeTelegram()
+    telegram = notifier(server, tmp_path, save_snapshots=False, min_interval=0.2)
+    try:
+        start = time.monotonic()
+        for track_id in range(3):
+            telegram.send_alert(frame, track_id, "CAM_01", "Alert", "x")
+        assert wait_for(lambda: telegram.sent == 3)
+        assert time.monotonic() - start >= 0.4
+    finally:
+        telegram.stop()
+        server.close()
+
+
+def test_stop_is_bounded_by_its_timeout(tmp_path, frame):
+    # every send fails slowly and is retried: draining the full queue would take minutes
+    server = FakeTelegram(replies=[(500, {"ok": False})] * 100, delay=0.2)
+    telegram = notifier(server, tmp_path, save_snapshots=False, queue_size=2, backoff=1.0)
+    try:
+        for track_id in range(3):
+            telegram.send_alert(frame, track_id, "CAM_01", "Alert", "x")
+        assert wait_for(lambda: len(server.requests) >= 1)
+
+        start = time.monotonic()
+        telegram.stop(timeout=0.5)
+        assert time.monotonic() - start < 2.0
+    finally:
+        server.close()
+
+
+def test_send_after_stop_does_not_restart_the_worker(tmp_path, frame):
+    server = FakeTelegram()
+    telegram = notifier(server, tmp_path, save_snapshots=False)
+    telegram.stop()
+    try:
+        assert not telegram.send_alert(frame, 1, "CAM_01", "Alert", "x")
+        assert telegram._thread is None and telegram.dropped == 1
+    finally:
+        server.close()
@@ -0,0 +1,95 @@
+import os
+import time
+
+import numpy as np
+
+from ingest import layer1_frame_ingest as frame_ingest
+from ingest.layer1_frame_ingest import FrameIngestor
+
+
+def test_slow_consumer_gets_latest_frames_and_drops_are_counted(video_path):
+    ingestor = FrameIngestor("CAM", video_path, sample_rate=1, threaded=True, queue_size=1)
+
+    ids = []
+    for data in ingestor.read():
+        ids.append(data["frame_id"])
+        time.sleep(0.02)  # slower than decode
+    ingestor.release()
+
+    assert ids == sorted(ids)
+    assert len(ids) < 60
+    assert len(ids) + ingestor.dropped_frames == 60
+
+
+def test_reconnect_continues_after_end_of_stream(video_path):
+    ingestor = FrameIngestor("CAM", video_path, sample_rate=3, reconnect=True)
+
+    ids = []
+    for data in ingestor.read():
+        ids.append(data["frame_id"])
+        if len(ids) == 30:
+            break
+    ingestor.release()
+
+    assert ingestor.reconnects >= 1
+    assert ids == list(range(3, 91, 3))
+
+
+def test_reconnect_gives_up_after_max_retries(tmp_path, video_path):
+    path = tmp_path / "gone.mp4"
+    os.replace(video_path, path)
+    ingestor = FrameIngestor("CAM", str(path), reconnect=True, max_retries=1)
+    os.remove(path)
+
+    start = time.monotonic()
+    frames = list(ingestor.read())
+    ingestor.release()
+
+    # the already opened file still plays to the end, the reopen then fails
+    assert len(frames) == 20
+    assert ingestor.reconnects == 0
+    assert time.monotonic() - start < 5
+
+
+class OpenThenFailCapture:
+    """
+    Opens fine every time, then yields `frames` frames before failing.
+    """
+    frames = 0
+
+    def __init__(self, source):
+        self.left = self.frames
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        self.left -= 1
+        return self.left >= 0
+
+    def retrieve(self):
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        pass
+
+
+def run_reconnects(monkeypatch, frames):
+    monkeypatch.setattr(frame_ingest.cv2, "VideoCapture", OpenThenFailCapture)
+    monkeypatch.setattr(OpenThenFailCapture, "frames", frames)
+    ingestor = FrameIngestor("CAM", "rtsp://cam", sample_rate=1, reconnect=True, max_backoff=4.0, max_retries=5)
+    waits = []
+    ingestor._stop.wait = lambda timeout: waits.append(timeout) or len(waits) >= 6
+    list(ingestor.read())
+    return waits
+
+
+def test_backoff_grows_while_the_reopened_stream_fails_on_its_first_read(monkeypatch):
+    assert run_reconnects(monkeypatch, frames=0) == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+def test_backoff_resets_after_a_frame_was_read(monkeypatch):
+    assert run_reconnects(monkeypatch, frames=1) == [0.5] * 6
@@ -1,42 +1,103 @@
 import numpy as np
 from sort.sort import Sort  # you can vendor SORT or install a package
+from sort.batch_sort import BatchSort
+from detector.layer2_detection_batch import DetectionBatch
+from tracker.layer3_track_batch import TrackBatch
+
+SORT_BACKENDS = {
+    "filterpy": Sort,     # one KalmanFilter object per track
+    "batch": BatchSort,   # all tracks in stacked numpy arrays, faster in crowds
+}
 
 class SortTracker:
-    def __init__(self):
-        self.tracker = Sort(
+    def __init__(self, backend="filterpy", detect_interval=1, max_displacement=0.3,
+                 crowd_tracks=20, uncertainty_threshold=0.5):
+        """
+        backend: "filterpy" or "batch" (see SORT_BACKENDS)
+        detect_interval: run the detector at most every k frames and report
+                         Kalman-predicted boxes in between (1 = every frame)
+        max_displacement: re-detect before the fastest track can drift this
+                          fraction of its box size on predictions alone
+        crowd_tracks: above this many tracks the interval shrinks proportionally
+        uncertainty_threshold: re-detect when a track's predicted position std
+                               exceeds this fraction of its box size
+        """
+        if backend not in SORT_BACKENDS:
+            raise ValueError(f"Unknown SORT backend: {backend}")
+
+        self.tracker = SORT_BACKENDS[backend](
             max_age=30,
             min_hits=3,
             iou_threshold=0.3
         )
 
+        self.detect_interval = detect_interval
+        self.max_displacement = max_displacement
+        self.crowd_tracks = crowd_tracks
+        self.uncertainty_threshold = uncertainty_threshold
+
+        self.interval = 1  # current adaptive k
+        self.frames_since_detection = 0
+
+    def active_tracks(self):
+        """
+        Number of live SORT tracks, confirmed or not.
+        """
+        return len(self.tracker)
+
     def update(self, detections):
         """
-        detections: list of dicts with bbox + confidence
-        Returns tracked objects with IDs
-        """
-        if len(detections) == 0:
-            dets = np.empty((0, 5))
-        else:
-            dets = np.array([
-                [
-                    d["bbox"][0],
-                    d["bbox"][1],
-                    d["bbox"][2],
-                    d["bbox"][3],
-                    d["confidence"]
-                ]
-                for d in detections if d["class"] == "person"
-            ])
+        detections: DetectionBatch (or list of dicts with bbox + class + confidence)
+        Returns a TrackBatch of tracked persons with IDs
+        """
+        dets = DetectionBatch.coerce(detections).of_class("person").to_sort()
 
         tracks = self.tracker.update(dets)
 
-        results = []
-        for t in tracks:
-            x1, y1, x2, y2, track_id = map(int, t)
-            results.append({
-                "track_id": track_id,
-                "bbox": [x1, y1, x2, y2],
-                "class": "person"
-            })
+        self.frames_since_detection = 0
+        if self.detect_interval > 1:
+            self.interval = self._adapt_interval()
+
+        return self._to_results(tracks, predicted=False)
+
+    def needs_detection(self):
+        """
+        True when this frame should go through the detector, False when
+        predict() is good enough.
+        """
+        if self.detect_interval <= 1 or self.active_tracks() == 0:
+            return True
+        if self.frames_since_detection + 1 >= self.interval:
+            return True
+
+        uncertainty, _ = self.tracker.motion_stats()
+        return bool(uncertainty.max(initial=0.0) > self.uncertainty_threshold)
+
+    def predict(self):
+        """
+        Frame without detections: advance tracks on the Kalman model.
+        Returned tracks are flagged predicted.
+        """
+        self.frames_since_detection += 1
+        return self._to_results(self.tracker.propagate(), predicted=True)
+
+    def _adapt_interval(self):
+        """
+        k shrinks with the fastest track's speed and with the number of tracks.
+        """
+        n = self.active_tracks()
+        if n == 0:
+            return self.detect_interval
+
+        _, speed = self.tracker.motion_stats()
+        fastest = speed.max(initial=0.0)
+
+        k = self.detect_interval
+        if fastest > 0:
+            k = min(k, int(self.max_displacement / fastest))
+        if n > self.crowd_tracks:
+            k = min(k, int(self.detect_interval * self.crowd_tracks / n))
+        return max(1, k)
 
-        return results
+    def _to_results(self, tracks, predicted):
+        return TrackBatch.from_sort(tracks, predicted)
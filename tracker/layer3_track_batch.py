@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class TrackBatch:
+    __slots__ = ("boxes", "track_ids", "predicted", "attributes")
+
+    def __init__(self, boxes, track_ids, predicted=False, attributes=None):
+        """
+        Tracks of one frame as arrays, straight from Sort.update / propagate.
+
+        boxes: (N, 4) int x1, y1, x2, y2
+        track_ids: (N,) SORT ids
+        predicted: (N,) bool or one bool for all, True for Kalman-predicted boxes
+        attributes: optional list of per-track dicts (e.g. mask / helmet)
+
+        Indexing / iterating gives the old dicts
+        ({"track_id", "bbox", "class", "predicted"}), built on demand.
+        """
+        self.boxes = np.asarray(boxes).astype(np.int64).reshape(-1, 4)
+        self.track_ids = np.asarray(track_ids).astype(np.int64).reshape(-1)
+        self.predicted = np.broadcast_to(np.asarray(predicted, dtype=bool), self.track_ids.shape)
+        self.attributes = attributes
+
+    @classmethod
+    def from_sort(cls, tracks, predicted):
+        """
+        tracks: (N, 5) x1, y1, x2, y2, id from SORT
+        """
+        tracks = np.asarray(tracks).reshape(-1, 5)
+        return cls(tracks[:, :4], tracks[:, 4], predicted)
+
+    @classmethod
+    def from_dicts(cls, tracks):
+        attributes = None
+        if any("attributes" in t for t in tracks):
+            attributes = [t.get("attributes") or {} for t in tracks]
+        return cls(
+            [t["bbox"] for t in tracks],
+            [t["track_id"] for t in tracks],
+            [t.get("predicted", False) for t in tracks],
+            attributes
+        )
+
+    @classmethod
+    def coerce(cls, tracks):
+        """
+        TrackBatch as is, a list of dicts converted.
+        """
+        return tracks if isinstance(tracks, cls) else cls.from_dicts(tracks)
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    def __getitem__(self, i):
+        track = {
+            "track_id": int(self.track_ids[i]),
+            "bbox": self.boxes[i].tolist(),
+            "class": "person",
+            "predicted": bool(self.predicted[i])
+        }
+        if self.attributes is not None:
+            track["attributes"] = self.attributes[i]
+        return track
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_dicts(self):
+        return list(self)
+
+    def centers(self):
+        """
+        (N, 2) integer box centers.
+        """
+        return ((self.boxes[:, :2] + self.boxes[:, 2:]) / 2).astype(np.int64)
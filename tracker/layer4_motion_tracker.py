@@ -1,40 +1,223 @@
 import numpy as np
-from collections import defaultdict
 
-class MotionAnalyzer:
-    def __init__(self, frame_gaps=[1,5,10,15,20]):
+from tracker.layer3_track_batch import TrackBatch
+
+FRAME, CX, CY, HEIGHT = range(4)  # fields of a history sample
+
+
+class MotionFeatures:
+    __slots__ = ("frame_id", "frame_gaps", "track_ids", "gaps", "predicted",
+                 "velocity", "acceleration", "height_change")
+
+    def __init__(self, frame_id, frame_gaps, track_ids, gaps, predicted,
+                 velocity=None, acceleration=None, height_change=None):
+        """
+        Motion of all tracks of one frame, row i belongs to track_ids[i].
+        gaps: (N, len(frame_gaps)) center displacement in px, 0 until the track is old enough
+        predicted: (N,) True for Kalman-predicted boxes
+        velocity / acceleration: (N, 2) px per update (extra features, else None)
+        height_change: (N,) relative bbox height change over the stored history
+                       (up to max(frame_gaps) updates), negative when the box shrinks (e.g. a fall)
+        """
+        self.frame_id = frame_id
         self.frame_gaps = frame_gaps
-        self.track_history = defaultdict(list)  # track_id -> list of centers
+        self.track_ids = track_ids
+        self.gaps = gaps
+        self.predicted = predicted
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.height_change = height_change
 
-    def update(self, tracks, frame_id):
+    @classmethod
+    def from_dicts(cls, motion):
         """
-        tracks: list of dicts from SORT
-        frame_id: current frame index
+        motion: one dict per track, as returned by MotionAnalyzer.update()
         """
-        motion_info = []
+        frame_gaps = list(motion[0]["motion_gaps"]) if motion else []
+        gaps = np.array([[m["motion_gaps"][gap] for gap in frame_gaps] for m in motion], dtype=np.float64)
+        features = cls(
+            motion[0]["frame_id"] if motion else None,
+            frame_gaps,
+            np.array([m["track_id"] for m in motion], dtype=np.int64),
+            gaps.reshape(len(motion), len(frame_gaps)),
+            np.array([m.get("predicted", False) for m in motion], dtype=bool)
+        )
+        if motion and "velocity" in motion[0]:
+            features.velocity = np.array([m["velocity"] for m in motion], dtype=np.float64)
+            features.acceleration = np.array([m["acceleration"] for m in motion], dtype=np.float64)
+            features.height_change = np.array([m["height_change"] for m in motion], dtype=np.float64)
+        return features
 
-        for t in tracks:
-            track_id = t["track_id"]
-            bbox = t["bbox"]
-            x1, y1, x2, y2 = bbox
-            cx = int((x1 + x2) / 2)
-            cy = int((y1 + y2) / 2)
+    @classmethod
+    def coerce(cls, motion):
+        """
+        MotionFeatures as is, a list of dicts converted.
+        """
+        return motion if isinstance(motion, cls) else cls.from_dicts(motion)
 
-            self.track_history[track_id].append((frame_id, cx, cy))
+    def __len__(self):
+        return len(self.track_ids)
 
-            motion_gaps = {}
-            for gap in self.frame_gaps:
-                if len(self.track_history[track_id]) > gap:
-                    old_frame_id, old_cx, old_cy = self.track_history[track_id][-gap-1]
-                    distance = np.sqrt((cx - old_cx)**2 + (cy - old_cy)**2)
-                    motion_gaps[gap] = distance
-                else:
-                    motion_gaps[gap] = 0.0
+    def max_motion(self):
+        """
+        Largest displacement over all gaps, per track.
+        """
+        if self.gaps.shape[1] == 0:
+            return np.zeros(len(self))
+        return self.gaps.max(1)
 
-            motion_info.append({
+    def to_dicts(self):
+        """
+        One dict per track (the original update() output).
+        """
+        out = []
+        for i, track_id in enumerate(self.track_ids.tolist()):
+            m = {
                 "track_id": track_id,
-                "frame_id": frame_id,
-                "motion_gaps": motion_gaps
-            })
+                "frame_id": self.frame_id,
+                "motion_gaps": dict(zip(self.frame_gaps, self.gaps[i].tolist())),
+                "predicted": bool(self.predicted[i])
+            }
+            if self.velocity is not None:
+                m["velocity"] = self.velocity[i].tolist()
+                m["acceleration"] = self.acceleration[i].tolist()
+                m["height_change"] = float(self.height_change[i])
+            out.append(m)
+        return out
+
+
+class MotionAnalyzer:
+    def __init__(self, frame_gaps=[1,5,10,15,20], max_age=30, capacity=64, extra_features=False):
+        """
+        frame_gaps: motion is measured between now and N updates ago
+        max_age: updates a track may be missing before its history is dropped
+                 (match SortTracker's max_age)
+        capacity: initial number of track slots, grows when needed
+        extra_features: also compute velocity, acceleration and bbox-height change
+        """
+        self.frame_gaps = list(frame_gaps)
+        self.gap_array = np.array(self.frame_gaps, dtype=np.int64)
+        self.max_age = max_age
+        self.extra_features = extra_features
+        # acceleration needs two samples back
+        self.history_len = max(self.frame_gaps + [2 if extra_features else 0]) + 1
+
+        # one fixed-size ring per track: (frame_id, cx, cy, height)
+        self.history = np.zeros((capacity, self.history_len, 4))
+        self.count = np.zeros(capacity, dtype=np.int64)      # samples written per slot
+        self.last_seen = np.zeros(capacity, dtype=np.int64)  # update index of the last sample
+        self.in_use = np.zeros(capacity, dtype=bool)
+        self.slots = {}  # track_id -> slot
+        self.slot_ids = np.full(capacity, -1, dtype=np.int64)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self):
+        old = len(self.count)
+        new = old * 2
+        self.history = np.concatenate([self.history, np.zeros((old, self.history_len, 4))])
+        self.count = np.concatenate([self.count, np.zeros(old, dtype=np.int64)])
+        self.last_seen = np.concatenate([self.last_seen, np.zeros(old, dtype=np.int64)])
+        self.in_use = np.concatenate([self.in_use, np.zeros(old, dtype=bool)])
+        self.slot_ids = np.concatenate([self.slot_ids, np.full(old, -1, dtype=np.int64)])
+        self.free.extend(range(new - 1, old - 1, -1))
+
+    def _slot(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is None:
+            if not self.free:
+                self._grow()
+            slot = self.free.pop()
+            self.slots[track_id] = slot
+            self.slot_ids[slot] = track_id
+            self.in_use[slot] = True
+            self.count[slot] = 0
+        return slot
 
-        return motion_info
+    def _evict(self):
+        """
+        Frees the rings of tracks SORT has dropped (unseen for more than max_age updates).
+        """
+        stale = np.flatnonzero(self.in_use & (self.updates - self.last_seen > self.max_age))
+        for slot in stale:
+            del self.slots[int(self.slot_ids[slot])]
+            self.slot_ids[slot] = -1
+            self.in_use[slot] = False
+            self.free.append(int(slot))
+
+    def history_of(self, track_id):
+        """
+        Stored samples of a track, oldest first, as an (n, 4) array of (frame_id, cx, cy, height).
+        """
+        slot = self.slots.get(track_id)
+        if slot is None:
+            return np.empty((0, 4))
+        n = min(self.count[slot], self.history_len)
+        idx = (self.count[slot] - n + np.arange(n)) % self.history_len
+        return self.history[slot, idx]
+
+    @property
+    def track_history(self):
+        """
+        Read-only snapshot in the old layout: track_id -> [(frame_id, cx, cy), ...],
+        limited to the stored samples. Prefer history_of(track_id).
+        """
+        return {track_id: [(int(f), int(cx), int(cy)) for f, cx, cy, _ in self.history_of(track_id).tolist()]
+                for track_id in self.slots}
+
+    def update_batch(self, tracks, frame_id):
+        """
+        tracks: TrackBatch from SortTracker (or list of track dicts)
+        frame_id: current frame index
+        Returns MotionFeatures for all tracks, computed in one pass over the rings.
+        """
+        self.updates += 1
+        tracks = TrackBatch.coerce(tracks)
+        track_ids = tracks.track_ids
+        sample = np.empty((len(tracks), 4))
+        sample[:, FRAME] = frame_id
+        sample[:, CX:CY + 1] = tracks.centers()
+        sample[:, HEIGHT] = tracks.boxes[:, 3] - tracks.boxes[:, 1]
+
+        slots = np.array([self._slot(track_id) for track_id in track_ids.tolist()], dtype=np.int64)
+        n = self.count[slots]  # samples before this one
+        self.history[slots, n % self.history_len] = sample
+        self.count[slots] = n + 1
+        self.last_seen[slots] = self.updates
+
+        # (tracks, gaps) lookback into the rings
+        lookback = (n[:, None] - self.gap_array[None, :]) % self.history_len
+        past = self.history[slots[:, None], lookback]
+        displacement = np.hypot(sample[:, None, CX] - past[..., CX], sample[:, None, CY] - past[..., CY])
+        gaps = np.where(n[:, None] >= self.gap_array[None, :], displacement, 0.0)
+
+        features = MotionFeatures(frame_id, self.frame_gaps, track_ids, gaps, np.array(tracks.predicted))
+        if self.extra_features:
+            self._extra_features(features, slots, n, sample)
+
+        self._evict()
+        return features
+
+    def _extra_features(self, features, slots, n, sample):
+        L = self.history_len
+        center = sample[:, CX:CY + 1]
+        prev1 = self.history[slots, (n - 1) % L, CX:CY + 1]
+        prev2 = self.history[slots, (n - 2) % L, CX:CY + 1]
+
+        features.velocity = np.where((n >= 1)[:, None], center - prev1, 0.0)
+        features.acceleration = np.where((n >= 2)[:, None], center - 2 * prev1 + prev2, 0.0)
+
+        back = np.minimum(n, L - 1)  # oldest sample still in the ring
+        old_height = self.history[slots, (n - back) % L, HEIGHT]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = sample[:, HEIGHT] / old_height - 1
+        features.height_change = np.where((back > 0) & (old_height > 0), change, 0.0)
+
+    def update(self, tracks, frame_id):
+        """
+        Same as update_batch, as one dict per track.
+        """
+        return self.update_batch(tracks, frame_id).to_dicts()
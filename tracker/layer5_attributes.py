@@ -0,0 +1,155 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from detector.layer2_detection_batch import DetectionBatch
+from detector.layer2_regions import concat_detections
+from tracker.layer3_track_batch import TrackBatch
+
+
+def centers_in_boxes(items, boxes):
+    """
+    (P, T) bool: center of items[p] lies inside boxes[t] (edges included).
+    items, boxes: (P, 4) / (T, 4) x1, y1, x2, y2
+    """
+    items = np.asarray(items, dtype=np.float64).reshape(-1, 4)
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    cx = ((items[:, 0] + items[:, 2]) / 2)[:, None]
+    cy = ((items[:, 1] + items[:, 3]) / 2)[:, None]
+    return (cx >= boxes[:, 0]) & (cx <= boxes[:, 2]) & (cy >= boxes[:, 1]) & (cy <= boxes[:, 3])
+
+
+class TrackAttributes:
+    __slots__ = ("scores", "last_check", "last_update")
+
+    def __init__(self, n_attributes):
+        self.scores = np.full(n_attributes, np.nan)  # EWMA presence per attribute, NaN until checked
+        self.last_check = None
+        self.last_update = 0
+
+
+class AttributeStage:
+    def __init__(self, attributes=("mask", "helmet"), every=10, max_crops=16, pad=0.1,
+                 alpha=0.3, threshold=0.5, max_age=30):
+        """
+        PPE attributes per track from a secondary model run on person crops only.
+
+        Each update crops the active (detected, not Kalman-predicted) tracks that
+        are due, sends the crops as one batch, assigns every PPE box to the person
+        box its center falls in, and smooths the result per track.
+
+        attributes: attribute names, each also the class name in the PPE model,
+                    or {attribute: class name or list of class names}
+        every: check a track at most every k updates
+        max_crops: crops per update; the least recently checked tracks go first
+        pad: crop margin around the person box, as a fraction of its size
+        alpha: EWMA weight of a new check (the first check sets the value)
+        threshold: smoothed presence above which the attribute is reported True
+        max_age: updates a track may be missing before its state is dropped
+        """
+        if not isinstance(attributes, dict):
+            attributes = {name: name for name in attributes}
+        self.names = list(attributes)
+        self.classes = [[c] if isinstance(c, str) else list(c) for c in attributes.values()]
+        self.every = every
+        self.max_crops = max_crops
+        self.pad = pad
+        self.alpha = alpha
+        self.threshold = threshold
+        self.max_age = max_age
+
+        self.tracks = OrderedDict()  # track_id -> TrackAttributes, least recently seen first
+        self.updates = 0
+        self.crops = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _evict(self):
+        while self.tracks:
+            track_id, state = next(iter(self.tracks.items()))
+            if self.updates - state.last_update <= self.max_age:
+                break
+            del self.tracks[track_id]
+
+    def _windows(self, boxes, shape):
+        """
+        Padded, clipped integer crop windows for person boxes.
+        """
+        h, w = shape[:2]
+        boxes = boxes.astype(np.float64)
+        margin = (boxes[:, 2:] - boxes[:, :2]) * self.pad
+        x1, y1 = (boxes[:, :2] - margin).T
+        x2, y2 = (boxes[:, 2:] + margin).T
+        windows = np.stack([x1.clip(0, w), y1.clip(0, h), x2.clip(0, w), y2.clip(0, h)], 1).astype(int)
+        return [tuple(win) for win in windows.tolist()]
+
+    def _observe(self, detections, offsets, boxes):
+        """
+        (T, A) 0/1 observations for the checked person boxes.
+        Each PPE box goes to the smallest person box containing its center.
+        """
+        observed = np.zeros((len(boxes), len(self.names)))
+        ppe, _ = concat_detections(detections, offsets)
+        if len(ppe) == 0:
+            return observed
+
+        # a crop also shows neighbours: a helmet belongs to whoever's box holds its center
+        inside = centers_in_boxes(ppe.boxes, boxes)
+        area = ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])).astype(np.float64)
+        owner = np.where(inside, area, np.inf).argmin(1)
+        assigned = inside.any(1)
+
+        labels = np.array([ppe.names.get(int(c)) for c in ppe.class_ids], dtype=object)
+        for a, classes in enumerate(self.classes):
+            hit = assigned & np.isin(labels, classes)
+            observed[owner[hit], a] = 1.0
+        return observed
+
+    def update(self, frame, tracks, detect_windows):
+        """
+        frame: the frame tracks belong to
+        tracks: TrackBatch from SortTracker (or list of track dicts)
+        detect_windows: callable(frame, windows) -> PPE detections per
+                        (x1, y1, x2, y2) window, in window coordinates
+        Returns the TrackBatch with attributes filled in ({} for tracks never checked).
+        """
+        tracks = TrackBatch.coerce(tracks)
+        self.updates += 1
+
+        states = []
+        for track_id in tracks.track_ids.tolist():
+            state = self.tracks.get(track_id)
+            if state is None:
+                state = self.tracks[track_id] = TrackAttributes(len(self.names))
+            else:
+                self.tracks.move_to_end(track_id)
+            state.last_update = self.updates
+            states.append(state)
+
+        # due: detected this frame and not checked for `every` updates, oldest check first
+        due = [i for i, state in enumerate(states)
+               if not tracks.predicted[i] and (state.last_check is None or self.updates - state.last_check >= self.every)]
+        due.sort(key=lambda i: -1 if states[i].last_check is None else states[i].last_check)
+        due = due[:self.max_crops]
+
+        if due:
+            boxes = tracks.boxes[due]
+            windows = self._windows(boxes, frame.shape)
+            detections = [DetectionBatch.coerce(d) for d in detect_windows(frame, windows)]
+            observed = self._observe(detections, [win[:2] for win in windows], boxes)
+            self.crops += len(due)
+
+            for row, i in enumerate(due):
+                state = states[i]
+                fresh = np.isnan(state.scores)
+                state.scores = np.where(fresh, observed[row], state.scores + self.alpha * (observed[row] - state.scores))
+                state.last_check = self.updates
+
+        tracks.attributes = [
+            {} if state.last_check is None
+            else {name: bool(score >= self.threshold) for name, score in zip(self.names, state.scores)}
+            for state in states
+        ]
+        self._evict()
+        return tracks
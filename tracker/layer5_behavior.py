@@ -1,34 +1,132 @@
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from tracker.layer3_track_batch import TrackBatch
+from tracker.layer4_motion_tracker import MotionFeatures
+
+
+class TrackWindow:
+    __slots__ = ("first_seen", "last_update", "values", "maxima", "total", "index")
+
+    def __init__(self, timestamp, size):
+        """
+        Sliding window over the last `size` motion samples of one track.
+        max and mean are O(1) amortised: a monotonic deque for the max,
+        a running sum for the mean.
+        """
+        self.first_seen = timestamp
+        self.last_update = 0
+        self.values = deque(maxlen=size)
+        self.maxima = deque()  # (index, value), values decreasing
+        self.total = 0.0
+        self.index = 0
+
+    def push(self, value):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]  # about to fall out
+        self.values.append(value)
+        self.total += value
+
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((self.index, value))
+        if self.maxima[0][0] <= self.index - self.values.maxlen:
+            self.maxima.popleft()
+        self.index += 1
+
+    def max(self):
+        return self.maxima[0][1]
+
+    def mean(self):
+        return self.total / len(self.values)
+
+
 class BehaviorDecider:
-    def __init__(self, motion_threshold=50, loitering_frames=10):
+    def __init__(self, motion_threshold=50, loitering_frames=10, predicted_weight=0.5,
+                 warning_time=None, alert_time=None, max_age=30, reference_fps=None):
         """
         motion_threshold: pixels for alert
-        loitering_frames: min frames of low motion for warning
+        loitering_frames: motion window, in processed frames
+        predicted_weight: weight of motion measured on Kalman-predicted boxes
+                          (detector skipped), which is extrapolated, not observed
+        warning_time: seconds a track may stay in view before a loitering warning (None: off)
+        alert_time: seconds a track may stay in view before an alert (None: off)
+        max_age: updates a track may be missing before its state is dropped
+                 (match SortTracker's max_age)
+        reference_fps: processed frame rate motion_threshold is meant for; update()
+                       calls with another frame_rate rescale motion to it (None: off)
         """
         self.motion_threshold = motion_threshold
         self.loitering_frames = loitering_frames
-        self.track_motion_history = {}  # track_id -> list of motion gaps
+        self.predicted_weight = predicted_weight
+        self.warning_time = warning_time
+        self.alert_time = alert_time
+        self.max_age = max_age
+        self.reference_fps = reference_fps
 
-    def update(self, tracks, motion_info):
+        self.windows = OrderedDict()  # track_id -> TrackWindow, least recently seen first
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.windows)
+
+    def _evict(self):
+        """
+        Drops the state of tracks SORT has dropped (unseen for more than max_age updates).
+        """
+        while self.windows:
+            track_id, window = next(iter(self.windows.items()))
+            if self.updates - window.last_update <= self.max_age:
+                break
+            del self.windows[track_id]
+
+    def update(self, tracks, motion, timestamp=None, frame_rate=None):
+        """
+        tracks: TrackBatch from SortTracker (or list of track dicts)
+        motion: MotionFeatures for the same tracks (MotionAnalyzer.update_batch),
+                or the list of dicts from MotionAnalyzer.update()
+        timestamp: frame time in seconds (defaults to now)
+        frame_rate: current processed frames per second (e.g. LoadController.effective_fps);
+                    fewer frames per second means more pixels per frame gap
+        """
+        now = time.time() if timestamp is None else timestamp
+        self.updates += 1
         decisions = []
 
-        for t, m in zip(tracks, motion_info):
-            track_id = t["track_id"]
-            attributes = t.get("attributes", {"mask": False, "helmet": False})
+        motion = MotionFeatures.coerce(motion)
+        motions = motion.max_motion()
+        motions = np.where(motion.predicted, motions * self.predicted_weight, motions)
+        if frame_rate and self.reference_fps:
+            motions = motions * (frame_rate / self.reference_fps)
+        motions = motions.tolist()
 
-            # Save motion history
-            if track_id not in self.track_motion_history:
-                self.track_motion_history[track_id] = []
-            self.track_motion_history[track_id].append(max(m["motion_gaps"].values()))
+        tracks = TrackBatch.coerce(tracks)
+        all_attributes = tracks.attributes or [{}] * len(tracks)
 
-            max_gap = max(self.track_motion_history[track_id][-self.loitering_frames:])
+        for track_id, attributes, motion_now in zip(tracks.track_ids.tolist(), all_attributes, motions):
+            window = self.windows.get(track_id)
+            if window is None:
+                window = self.windows[track_id] = TrackWindow(now, self.loitering_frames)
+            else:
+                self.windows.move_to_end(track_id)
+            window.last_update = self.updates
+            window.push(motion_now)
 
-            # Rule-based decision
-            decision = "Normal"
-            reason = ""
+            max_gap = window.max()
+            dwell = now - window.first_seen
 
+            # Rule-based decision
             if max_gap > self.motion_threshold:
                 decision = "Alert"
                 reason = "High motion detected (fleeing/falling/erratic)"
+            elif self.alert_time is not None and dwell >= self.alert_time:
+                decision = "Alert"
+                reason = f"Loitering for {dwell:.0f}s"
+            elif self.warning_time is not None and dwell >= self.warning_time:
+                decision = "Warning"
+                reason = f"Loitering for {dwell:.0f}s"
             elif attributes.get("mask") or attributes.get("helmet") or max_gap > self.motion_threshold/3:
                 decision = "Warning"
                 reason = "Mask/helmet detected or loitering"
@@ -38,12 +136,12 @@ class BehaviorDecider:
 
             decisions.append({
                 "track_id": track_id,
-                "frame_id": m["frame_id"],
+                "frame_id": motion.frame_id,
                 "decision": decision,
-                "reason": reason
+                "reason": reason,
+                "dwell": dwell,
+                "motion_mean": window.mean()
             })
-            
-        
 
+        self._evict()
         return decisions
-    
\ No newline at end of file
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+CAPTION_LIMIT = 1024  # Telegram photo caption limit
+COLORS = {"Warning": (0, 165, 255), "Alert": (0, 0, 255)}
+
+
+class CooldownStore:
+    def __init__(self, cooldown=240, max_size=10000):
+        """
+        Last-sent time per key, forgotten after `cooldown` seconds.
+        max_size: hard cap, the oldest keys go first
+        """
+        self.cooldown = cooldown
+        self.max_size = max_size
+        self.sent = OrderedDict()  # key -> timestamp, oldest first
+
+    def __len__(self):
+        return len(self.sent)
+
+    def _expire(self, now):
+        while self.sent:
+            key, sent_at = next(iter(self.sent.items()))
+            if now - sent_at < self.cooldown and len(self.sent) <= self.max_size:
+                break
+            del self.sent[key]
+
+    def allow(self, key, now=None):
+        """
+        True (and starts the cooldown) if key is not cooling down.
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+        if key in self.sent:
+            return False
+        self.sent[key] = now
+        self._expire(now)  # max_size
+        return True
+
+    def release(self, key):
+        """
+        Ends the cooldown of key, e.g. when its event was never sent.
+        """
+        self.sent.pop(key, None)
+
+
+class CameraDigest:
+    __slots__ = ("opened", "frame", "events")
+
+    def __init__(self, opened):
+        self.opened = opened
+        self.frame = None
+        self.events = OrderedDict()  # track_id -> (decision, reason, bbox)
+
+
+class AlertAggregator:
+    def __init__(self, notifier, window=5.0, cooldown=240, max_cooldown_keys=10000, max_lines=15):
+        """
+        Merges the Warning/Alert events of one camera into one annotated photo.
+
+        notifier: TelegramNotifier (anything with send_photo(frame, caption, name))
+        window: seconds events are collected before the digest goes out
+                (0: one message per frame that has events)
+        cooldown: seconds before the same (camera, track, decision) is reported again
+        max_lines: tracks listed in the caption, the rest are counted
+        """
+        self.notifier = notifier
+        self.window = window
+        self.max_lines = max_lines
+        self.cooldowns = CooldownStore(cooldown, max_cooldown_keys)
+        self.digests = {}  # camera_id -> CameraDigest
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def add(self, camera_id, frame, tracks, behavior_info, timestamp=None):
+        """
+        Called once per processed frame. Returns the number of digests sent.
+        """
+        now = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            digest = self.digests.get(camera_id)
+            new_event = False
+            for t, b in zip(tracks, behavior_info):
+                decision = b["decision"]
+                if decision not in COLORS:
+                    continue
+                previous = digest.events.get(t["track_id"]) if digest is not None else None
+                if previous is not None and previous[0] == "Alert" and decision == "Warning":
+                    continue  # keep the more severe event, and don't start a cooldown for this one
+                if not self.cooldowns.allow((camera_id, t["track_id"], decision), now):
+                    continue
+                if previous is not None and previous[0] != decision:
+                    # replaced before it was sent: only what the message reports cools down
+                    self.cooldowns.release((camera_id, t["track_id"], previous[0]))
+                if digest is None:
+                    digest = self.digests[camera_id] = CameraDigest(now)
+                digest.events[t["track_id"]] = (decision, b["reason"], t["bbox"])
+                new_event = True
+
+            if new_event:
+                digest.frame = frame.copy()  # latest frame with a new event; the caller keeps drawing on its own
+
+            ready = [cam for cam, d in self.digests.items() if now - d.opened >= self.window]
+            digests = [(cam, self.digests.pop(cam)) for cam in ready]
+
+        for cam, d in digests:
+            self._send(cam, d)
+        return len(digests)
+
+    def flush(self):
+        """
+        Sends every open digest now (e.g. on shutdown).
+        """
+        with self._lock:
+            digests, self.digests = self.digests, {}
+        for cam, d in digests.items():
+            self._send(cam, d)
+
+    def _send(self, camera_id, digest):
+        image = digest.frame
+        for track_id, (decision, _, bbox) in digest.events.items():
+            x1, y1, x2, y2 = [int(v) for v in bbox]
+            cv2.rectangle(image, (x1, y1), (x2, y2), COLORS[decision], 3)
+            cv2.putText(image, f"ID {track_id}", (x1, max(15, y1 - 10)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, COLORS[decision], 2)
+
+        if self.notifier.send_photo(image, self.caption(camera_id, digest), f"cam{camera_id}_digest"):
+            self.sent += 1
+            print(f"[TELEGRAM] digest queued ({camera_id}, {len(digest.events)} tracks)")
+
+    def caption(self, camera_id, digest):
+        events = list(digest.events.items())
+        alerts = sum(1 for _, (decision, _, _) in events if decision == "Alert")
+        head = f"Camera: {camera_id}\n{alerts} alert(s), {len(events) - alerts} warning(s)"
+
+        lines = [f"Track {track_id}: {decision} - {reason}" for track_id, (decision, reason, _) in events]
+        shown = lines[:self.max_lines]
+        while shown and len("\n".join([head] + shown)) > CAPTION_LIMIT - 20:
+            shown.pop()
+        if len(shown) < len(lines):
+            shown.append(f"... and {len(lines) - len(shown)} more")
+        return "\n".join([head] + shown)[:CAPTION_LIMIT]
@@ -0,0 +1,230 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    __slots__ = ("frames", "nbytes", "max_bytes", "max_seconds")
+
+    def __init__(self, max_bytes, max_seconds):
+        """
+        Last max_seconds of one camera as JPEG bytes, never more than max_bytes.
+        """
+        self.frames = deque()  # (timestamp, jpeg bytes), oldest first
+        self.nbytes = 0
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+    def append(self, timestamp, jpeg):
+        self.frames.append((timestamp, jpeg))
+        self.nbytes += len(jpeg)
+        while self.frames and (self.nbytes > self.max_bytes or timestamp - self.frames[0][0] > self.max_seconds):
+            self.nbytes -= len(self.frames.popleft()[1])
+
+
+class PendingClip:
+    __slots__ = ("camera_id", "start", "end", "frames", "nbytes")
+
+    def __init__(self, camera_id, start, end, frames):
+        self.camera_id = camera_id
+        self.start = start
+        self.end = end  # keep recording until this timestamp
+        self.frames = list(frames)
+        self.nbytes = sum(len(jpeg) for _, jpeg in self.frames)
+
+
+class ClipRecorder:
+    def __init__(self, output_dir="clips", pre_roll=5.0, post_roll=5.0, max_bytes=32 * 1024 * 1024,
+                 max_length=60.0, cooldown=10.0, jpeg_quality=80, max_width=960, fallback_fps=8.0,
+                 on_clip=None, queue_size=4, queue_bytes=16 * 1024 * 1024):
+        """
+        Keeps a compressed pre-roll per camera and writes an MP4 around each Alert.
+        add() only queues the raw frame: resizing, JPEG encoding and the ring /
+        clip bookkeeping run on an encoder thread, MP4 writing on a writer thread.
+
+        pre_roll / post_roll: seconds of footage before / after the trigger
+        max_bytes: JPEG budget per camera ring, and per clip being recorded
+        max_length: a clip kept alive by repeated triggers is cut after this many seconds
+        cooldown: seconds after a clip ends before the same camera can start another
+        max_width: frames are downscaled to this width before encoding (None: full size)
+        fallback_fps: clip frame rate when it cannot be measured from the timestamps
+        on_clip: optional callable(camera_id, path), called from the writer thread
+        queue_size: finished clips waiting for the writer
+        queue_bytes: raw frame bytes per camera waiting for the encoder; newer frames are
+                     dropped beyond it (one frame always fits), so a busy camera
+                     cannot starve the others
+        """
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_bytes = max_bytes
+        self.max_length = max_length
+        self.cooldown = cooldown
+        self.jpeg_quality = jpeg_quality
+        self.max_width = max_width
+        self.fallback_fps = fallback_fps
+        self.on_clip = on_clip
+
+        self.rings = {}     # camera_id -> FrameRing
+        self.pending = {}   # camera_id -> PendingClip still collecting post-roll
+        self.last_end = {}  # camera_id -> end timestamp of the last clip
+        self.clips = []     # paths written
+        self.dropped_frames = 0  # frames the encoder could not keep up with
+        self.queue_bytes = queue_bytes
+        self.queued = {}    # camera_id -> raw bytes waiting for the encoder
+        self._lock = threading.Lock()
+        self._frames = queue.Queue()  # bounded by queue_bytes per camera, not by count
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._encoder = None
+        self._thread = None
+
+    def start(self):
+        self._encoder = threading.Thread(target=self._encode_loop, name="clip-encoder", daemon=True)
+        self._encoder.start()
+        self._thread = threading.Thread(target=self._writer, name="clip-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        """
+        Encodes the frames already queued, writes the clips still recording (with
+        the post-roll they have) and stops both threads.
+        """
+        if self._encoder is not None:
+            self._frames.put(None)
+            self._encoder.join(timeout)
+            self._encoder = None
+        with self._lock:
+            pending, self.pending = list(self.pending.values()), {}
+        for clip in pending:
+            self._queue.put(clip)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if self.max_width and w > self.max_width:
+            frame = cv2.resize(frame, (self.max_width, int(h * self.max_width / w)), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return jpeg.tobytes() if ok else None
+
+    def add(self, camera_id, frame, timestamp=None):
+        """
+        Called for every processed frame of a camera. Never blocks: the frame is
+        encoded on the encoder thread, and the caller must not modify it afterwards.
+        """
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            queued = self.queued.get(camera_id, 0)
+            if queued and queued + frame.nbytes > self.queue_bytes:
+                self.dropped_frames += 1
+                return
+            self.queued[camera_id] = queued + frame.nbytes
+        self._frames.put((camera_id, now, frame))
+
+    def _encode_loop(self):
+        while True:
+            item = self._frames.get()
+            if item is None:
+                break
+            camera_id, now, frame = item
+            with self._lock:
+                self.queued[camera_id] -= frame.nbytes
+            jpeg = self._encode(frame)
+            if jpeg is not None:
+                self._store(camera_id, now, jpeg)
+
+    def _store(self, camera_id, now, jpeg):
+        """
+        Ring and clip bookkeeping for one encoded frame (encoder thread).
+        """
+        done = None
+        with self._lock:
+            ring = self.rings.get(camera_id)
+            if ring is None:
+                ring = self.rings[camera_id] = FrameRing(self.max_bytes, self.pre_roll)
+            ring.append(now, jpeg)
+
+            clip = self.pending.get(camera_id)
+            # frames still queued when the trigger came are pre-roll, if recent enough
+            if clip is not None and now >= clip.start - self.pre_roll:
+                full = clip.nbytes + len(jpeg) > self.max_bytes
+                if not full:
+                    clip.frames.append((now, jpeg))
+                    clip.nbytes += len(jpeg)
+                if full or now >= clip.end:
+                    done = self.pending.pop(camera_id)
+                    self.last_end[camera_id] = now
+
+        if done is not None:
+            try:
+                self._queue.put_nowait(done)
+            except queue.Full:
+                print(f"[WARN] clip writer busy, clip of {camera_id} dropped")
+
+    def trigger(self, camera_id, timestamp=None):
+        """
+        Starts a clip (pre-roll from the ring) or extends the one being recorded.
+        Returns True if a new clip was started.
+        """
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            clip = self.pending.get(camera_id)
+            if clip is not None:
+                clip.end = min(max(clip.end, now + self.post_roll), clip.start + self.max_length)
+                return False
+            if now - self.last_end.get(camera_id, -np.inf) < self.cooldown:
+                return False
+            ring = self.rings.get(camera_id)
+            frames = [f for f in ring.frames if f[0] >= now - self.pre_roll] if ring is not None else ()
+            self.pending[camera_id] = PendingClip(camera_id, now, now + self.post_roll, frames)
+            return True
+
+    def _writer(self):
+        while True:
+            clip = self._queue.get()
+            if clip is None:
+                break
+            try:
+                path = self._write(clip)
+            except Exception as e:
+                print(f"[ERROR] writing clip of {clip.camera_id}: {e}")
+                continue
+            if path is None:
+                continue
+            self.clips.append(path)
+            print(f"[INFO] clip saved: {path}")
+            if self.on_clip is not None:
+                self.on_clip(clip.camera_id, path)
+
+    def _write(self, clip):
+        if not clip.frames:
+            return None
+        times = [t for t, _ in clip.frames]
+        duration = times[-1] - times[0]
+        fps = (len(times) - 1) / duration if duration > 0 else self.fallback_fps
+
+        stamp = datetime.fromtimestamp(clip.start).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, f"{clip.camera_id}_{stamp}.mp4")
+
+        writer = None
+        try:
+            for _, jpeg in clip.frames:
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                writer.write(frame)
+        finally:
+            if writer is not None:
+                writer.release()
+        return path
@@ -1,33 +1,193 @@
-import requests
 import cv2
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+
 class TelegramNotifier:
-    def __init__(self, bot_token, chat_id, save_snapshots=True):
+    def __init__(self, bot_token, chat_id, save_snapshots=True, snapshot_dir="snapshots",
+                 api_url="https://api.telegram.org", queue_size=8, jpeg_quality=85,
+                 min_interval=1.0, max_retries=3, backoff=1.0, timeout=5.0):
+        """
+        Sends alerts from a background thread, the frame loop only enqueues.
+
+        queue_size: pending alerts; when full, new alerts are dropped (and counted)
+        jpeg_quality: in-memory JPEG encoding quality
+        min_interval: seconds between two sends (Telegram allows ~1 message/s per chat)
+        max_retries: retries on network errors, 5xx and 429, with exponential backoff
+                     (429 waits the retry_after Telegram asks for)
+        api_url: Bot API base url, point it at a local server for tests
+        """
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.save_snapshots = save_snapshots
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}/sendPhoto"
-        self.tmp_dir = "snapshots"
+        self.base_url = f"{api_url.rstrip('/')}/bot{self.bot_token}/sendPhoto"
+        self.tmp_dir = snapshot_dir
         if self.save_snapshots and not os.path.exists(self.tmp_dir):
             os.makedirs(self.tmp_dir)
 
+        self.jpeg_quality = jpeg_quality
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session = None
+        self.last_send = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._closed = False  # stop() was called: send_photo() must not bring the worker back
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._closed = False
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._worker, name="telegram", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """
+        Sends what is still queued for up to timeout seconds, then stops the worker.
+        Alerts not sent by then are dropped; returns after about timeout seconds
+        even when a send is stuck in retries.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._closed = True
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+        self._stop.set()  # cut short the backoff / retries and whatever is still queued
+        try:
+            self.queue.put_nowait(None)  # wakes the worker if the first sentinel did not fit
+        except queue.Full:
+            pass
+        thread.join(1.0)
+        if thread.is_alive():
+            print("[Telegram] Worker still busy with a request, not waiting for it")
+        elif self.session is not None:
+            self.session.close()
+            self.session = None
+
     def send_alert(self, frame, track_id, cam_id, decision, reason):
+        """
+        Queues an alert and returns at once. False if the queue was full.
+        """
+        caption = f"Camera: {cam_id}\nTrack ID: {track_id}\nDecision: {decision}\nReason: {reason}"
+        return self.send_photo(frame, caption, f"cam{cam_id}_track{track_id}")
+
+    def send_photo(self, frame, caption, name):
+        """
+        Queues any frame + caption. name: snapshot file prefix.
+        False (and counted as dropped) once the notifier was stopped.
+        """
+        if self._closed:
+            self.dropped += 1
+            return False
+        if self._thread is None:
+            self.start()
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.tmp_dir}/cam{cam_id}_track{track_id}_{timestamp}.jpg"
-        
-        if self.save_snapshots:
-            cv2.imwrite(filename, frame)
-        else:
-            filename = frame  # use frame directly if using memory buffer (advanced)
+        filename = os.path.join(self.tmp_dir, f"{name}_{timestamp}.jpg")
 
-        caption = f"Camera: {cam_id}\nTrack ID: {track_id}\nDecision: {decision}\nReason: {reason}"
+        try:
+            # the caller keeps drawing on its frame
+            self.queue.put_nowait((frame.copy(), caption, filename))
+        except queue.Full:
+            self.dropped += 1
+            print(f"[Telegram] Queue full, alert dropped ({name})")
+            return False
+        return True
+
+    def _worker(self):
+        while not self._stop.is_set():
+            item = self.queue.get()
+            if item is None or self._stop.is_set():
+                break
+            frame, caption, filename = item
+
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                self.failed += 1
+                print("[Telegram] Failed to encode snapshot")
+                continue
+            jpeg = jpeg.tobytes()
+
+            if self.save_snapshots:
+                try:
+                    with open(filename, "wb") as f:
+                        f.write(jpeg)
+                except OSError as e:
+                    print(f"[Telegram] Failed to save snapshot: {e}")
+
+            wait = self.min_interval - (time.monotonic() - self.last_send)
+            if wait > 0 and self._stop.wait(wait):
+                break
 
-        with open(filename, "rb") as img_file:
-            files = {"photo": img_file}
-            data = {"chat_id": self.chat_id, "caption": caption}
+            if self._post(jpeg, caption):
+                self.sent += 1
+            else:
+                self.failed += 1
+            self.last_send = time.monotonic()
+
+    def _session(self):
+        if self.session is None:
+            import requests  # only needed once an alert is actually sent
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        return self.session
+
+    def _post(self, jpeg, caption):
+        """
+        One sendPhoto call with retries. Returns True on success.
+        """
+        session = self._session()
+        data = {"chat_id": self.chat_id, "caption": caption}
+
+        for attempt in range(self.max_retries + 1):
+            if self._stop.is_set():
+                break
+            delay = self.backoff * 2 ** attempt
             try:
-                requests.post(self.base_url, files=files, data=data, timeout=5)
+                response = session.post(
+                    self.base_url, files={"photo": ("alert.jpg", jpeg, "image/jpeg")},
+                    data=data, timeout=self.timeout
+                )
             except Exception as e:
                 print(f"[Telegram] Failed to send alert: {e}")
+            else:
+                if response.ok:
+                    return True
+                if response.status_code == 429:
+                    try:
+                        delay = float(response.json()["parameters"]["retry_after"])
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                    print(f"[Telegram] Rate limited, retrying in {delay:.1f}s")
+                elif response.status_code < 500:
+                    print(f"[Telegram] Alert rejected: {response.status_code} {response.text[:200]}")
+                    return False
+                else:
+                    print(f"[Telegram] Server error {response.status_code}")
+
+            if attempt < self.max_retries and self._stop.wait(delay):
+                break
+        return False